@@ -1,32 +1,173 @@
 """Toy agent implementations that mimic Maven workers."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Callable
 
-from primitives import PlanStep
+from .primitives import PlanStep
+
+
+class PlanCache:
+    """Thread-safe LRU of plans keyed by a hash of the planner inputs and the planner version."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[PlanStep, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Keys some thread is planning right now, so duplicates wait instead of re-planning.
+        self._building: dict[str, threading.Event] = {}
+
+    @staticmethod
+    def key(name: str, version: str, title: str, description: str, steps: int) -> str:
+        payload = json.dumps([name, version, title, description, steps], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[PlanStep, ...] | None:
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: str, plan: list[PlanStep]) -> None:
+        with self._lock:
+            self._entries[key] = tuple(plan)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, key: str, build: Callable[[], list[PlanStep]]) -> tuple[PlanStep, ...]:
+        """Return the cached plan, building it once however many threads ask at the same time."""
+        with self._lock:
+            plan = self._lookup(key)
+            if plan is not None:
+                return plan
+            pending = self._building.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._building[key] = threading.Event()
+        if not owner:
+            pending.wait()
+            # A hit now, unless the build failed; then this thread tries itself.
+            return self.get_or_build(key, build)
+        try:
+            plan = tuple(build())
+            self.put(key, list(plan))
+        finally:
+            with self._lock:
+                del self._building[key]
+            pending.set()
+        return plan
+
+    def _lookup(self, key: str) -> tuple[PlanStep, ...] | None:
+        plan = self._entries.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return plan
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# Shared by every planner so a re-planned task hits regardless of which orchestrator asks.
+PLAN_CACHE = PlanCache()
 
 
 @dataclass
 class PlannerAgent:
     name: str = "planner"
+    # Bump whenever the plan for the same inputs can change; cached plans are keyed on it.
+    version: str = "1"
+    cache: PlanCache = field(default=PLAN_CACHE, repr=False)
 
     def create_plan(self, title: str, description: str, steps: int) -> list[PlanStep]:
+        """Return the memoized plan for these inputs, building it on a miss."""
+        key = PlanCache.key(self.name, self.version, title, description, steps)
+        cached = self.cache.get_or_build(key, lambda: self._build_plan(steps))
+        # Copies, so a caller editing its plan cannot corrupt the cached one.
+        return [replace(step) for step in cached]
+
+    def _build_plan(self, steps: int) -> list[PlanStep]:
         """Return a deterministic plan so the candidate can follow the flow."""
+        # Data collection does not need the objectives, so those two steps can overlap.
         outline = [
-            "Clarify objectives",
-            "Collect supporting data",
-            "Synthesize insights",
-            "Draft recommendations",
+            ("Clarify objectives", ()),
+            ("Collect supporting data", ()),
+            ("Synthesize insights", (0, 1)),
+            ("Draft recommendations", (2,)),
         ]
         selected = outline[: max(steps, 1)]
-        return [PlanStep(description=item, agent=self.name) for item in selected]
+        return [PlanStep(description=item, agent=self.name, depends_on=deps) for item, deps in selected]
+
+
+class AgentOverloaded(RuntimeError):
+    """A call waited longer than its throttle allows; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Throttle:
+    """Token bucket plus a concurrency cap shared by every call to one agent.
+
+    A call over the rate or the cap waits up to ``max_wait`` seconds, then
+    raises ``AgentOverloaded`` rather than piling onto a throttled backend.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, concurrency: int = 4, max_wait: float = 5.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def __enter__(self) -> "Throttle":
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            delay = max(0.0, (1 - self._tokens) / self.rate)
+            if delay > self.max_wait:
+                raise AgentOverloaded(f"rate limit; retry in {delay:.1f}s", delay)
+            # Reserved now, so concurrent callers queue up behind this one.
+            self._tokens -= 1
+        time.sleep(delay)
+        if not self._slots.acquire(timeout=self.max_wait - delay):
+            with self._lock:
+                self._tokens += 1
+            raise AgentOverloaded("all slots busy", self.max_wait)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._slots.release()
 
 
 @dataclass
 class ResearchAgent:
     name: str = "researcher"
+    # Shared by every orchestrator calling the same backend; None calls it unthrottled.
+    throttle: Throttle | None = field(default=None, repr=False)
 
     def execute(self, instruction: str) -> str:
+        """Run a subtask through the throttle, if any."""
+        if self.throttle is None:
+            return self._respond(instruction)
+        with self.throttle:
+            return self._respond(instruction)
+
+    def _respond(self, instruction: str) -> str:
         """Pretend to run a subtask and return a canned response."""
         responses = {
             "Clarify objectives": "Objective confirmed with PM and Sales",
@@ -0,0 +1,303 @@
+"""Disk-backed memory store: an append-only segment log with memory-mapped reads.
+
+Drop-in alternative to ``MemoryStore`` for long-running workers. Only a
+compact offset index lives on the heap; plans, events and summaries are
+read back from the log on demand.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .primitives import PlanStep, SubTaskResult, TaskSummary
+
+# Each record is a little-endian (payload length, crc32 of payload) header plus JSON.
+_HEADER = struct.Struct("<II")
+_SEGMENT_GLOB = "segment-*.log"
+
+
+def _segment_name(segment_id: int) -> str:
+    return f"segment-{segment_id:08d}.log"
+
+
+class _TaskIndex:
+    __slots__ = ("title", "plan", "summary", "event_segments", "event_offsets")
+
+    def __init__(self, title: str) -> None:
+        self.title = title
+        # (segment id, offset) of the latest plan/summary record; older ones are garbage.
+        self.plan: Optional[Tuple[int, int]] = None
+        self.summary: Optional[Tuple[int, int]] = None
+        # Parallel typed arrays: 12 bytes per event instead of a tuple per event.
+        self.event_segments = array("I")
+        self.event_offsets = array("Q")
+
+
+class DurableMemoryStore:
+    """Same API as ``MemoryStore``, persisted to ``directory``.
+
+    Writes append to the active segment and roll over to a new one past
+    ``segment_bytes``. Opening a directory replays every segment to rebuild the
+    index, truncating a torn record at the tail of the last segment. Call
+    ``compact`` to drop superseded plans and summaries.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], segment_bytes: int = 64 * 1024 * 1024, fsync: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._tasks: Dict[str, _TaskIndex] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._next_task = 1
+        self._writer: Optional[BinaryIO] = None
+        self._active_id = 0
+        self._recover()
+
+    # -- MemoryStore API ---------------------------------------------------
+
+    def open_task(self, task_title: str) -> str:
+        task_id = f"task-{self._next_task}"
+        self._append({"k": "open", "t": task_id, "title": task_title})
+        return task_id
+
+    def store_plan(self, task_id: str, plan: list[PlanStep]) -> None:
+        self._require(task_id)
+        self._append({"k": "plan", "t": task_id, "v": [asdict(step) for step in plan]})
+
+    def store_event(self, task_id: str, description: str, result: SubTaskResult, step: Optional[int] = None) -> None:
+        index = self._require(task_id)
+        if step is not None and step < len(index.event_offsets):
+            # Already checkpointed by an earlier attempt at this run.
+            return
+        payload = asdict(result)
+        payload["started_at"] = result.started_at.isoformat()
+        payload["completed_at"] = result.completed_at.isoformat()
+        # The sequence number lets replay skip copies left behind by an interrupted compaction.
+        self._append({"k": "event", "t": task_id, "n": len(index.event_offsets), "v": payload})
+
+    def store_summary(self, task_id: str, summary: TaskSummary) -> None:
+        self._require(task_id)
+        self._append({"k": "summary", "t": task_id, "v": asdict(summary)})
+
+    def history(self, task_id: str) -> Sequence[str]:
+        index = self._tasks.get(task_id)
+        if index is None:
+            return []
+        lines = [f"Plan: {step.description}" for step in self.plan(task_id)]
+        lines.extend(f"Result: {event.output}" for event in self.events(task_id))
+        summary = self.summary(task_id)
+        if summary:
+            lines.append(f"Summary: {summary.short_answer}")
+        return lines
+
+    def find(self, task_title: str) -> List[str]:
+        return [task_id for task_id, index in self._tasks.items() if index.title == task_title]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.utcnow()
+
+    # -- Reads -------------------------------------------------------------
+
+    def plan(self, task_id: str) -> list[PlanStep]:
+        location = self._require(task_id).plan
+        if location is None:
+            return []
+        steps = self._read(*location)["v"]
+        return [PlanStep(**{**step, "depends_on": tuple(step["depends_on"])}) for step in steps]
+
+    def events(self, task_id: str) -> Iterator[SubTaskResult]:
+        index = self._require(task_id)
+        for segment_id, offset in zip(index.event_segments, index.event_offsets):
+            value = self._read(segment_id, offset)["v"]
+            value["started_at"] = datetime.fromisoformat(value["started_at"])
+            value["completed_at"] = datetime.fromisoformat(value["completed_at"])
+            yield SubTaskResult(**value)
+
+    def summary(self, task_id: str) -> Optional[TaskSummary]:
+        location = self._require(task_id).summary
+        return None if location is None else TaskSummary(**self._read(*location)["v"])
+
+    def title(self, task_id: str) -> str:
+        return self._require(task_id).title
+
+    def unfinished(self) -> List[str]:
+        """Ids of tasks with a plan but no summary: runs a crash interrupted."""
+        return [task_id for task_id, index in self._tasks.items() if index.plan and index.summary is None]
+
+    # -- Maintenance -------------------------------------------------------
+
+    def compact(self) -> None:
+        """Rewrite live records into fresh segments and delete the old ones.
+
+        New segments get higher ids than every existing one, so a crash midway
+        leaves both copies on disk and replay resolves them: plans and
+        summaries are last-writer-wins and duplicate events are skipped.
+        """
+        old_segments = self._segment_ids()
+        old_tasks, self._tasks = self._tasks, {}
+        self._roll(self._active_id + 1)
+        # Stream record by record; the old index still points into the old segments.
+        for task_id, index in old_tasks.items():
+            for record in self._live_records(task_id, index):
+                self._append(record)
+        self._sync()
+        for segment_id in old_segments:
+            self._unmap(segment_id)
+            (self.directory / _segment_name(segment_id)).unlink()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._sync()
+            self._writer.close()
+            self._writer = None
+        for segment_id in list(self._maps):
+            self._unmap(segment_id)
+
+    def __enter__(self) -> "DurableMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # -- Internals ---------------------------------------------------------
+
+    def _require(self, task_id: str) -> _TaskIndex:
+        index = self._tasks.get(task_id)
+        if index is None:
+            raise KeyError(f"Unknown task {task_id!r}")
+        return index
+
+    def _live_records(self, task_id: str, index: _TaskIndex) -> Iterator[dict]:
+        yield {"k": "open", "t": task_id, "title": index.title}
+        if index.plan is not None:
+            yield self._read(*index.plan)
+        for segment_id, offset in zip(index.event_segments, index.event_offsets):
+            yield self._read(segment_id, offset)
+        if index.summary is not None:
+            yield self._read(*index.summary)
+
+    def _append(self, record: dict) -> None:
+        payload = json.dumps(record, separators=(",", ":")).encode()
+        assert self._writer is not None
+        if self._writer.tell() and self._writer.tell() + _HEADER.size + len(payload) > self.segment_bytes:
+            self._roll(self._active_id + 1)
+        offset = self._writer.tell()
+        self._writer.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._writer.write(payload)
+        self._writer.flush()
+        if self.fsync:
+            os.fsync(self._writer.fileno())
+        self._apply(record, self._active_id, offset)
+
+    def _apply(self, record: dict, segment_id: int, offset: int) -> None:
+        kind, task_id = record["k"], record["t"]
+        if kind == "open":
+            self._tasks.setdefault(task_id, _TaskIndex(record["title"]))
+            self._next_task = max(self._next_task, int(task_id.rsplit("-", 1)[1]) + 1)
+            return
+        index = self._tasks.get(task_id)
+        if index is None:
+            return
+        if kind == "plan":
+            index.plan = (segment_id, offset)
+        elif kind == "summary":
+            index.summary = (segment_id, offset)
+        elif kind == "event" and record["n"] == len(index.event_offsets):
+            index.event_segments.append(segment_id)
+            index.event_offsets.append(offset)
+
+    def _read(self, segment_id: int, offset: int) -> Any:
+        view = self._map(segment_id, offset + _HEADER.size)
+        length, _ = _HEADER.unpack_from(view, offset)
+        start = offset + _HEADER.size
+        if start + length > len(view):
+            view = self._map(segment_id, start + length)
+        return json.loads(view[start : start + length])
+
+    def _map(self, segment_id: int, needed: int) -> mmap.mmap:
+        """Map a segment read-only, remapping when the active one has grown past the view."""
+        view = self._maps.get(segment_id)
+        if view is None or len(view) < needed:
+            if view is not None:
+                view.close()
+            with open(self.directory / _segment_name(segment_id), "rb") as handle:
+                view = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment_id] = view
+        return view
+
+    def _unmap(self, segment_id: int) -> None:
+        view = self._maps.pop(segment_id, None)
+        if view is not None:
+            view.close()
+
+    def _roll(self, segment_id: int) -> None:
+        if self._writer is not None:
+            self._sync()
+            self._writer.close()
+        self._active_id = segment_id
+        self._writer = open(self.directory / _segment_name(segment_id), "ab")
+
+    def _sync(self) -> None:
+        assert self._writer is not None
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+
+    def _segment_ids(self) -> List[int]:
+        return sorted(int(path.stem.rsplit("-", 1)[1]) for path in self.directory.glob(_SEGMENT_GLOB))
+
+    def _recover(self) -> None:
+        segment_ids = self._segment_ids()
+        for position, segment_id in enumerate(segment_ids):
+            valid_end = self._replay(segment_id)
+            path = self.directory / _segment_name(segment_id)
+            if valid_end < path.stat().st_size:
+                if position != len(segment_ids) - 1:
+                    raise ValueError(f"Corrupt record in sealed segment {path} at offset {valid_end}")
+                # A torn write from a crash: drop the partial record at the tail.
+                self._unmap(segment_id)
+                os.truncate(path, valid_end)
+        self._roll(segment_ids[-1] if segment_ids else 1)
+
+    def _replay(self, segment_id: int) -> int:
+        """Apply every intact record in a segment and return where the intact prefix ends."""
+        path = self.directory / _segment_name(segment_id)
+        size = path.stat().st_size
+        if size == 0:
+            return 0
+        view = self._map(segment_id, size)
+        end = 0
+        for offset, payload in _records(view, size):
+            self._apply(json.loads(payload), segment_id, offset)
+            end = offset + _HEADER.size + len(payload)
+        return end
+
+
+def _records(view: mmap.mmap, size: int) -> Iterator[Tuple[int, bytes]]:
+    offset = 0
+    while offset + _HEADER.size <= size:
+        length, checksum = _HEADER.unpack_from(view, offset)
+        end = offset + _HEADER.size + length
+        if end > size:
+            return
+        payload = view[offset + _HEADER.size : end]
+        if zlib.crc32(payload) != checksum:
+            return
+        yield offset, payload
+        offset = end
+
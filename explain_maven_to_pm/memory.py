@@ -1,40 +1,212 @@
 """Simplified memory store for the comprehension exercise."""
 from __future__ import annotations
 
+import itertools
+import time
+from collections import OrderedDict
 from datetime import datetime
-from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Callable, Iterator, List, Optional, Sequence, overload
 
-from primitives import PlanStep, SubTaskResult, TaskSummary
+from .primitives import PlanStep, SubTaskResult, TaskSummary
+
+
+class HistoryView(Sequence[str]):
+    """Read-only snapshot of a task's history lines.
+
+    Holds a reference to the record's line list plus the length at read time,
+    so taking a view copies nothing. Writes that would rewrite earlier lines
+    swap in a new list instead, leaving older views unchanged.
+    """
+
+    __slots__ = ("_lines", "_length")
+
+    def __init__(self, lines: List[str]) -> None:
+        self._lines = lines
+        self._length = len(lines)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index):  # type: ignore[no-untyped-def]
+        if isinstance(index, slice):
+            return [self._lines[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._lines[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return itertools.islice(self._lines, self._length)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistoryView({list(self)!r})"
+
+
+class _TaskRecord:
+    __slots__ = ("title", "plan", "events", "summary", "lines", "size", "touched_at")
+
+    def __init__(self, title: str, touched_at: float) -> None:
+        self.title = title
+        self.plan: list[PlanStep] = []
+        self.events: list[SubTaskResult] = []
+        self.summary: Optional[TaskSummary] = None
+        # Rendered history, appended to as writes arrive.
+        self.lines: List[str] = []
+        self.size = len(title)
+        self.touched_at = touched_at
 
 
-@dataclass
 class MemoryStore:
-    """Records plans, execution events, and summaries."""
-
-    plans: Dict[str, list[PlanStep]] = field(default_factory=dict)
-    events: Dict[str, list[SubTaskResult]] = field(default_factory=dict)
-    summaries: Dict[str, TaskSummary] = field(default_factory=dict)
-
-    def store_plan(self, task_title: str, plan: list[PlanStep]) -> None:
-        self.plans[task_title] = plan
-
-    def store_event(self, task_title: str, description: str, result: SubTaskResult) -> None:
-        self.events.setdefault(task_title, []).append(result)
-
-    def store_summary(self, task_title: str, summary: TaskSummary) -> None:
-        self.summaries[task_title] = summary
-
-    def history(self, task_title: str) -> List[str]:
-        """Return a flattened view of everything that happened for a task."""
-        plan = self.plans.get(task_title, [])
-        events = self.events.get(task_title, [])
-        summary = self.summaries.get(task_title)
-        lines = [f"Plan: {step.description}" for step in plan]
-        lines.extend(f"Result: {event.output}" for event in events)
-        if summary:
-            lines.append(f"Summary: {summary.short_answer}")
-        return lines
+    """Records plans, execution events, and summaries per task.
+
+    Tasks get a unique id from ``open_task`` so two tasks with the same title
+    no longer overwrite each other. The store is bounded: least recently used
+    tasks are evicted once ``max_tasks`` or ``max_bytes`` is exceeded, and
+    tasks untouched for ``ttl_seconds`` expire.
+    """
+
+    def __init__(
+        self,
+        max_tasks: Optional[int] = 1000,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_tasks = max_tasks
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._ids = itertools.count(1)
+        # Ordered from least to most recently used.
+        self._tasks: OrderedDict[str, _TaskRecord] = OrderedDict()
+        self.size_bytes = 0
+
+    def open_task(self, task_title: str) -> str:
+        """Register a new task and return the id used by every other call."""
+        task_id = f"task-{next(self._ids)}"
+        self._tasks[task_id] = _TaskRecord(task_title, self._clock())
+        self.size_bytes += len(task_title)
+        self._evict()
+        return task_id
+
+    def store_plan(self, task_id: str, plan: list[PlanStep]) -> None:
+        record = self._touch(task_id)
+        record.plan = list(plan)
+        self._rebuild(record)
+
+    def store_event(self, task_id: str, description: str, result: SubTaskResult, step: Optional[int] = None) -> None:
+        """Append a step result; ``step`` makes the write idempotent when a step is retried."""
+        record = self._touch(task_id)
+        if step is not None and step < len(record.events):
+            return
+        record.events.append(result)
+        line = f"Result: {result.output}"
+        if record.summary is None:
+            record.lines.append(line)
+            self._grow(record, len(line))
+        else:
+            # The summary line stays last, so this is the rare out-of-order path.
+            self._rebuild(record)
+
+    def store_summary(self, task_id: str, summary: TaskSummary) -> None:
+        record = self._touch(task_id)
+        replacing = record.summary is not None
+        record.summary = summary
+        if replacing:
+            self._rebuild(record)
+        else:
+            line = f"Summary: {summary.short_answer}"
+            record.lines.append(line)
+            self._grow(record, len(line))
+
+    def history(self, task_id: str) -> Sequence[str]:
+        """Return everything that happened for a task, without rebuilding it."""
+        record = self._tasks.get(task_id)
+        if record is None or self._expired(record):
+            return HistoryView([])
+        self._touch(task_id)
+        return HistoryView(record.lines)
+
+    def find(self, task_title: str) -> List[str]:
+        """Ids of the tasks still held under a title, oldest first."""
+        return [task_id for task_id, record in self._tasks.items() if record.title == task_title]
+
+    def title(self, task_id: str) -> str:
+        return self._touch(task_id).title
+
+    def plan(self, task_id: str) -> list[PlanStep]:
+        return list(self._touch(task_id).plan)
+
+    def events(self, task_id: str) -> Iterator[SubTaskResult]:
+        return iter(list(self._touch(task_id).events))
+
+    def summary(self, task_id: str) -> Optional[TaskSummary]:
+        return self._touch(task_id).summary
+
+    def unfinished(self) -> List[str]:
+        """Ids of tasks with a plan but no summary: runs that stopped part-way."""
+        return [task_id for task_id, record in self._tasks.items() if record.plan and record.summary is None]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def _touch(self, task_id: str) -> _TaskRecord:
+        self._expire()
+        record = self._tasks.get(task_id)
+        if record is None:
+            raise KeyError(f"Unknown or evicted task {task_id!r}")
+        record.touched_at = self._clock()
+        self._tasks.move_to_end(task_id)
+        return record
+
+    def _rebuild(self, record: _TaskRecord) -> None:
+        # A fresh list rather than in-place edits keeps earlier HistoryViews stable.
+        lines = [f"Plan: {step.description}" for step in record.plan]
+        lines.extend(f"Result: {event.output}" for event in record.events)
+        if record.summary:
+            lines.append(f"Summary: {record.summary.short_answer}")
+        record.lines = lines
+        self._grow(record, len(record.title) + sum(map(len, lines)) - record.size)
+
+    def _grow(self, record: _TaskRecord, delta: int) -> None:
+        record.size += delta
+        self.size_bytes += delta
+        self._evict()
+
+    def _expired(self, record: _TaskRecord) -> bool:
+        return self.ttl_seconds is not None and self._clock() - record.touched_at > self.ttl_seconds
+
+    def _expire(self) -> None:
+        # LRU order is also touch order, so expired tasks sit at the front.
+        while self._tasks and self._expired(next(iter(self._tasks.values()))):
+            self._drop_oldest()
+
+    def _evict(self) -> None:
+        self._expire()
+        while len(self._tasks) > 1 and (
+            (self.max_tasks is not None and len(self._tasks) > self.max_tasks)
+            or (self.max_bytes is not None and self.size_bytes > self.max_bytes)
+        ):
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        _, record = self._tasks.popitem(last=False)
+        self.size_bytes -= record.size
 
     @staticmethod
     def now() -> datetime:
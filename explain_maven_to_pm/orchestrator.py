@@ -1,37 +1,113 @@
 """Minimal orchestration engine that simulates Maven's Planned flow."""
 from __future__ import annotations
 
-from typing import Iterable
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Optional, Sequence
 
-from agents import PlannerAgent, ResearchAgent
-from memory import MemoryStore
-from primitives import PlanStep, SubTaskResult, TaskSummary
+from .agents import PlannerAgent, ResearchAgent, Throttle
+from .memory import MemoryStore
+from .primitives import BatchResult, PlanStep, SubTaskResult, TaskSpec, TaskSummary
 
 
 class TaskOrchestrator:
     """Coordinates the lifecycle of a Planned task."""
 
-    def __init__(self, memory: MemoryStore) -> None:
+    def __init__(
+        self, memory: MemoryStore, max_parallelism: int = 4, research_throttle: Optional[Throttle] = None
+    ) -> None:
         self.memory = memory
         self.planner = PlannerAgent()
-        self.researcher = ResearchAgent()
+        self.researcher = ResearchAgent(throttle=research_throttle)
+        self.max_parallelism = max_parallelism
+        # Neither memory store is thread-safe; batches run several tasks at once.
+        self._memory_lock = threading.Lock()
 
     def run_task(self, title: str, description: str, estimated_steps: int) -> TaskSummary:
         """High-level entry point used by the sample notebook/tests."""
-        mode = self._select_mode(estimated_steps)
+        return self._run(TaskSpec(title, description, estimated_steps))
+
+    def run_batch(
+        self,
+        specs: Iterable[TaskSpec],
+        max_concurrency: int = 8,
+        summary_processes: int = 0,
+    ) -> Iterator[BatchResult]:
+        """Run many tasks, yielding each one's result as soon as it finishes.
+
+        ``specs`` is read lazily, so at most ``max_concurrency`` tasks are in
+        flight however long the input is. Agent calls run on threads; with
+        ``summary_processes`` the CPU-bound summarisation moves to a process
+        pool. Duplicate specs share one plan through the planner's cache. A
+        task that raises is reported in its ``BatchResult`` and does not stop
+        the others.
+        """
+        pending = enumerate(specs)
+        summary_pool = None
+        if summary_processes:
+            # Imported here: it loads multiprocessing, which most callers never need.
+            from concurrent.futures import ProcessPoolExecutor
+
+            summary_pool = ProcessPoolExecutor(summary_processes)
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="batch-task") as pool:
+                running: dict[Future[TaskSummary], tuple[int, TaskSpec]] = {}
+                while True:
+                    while len(running) < max_concurrency:
+                        item = next(pending, None)
+                        if item is None:
+                            break
+                        running[pool.submit(self._run, item[1], summary_pool)] = item
+                    if not running:
+                        return
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, spec = running.pop(future)
+                        error = future.exception()
+                        summary = None if error else future.result()
+                        yield BatchResult(index=index, spec=spec, summary=summary, error=error)
+        finally:
+            if summary_pool is not None:
+                summary_pool.shutdown()
+
+    def _run(self, spec: TaskSpec, summary_pool: Optional[Executor] = None) -> TaskSummary:
+        mode = self._select_mode(spec.estimated_steps)
         if mode == "investigative":
             raise ValueError("This sandbox only covers planned tasks")
 
-        plan = self.planner.create_plan(title=title, description=description, steps=estimated_steps)
-        self.memory.store_plan(title, plan)
+        with self._memory_lock:
+            task_id = self.memory.open_task(spec.title)
+        plan = self.planner.create_plan(title=spec.title, description=spec.description, steps=spec.estimated_steps)
+        with self._memory_lock:
+            self.memory.store_plan(task_id, plan)
 
         approved = self._await_plan_approval(plan)
         if not approved:
             raise RuntimeError("Plan rejected")
 
-        results = list(self._execute_plan(title, plan))
-        summary = self._summarise(title, description, results)
-        self.memory.store_summary(title, summary)
+        results = self._execute_plan(task_id, plan)
+        summary = self._summarise(spec.title, spec.description, results, summary_pool)
+        with self._memory_lock:
+            self.memory.store_summary(task_id, summary)
+        return summary
+
+    def resume_task(self, task_id: str, description: str) -> TaskSummary:
+        """Finish an interrupted run, re-running only the steps without a checkpoint.
+
+        Results are checkpointed in plan order, so the recorded events are
+        always a prefix of the plan; that prefix is reused as-is.
+        """
+        summary = self.memory.summary(task_id)
+        if summary is not None:
+            return summary
+        plan = self.memory.plan(task_id)
+        if not plan:
+            raise ValueError(f"Task {task_id} has no stored plan to resume")
+        completed = list(self.memory.events(task_id))
+        results = self._execute_plan(task_id, plan, completed)
+        summary = self._summarise(self.memory.title(task_id), description, results)
+        self.memory.store_summary(task_id, summary)
         return summary
 
     def _select_mode(self, estimated_steps: int) -> str:
@@ -43,28 +119,87 @@ class TaskOrchestrator:
         """Simulate a human-in-the-loop approval check."""
         return True
 
-    def _execute_plan(self, task_title: str, plan: list[PlanStep]) -> Iterable[SubTaskResult]:
-        for step in plan:
-            result = self.researcher.execute(step.description)
-            event = SubTaskResult(
-                agent=step.agent,
-                output=result,
-                started_at=self.memory.now(),
-                completed_at=self.memory.now(),
-            )
-            self.memory.store_event(task_title, step.description, event)
-            yield event
+    def _execute_plan(
+        self,
+        task_id: str,
+        plan: list[PlanStep],
+        completed: Sequence[SubTaskResult] = (),
+    ) -> Iterator[SubTaskResult]:
+        """Run the plan as a DAG, yielding each result as soon as it can be released.
+
+        Every step whose dependencies are done runs concurrently. Results are
+        released in plan order, each one the moment it and all earlier steps
+        have finished, so the memory history and the summary stay
+        deterministic while the first result still arrives after the first step.
+        Steps with a result in ``completed`` are not run again.
+        """
+        waiting = {index: set(step.depends_on) for index, step in enumerate(plan)}
+        for index, deps in waiting.items():
+            unknown = [dep for dep in deps if not 0 <= dep < len(plan) or dep == index]
+            if unknown:
+                raise ValueError(f"Step {index} depends on unknown steps {unknown}")
+
+        results: dict[int, SubTaskResult] = dict(enumerate(completed))
+        for index in results:
+            del waiting[index]
+        released = 0
+        with ThreadPoolExecutor(max_workers=self.max_parallelism) as pool:
+            running: dict[Future[SubTaskResult], int] = {}
+            while True:
+                while released in results:
+                    result = results[released]
+                    # The step index is the idempotency key: a checkpointed step is not written twice.
+                    with self._memory_lock:
+                        self.memory.store_event(task_id, plan[released].description, result, step=released)
+                    released += 1
+                    yield result
+                if not (waiting or running):
+                    return
+                ready = [index for index, deps in waiting.items() if deps <= results.keys()]
+                for index in ready:
+                    del waiting[index]
+                    running[pool.submit(self._run_step, plan[index])] = index
+                if not running:
+                    raise ValueError(f"Plan steps {sorted(waiting)} have cyclic dependencies")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+    def _run_step(self, step: PlanStep) -> SubTaskResult:
+        started_at = self.memory.now()
+        started = time.perf_counter()
+        output = self.researcher.execute(step.description)
+        elapsed = time.perf_counter() - started
+        return SubTaskResult(
+            agent=step.agent,
+            output=output,
+            started_at=started_at,
+            completed_at=self.memory.now(),
+            duration_ms=elapsed * 1000,
+        )
 
     def _summarise(
         self,
         title: str,
         description: str,
-        results: list[SubTaskResult],
+        results: Iterable[SubTaskResult],
+        pool: Optional[Executor] = None,
     ) -> TaskSummary:
-        highlights = " ".join(result.output for result in results)
-        callouts = ["Verify pricing with finance", "Prepare customer-facing update"]
-        return TaskSummary(
-            short_answer=f"Completed {title}",
-            detailed_answer=f"{description}. Key findings: {highlights}",
-            next_steps=callouts,
-        )
+        # Consumes the step stream as it arrives rather than waiting for a finished list.
+        findings: list[str] = []
+        for result in results:
+            findings.append(result.output)
+        if pool is None:
+            return build_summary(title, description, findings)
+        return pool.submit(build_summary, title, description, findings).result()
+
+
+def build_summary(title: str, description: str, findings: list[str]) -> TaskSummary:
+    """Turn step outputs into the final answer; module-level so a process pool can run it."""
+    highlights = " ".join(findings)
+    callouts = ["Verify pricing with finance", "Prepare customer-facing update"]
+    return TaskSummary(
+        short_answer=f"Completed {title}",
+        detailed_answer=f"{description}. Key findings: {highlights}",
+        next_steps=callouts,
+    )
@@ -3,21 +3,25 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class PlanStep:
     description: str
     agent: str
+    # Indices of earlier steps in the same plan that must finish before this one starts.
+    depends_on: Tuple[int, ...] = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class SubTaskResult:
     agent: str
     output: str
     started_at: datetime
     completed_at: datetime
+    # Measured on a monotonic clock; wall-clock timestamps can jump.
+    duration_ms: float = 0.0
 
 
 @dataclass
@@ -25,3 +29,26 @@ class TaskSummary:
     short_answer: str
     detailed_answer: str
     next_steps: List[str]
+
+
+@dataclass(slots=True, frozen=True)
+class TaskSpec:
+    """Inputs for one ``run_task`` call, as fed to ``run_batch``."""
+
+    title: str
+    description: str
+    estimated_steps: int
+
+
+@dataclass(slots=True)
+class BatchResult:
+    """Outcome of one spec in a batch: a summary, or the error that task raised."""
+
+    index: int
+    spec: TaskSpec
+    summary: Optional[TaskSummary] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
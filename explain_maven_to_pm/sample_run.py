@@ -1,11 +1,23 @@
-"""Tiny script that exercises the orchestrator."""
+"""Tiny script that exercises the orchestrator.
+
+Runs as ``python sample_run.py`` from this directory or as
+``python -m explain_maven_to_pm.sample_run`` from its parent.
+"""
 from __future__ import annotations
 
-from memory import MemoryStore
-from orchestrator import TaskOrchestrator
+import sys
+from pathlib import Path
 
+if not __package__:
+    # Run as a script: make the package importable from its parent directory.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-if __name__ == "__main__":
+from explain_maven_to_pm.memory import MemoryStore  # noqa: E402
+from explain_maven_to_pm.orchestrator import TaskOrchestrator  # noqa: E402
+from explain_maven_to_pm.primitives import TaskSpec  # noqa: E402
+
+
+def main() -> None:
     orchestrator = TaskOrchestrator(memory=MemoryStore())
     summary = orchestrator.run_task(
         title="Competitive Pricing Review",
@@ -17,3 +29,17 @@ if __name__ == "__main__":
     print("Next steps:")
     for step in summary.next_steps:
         print("-", step)
+
+    # Nightly-style batch: results stream back in completion order, failures stay per task.
+    specs = [
+        TaskSpec("Churn Deep Dive", "Explain churn in segment B", 4),
+        TaskSpec("Quick Lookup", "Too small to plan", 1),
+        TaskSpec("Churn Deep Dive", "Explain churn in segment B", 4),
+    ]
+    for result in orchestrator.run_batch(specs, max_concurrency=2):
+        outcome = result.summary.short_answer if result.ok else f"failed: {result.error}"
+        print(f"[batch {result.index}] {outcome}")
+
+
+if __name__ == "__main__":
+    main()
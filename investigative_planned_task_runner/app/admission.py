@@ -0,0 +1,255 @@
+"""Admission control in front of agent calls: rate, concurrency and a bounded queue.
+
+Model backends throttle bursts, and clients retrying throttled calls make the
+burst worse. Each agent type gets a token bucket for its call rate and a
+concurrency limit that backs off while latency rises. A call that finds
+neither free waits in a bounded queue; once the queue is full, or the wait
+would outlast the queue timeout, the call is shed at once with
+``AgentOverloadedError``, which the API answers with 429 and ``Retry-After``.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from .metrics import AGENT_CONCURRENCY_LIMIT, AGENT_SHED_TOTAL, METRICS
+from .settings import settings
+
+# Latencies under this never count as a slowdown, so microsecond jitter of a
+# fast agent does not shrink its limit.
+LATENCY_FLOOR_SECONDS = 0.01
+
+
+class AgentOverloadedError(RuntimeError):
+    """The call was shed; ``retry_after`` is the estimated seconds until it would be admitted."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """``rate`` calls per second on average, in bursts of up to ``burst``.
+
+    Not locked itself; ``Admission`` only touches it under its own lock.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def delay(self) -> float:
+        """Seconds until a token is available; 0 if one is available now."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def take(self) -> None:
+        # May go negative: a call waiting for its token has already reserved it.
+        self._tokens -= 1
+
+    def refund(self) -> None:
+        self._tokens += 1
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit driven by call latency.
+
+    The baseline is the lowest latency among the last ``window`` calls. While
+    the smoothed latency stays under ``tolerance`` times the baseline, the
+    limit grows by one per limit's worth of calls, up to ``maximum``; a call
+    that fails or pushes it over cuts the limit by ``backoff``, down to
+    ``minimum``. Queueing upstream of the backend shows up as latency before
+    it shows up as errors, so this backs off before the backend throttles.
+    """
+
+    def __init__(
+        self,
+        maximum: int,
+        minimum: int = 1,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+        window: int = 100,
+        smoothing: float = 0.2,
+    ):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.latency: Optional[float] = None
+        self._limit = float(maximum)
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    @property
+    def value(self) -> int:
+        return max(self.minimum, int(self._limit))
+
+    def observe(self, seconds: float, ok: bool = True) -> None:
+        self._recent.append(seconds)
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += self.smoothing * (seconds - self.latency)
+        threshold = max(min(self._recent), LATENCY_FLOOR_SECONDS) * self.tolerance
+        if not ok or self.latency > threshold:
+            self._limit = max(self.minimum, self._limit * self.backoff)
+        else:
+            self._limit = min(self.maximum, self._limit + 1 / self._limit)
+
+
+class Admission:
+    """Decides whether a call to one agent type runs now, waits, or is shed.
+
+    A call needs a rate token and a concurrency slot. Without both it joins
+    a queue of at most ``queue_size`` callers and waits up to
+    ``queue_timeout`` seconds for them. Steps of an admitted stream keep its
+    slot and only wait for tokens through ``reserve``; they are never shed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: AdaptiveLimit,
+        bucket: Optional[TokenBucket] = None,
+        queue_size: int = 32,
+        queue_timeout: float = 10.0,
+        adaptive: bool = True,
+    ):
+        self.name = name
+        self.limit = limit
+        self.bucket = bucket
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self._in_flight = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._publish_limit()
+
+    @property
+    def in_flight(self) -> int:
+        with self._cond:
+            return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        with self._cond:
+            return self._waiting
+
+    def try_admit(self) -> bool:
+        """Take a token and a slot if both are free right now, without queueing."""
+        with self._cond:
+            if self._waiting or self._in_flight >= self.limit.value:
+                return False
+            if self.bucket is not None:
+                if self.bucket.delay() > 0:
+                    return False
+                self.bucket.take()
+            self._in_flight += 1
+            return True
+
+    def admit(self) -> None:
+        """Block until the call may run, or raise ``AgentOverloadedError``."""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            delay = self._take_token()
+            if not delay and not self._waiting and self._in_flight < self.limit.value:
+                self._in_flight += 1
+                return
+            if self._waiting >= self.queue_size:
+                raise self._shed("queue full", self._retry_after(delay))
+            ready_at = time.monotonic() + delay
+            self._waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= ready_at and self._in_flight < self.limit.value:
+                        break
+                    if now >= deadline:
+                        raise self._shed("queue timeout", self._retry_after(ready_at - now))
+                    self._cond.wait((ready_at if now < ready_at else deadline) - now)
+                self._in_flight += 1
+            finally:
+                self._waiting -= 1
+
+    def reserve(self) -> float:
+        """Take a token for a follow-on call of an admitted stream; returns the seconds to wait first."""
+        if self.bucket is None:
+            return 0.0
+        with self._cond:
+            delay = self.bucket.delay()
+            self.bucket.take()
+            return delay
+
+    def refund(self) -> None:
+        """Return a token from ``reserve`` that went unused."""
+        if self.bucket is None:
+            return
+        with self._cond:
+            self.bucket.refund()
+
+    def observe(self, seconds: float, ok: bool = True) -> None:
+        """Feed one call's latency to the adaptive limit."""
+        if not self.adaptive:
+            return
+        with self._cond:
+            before = self.limit.value
+            self.limit.observe(seconds, ok)
+            if self.limit.value != before:
+                self._publish_limit()
+                self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _take_token(self) -> float:
+        if self.bucket is None:
+            return 0.0
+        delay = self.bucket.delay()
+        if delay > self.queue_timeout:
+            raise self._shed("rate limit", delay)
+        self.bucket.take()
+        return delay
+
+    def _retry_after(self, delay: float) -> float:
+        # Roughly how long the callers ahead of this one keep the slots busy.
+        per_call = self.limit.latency or 0.0
+        return max(delay, per_call * (self._waiting + 1) / self.limit.value)
+
+    def _shed(self, reason: str, retry_after: float) -> AgentOverloadedError:
+        if reason != "rate limit" and self.bucket is not None:
+            # The call never runs, so its token goes back.
+            self.bucket.refund()
+        METRICS.inc(AGENT_SHED_TOTAL, help="Agent calls rejected by admission control", agent=self.name, reason=reason)
+        return AgentOverloadedError(f"{self.name} agent overloaded ({reason}); retry in {retry_after:.1f}s", retry_after)
+
+    def _publish_limit(self) -> None:
+        METRICS.set(
+            AGENT_CONCURRENCY_LIMIT, self.limit.value, help="Current concurrency limit per agent", agent=self.name
+        )
+
+
+def agent_admission(name: str, concurrency: int, rate_per_minute: int) -> Admission:
+    """Admission for one agent type from the settings; a rate of 0 means unlimited."""
+    bucket = TokenBucket(rate_per_minute / 60, settings.agent_burst) if rate_per_minute > 0 else None
+    return Admission(
+        name,
+        AdaptiveLimit(concurrency),
+        bucket,
+        queue_size=settings.agent_queue_size,
+        queue_timeout=settings.agent_queue_timeout_seconds,
+        adaptive=settings.adaptive_concurrency,
+    )
@@ -1,20 +1,35 @@
-"""Mock agents used by the sandbox."""
+"""Mock agents used by the sandbox, and the registry that pools them."""
 from __future__ import annotations
 
+import asyncio
+import inspect
+import queue
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Callable, Collection, Dict, Iterator, Optional
 
+from .admission import Admission, AgentOverloadedError, agent_admission
+from .metrics import AGENT_RUN_SECONDS, METRICS
 from .models import Task
+from .settings import settings
 
 
 @dataclass
 class AgentResponse:
     agent: str
     output: str
+    # Wall time of the agent call, measured by the registry on a monotonic clock.
+    duration_ms: float = 0.0
+    # Index of the plan step this response belongs to, and the plan's length, for step-wise agents.
+    step: Optional[int] = None
+    total_steps: Optional[int] = None
 
 
 class PlannerAgent:
     name = "planner"
+    # Bump whenever the output for the same task can change; cached plans are keyed on it.
+    version = "1"
 
     def run(self, task: Task) -> AgentResponse:
         """Pretend to create a multi-step plan for a task."""
@@ -34,11 +49,396 @@ class ExecutorAgent:
             result = f"Investigated task {task.id} without plan"
         return AgentResponse(agent=self.name, output=result)
 
+    def run_steps(self, task: Task, plan: str | None = None, done: Collection[int] = ()) -> Iterator[AgentResponse]:
+        """Execute one step at a time, yielding each result as soon as it is produced.
+
+        Steps listed in ``done`` finished in an earlier run and are skipped.
+        """
+        if plan:
+            steps = plan.removeprefix("Plan: ").split(" -> ")
+        else:
+            steps = [f"Step {i+1}" for i in range(max(1, task.estimated_steps))]
+        for index, step in enumerate(steps):
+            if index in done:
+                continue
+            output = f"Executed {step} ({index + 1}/{len(steps)}) for task {task.id}"
+            yield AgentResponse(agent=self.name, output=output, step=index, total_steps=len(steps))
+
+
+class AgentTimeoutError(TimeoutError):
+    """No pooled agent became free, or the agent did not answer, within the timeout."""
+
+
+class AgentPool:
+    """Up to ``size`` instances of one agent, each serving one call at a time.
+
+    The pool size is therefore also the agent's concurrency limit. Instances
+    are created on demand up to the limit, or all at once by ``warm``.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], size: int, timeout_seconds: float):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.timeout_seconds = timeout_seconds
+        # LIFO so the most recently used (warmest) instance is handed out first.
+        self._idle: queue.LifoQueue[Any] = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def warm(self) -> None:
+        while (agent := self._create()) is not None:
+            self._idle.put(agent)
+
+    def try_acquire(self) -> Optional[Any]:
+        """An idle or newly created instance, or ``None`` if all are busy."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._create()
+
+    def acquire(self) -> Any:
+        agent = self.try_acquire()
+        if agent is not None:
+            return agent
+        try:
+            return self._idle.get(timeout=self.timeout_seconds)
+        except queue.Empty:
+            raise AgentTimeoutError(f"No {self.name} agent free within {self.timeout_seconds}s") from None
+
+    def release(self, agent: Any) -> None:
+        self._idle.put(agent)
+
+    def close(self) -> None:
+        while True:
+            try:
+                agent = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._created -= 1
+            if hasattr(agent, "close"):
+                agent.close()
+
+    def _create(self) -> Optional[Any]:
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        return self.factory()
+
+
+class AgentRegistry:
+    """Named agent pools, created once and shared by every request and job.
+
+    Agents may implement ``run`` as a plain or an ``async`` method; both the
+    sync ``run`` and the async ``arun`` entry points accept either kind. A
+    pool registered with an ``Admission`` only gets the calls it admits; the
+    rest raise ``AgentOverloadedError``.
+    """
+
+    def __init__(self) -> None:
+        self._pools: Dict[str, AgentPool] = {}
+        self._admissions: Dict[str, Admission] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        size: int,
+        timeout_seconds: float,
+        admission: Optional[Admission] = None,
+    ) -> None:
+        self._pools[name] = AgentPool(name, factory, size, timeout_seconds)
+        if admission is not None:
+            self._admissions[name] = admission
+
+    def pool(self, name: str) -> AgentPool:
+        return self._pools[name]
+
+    def admission(self, name: str) -> Optional[Admission]:
+        return self._admissions.get(name)
+
+    def warm(self) -> None:
+        """Build every agent up front so the first request does not pay for it."""
+        for pool in self._pools.values():
+            pool.warm()
+
+    def close(self) -> None:
+        for pool in self._pools.values():
+            pool.close()
+
+    def run(self, name: str, task: Task, *, plan: str | None = None) -> AgentResponse:
+        """Run an agent from a worker thread.
+
+        The timeout bounds the wait for a free instance and async agents'
+        calls; a sync agent cannot be interrupted once it has started.
+        """
+        pool = self._pools[name]
+        admission = self._admissions.get(name)
+        if admission is not None:
+            admission.admit()
+        try:
+            agent = pool.acquire()
+            ok = False
+            started = time.perf_counter()
+            try:
+                response = _call(agent, task, plan)
+                if inspect.isawaitable(response):
+                    response = asyncio.run(_bounded(response, pool))
+                ok = True
+            finally:
+                pool.release(agent)
+                _observe(admission, started, ok)
+            return _timed(response, name, task, started)
+        finally:
+            _release(admission)
+
+    async def arun(self, name: str, task: Task, *, plan: str | None = None) -> AgentResponse:
+        """Run an agent from the event loop without blocking it."""
+        pool = self._pools[name]
+        admission = self._admissions.get(name)
+        await _admit_async(admission)
+        try:
+            agent = pool.try_acquire()
+            if agent is None:
+                agent = await asyncio.to_thread(pool.acquire)
+        except BaseException:
+            _release(admission)
+            raise
+        started = time.perf_counter()
+        if inspect.iscoroutinefunction(agent.run):
+            ok = False
+            try:
+                response = await _bounded(_call(agent, task, plan), pool)
+                ok = True
+            finally:
+                pool.release(agent)
+                _observe(admission, started, ok)
+                _release(admission)
+            return _timed(response, name, task, started)
+
+        call = asyncio.ensure_future(asyncio.to_thread(_call, agent, task, plan))
+        try:
+            response = await asyncio.wait_for(asyncio.shield(call), pool.timeout_seconds)
+        except BaseException as exc:
+            # On a timeout or cancellation the thread keeps running; only return the instance
+            # and the admission slot once it is done. Fires right away if it already failed.
+            _observe(admission, started, ok=False)
+            call.add_done_callback(lambda _: (pool.release(agent), _release(admission)))
+            if isinstance(exc, asyncio.TimeoutError):
+                raise AgentTimeoutError(f"{name} agent did not answer within {pool.timeout_seconds}s") from None
+            raise
+        pool.release(agent)
+        _observe(admission, started, ok=True)
+        _release(admission)
+        return _timed(response, name, task, started)
+
+    def stream(
+        self, name: str, task: Task, *, plan: str | None = None, done: Collection[int] = ()
+    ) -> Iterator[AgentResponse]:
+        """Run a step-wise agent from a worker thread, yielding each step's response.
+
+        One instance and one admission slot are held until the stream is
+        exhausted or closed; steps after the first wait for a rate token.
+        """
+        pool = self._pools[name]
+        admission = self._admissions.get(name)
+        if admission is not None:
+            admission.admit()
+        try:
+            agent = pool.acquire()
+            try:
+                steps = agent.run_steps(task, plan=plan, done=done)
+                paced = False
+                while True:
+                    if paced:
+                        time.sleep(_reserve(admission))
+                    paced = True
+                    ok = False
+                    started = time.perf_counter()
+                    try:
+                        response = next(steps, None)
+                        ok = True
+                    finally:
+                        _observe(admission, started, ok)
+                    if response is None:
+                        _refund(admission)
+                        return
+                    yield _timed(response, name, task, started)
+            finally:
+                pool.release(agent)
+        finally:
+            _release(admission)
+
+    async def astream(
+        self, name: str, task: Task, *, plan: str | None = None, done: Collection[int] = ()
+    ) -> AsyncIterator[AgentResponse]:
+        """Async counterpart of ``stream``; each step is bounded by the pool timeout."""
+        pool = self._pools[name]
+        admission = self._admissions.get(name)
+        await _admit_async(admission)
+        try:
+            agent = pool.try_acquire()
+            if agent is None:
+                agent = await asyncio.to_thread(pool.acquire)
+        except BaseException:
+            _release(admission)
+            raise
+        steps = agent.run_steps(task, plan=plan, done=done)
+        release = True
+        paced = False
+        try:
+            while True:
+                if paced:
+                    await asyncio.sleep(_reserve(admission))
+                paced = True
+                started = time.perf_counter()
+                if inspect.isasyncgen(steps):
+                    try:
+                        response = await _bounded(steps.__anext__(), pool)
+                    except StopAsyncIteration:
+                        _refund(admission)
+                        return
+                    except BaseException:
+                        _observe(admission, started, ok=False)
+                        raise
+                else:
+                    call = asyncio.ensure_future(asyncio.to_thread(next, steps, None))
+                    try:
+                        response = await asyncio.wait_for(asyncio.shield(call), pool.timeout_seconds)
+                    except BaseException as exc:
+                        # As in ``arun``: the step keeps its thread, so return the instance when it ends.
+                        release = False
+                        _observe(admission, started, ok=False)
+                        call.add_done_callback(lambda _: (pool.release(agent), _release(admission)))
+                        if isinstance(exc, asyncio.TimeoutError):
+                            raise AgentTimeoutError(f"{name} agent did not answer within {pool.timeout_seconds}s") from None
+                        raise
+                    if response is None:
+                        _refund(admission)
+                        return
+                _observe(admission, started, ok=True)
+                yield _timed(response, name, task, started)
+        finally:
+            if release:
+                pool.release(agent)
+                _release(admission)
+
+
+class FakeAgent:
+    """Stand-in for a model-backed agent that answers after ``latency`` seconds.
+
+    ``latency`` may be a callable, read on every call, so a load test can
+    make the backend slow down while it runs.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float | Callable[[], float] = 0.05):
+        self._latency = latency if callable(latency) else lambda: latency
+
+    def run(self, task: Task, plan: str | None = None) -> AgentResponse:
+        time.sleep(self._latency())
+        return AgentResponse(agent=self.name, output=f"Handled task {task.id}")
+
+    def run_steps(self, task: Task, plan: str | None = None, done: Collection[int] = ()) -> Iterator[AgentResponse]:
+        steps = max(1, task.estimated_steps)
+        for index in range(steps):
+            if index in done:
+                continue
+            time.sleep(self._latency())
+            yield AgentResponse(agent=self.name, output=f"Step {index + 1} of task {task.id}", step=index, total_steps=steps)
+
+
+def _call(agent: Any, task: Task, plan: str | None) -> Any:
+    if plan is None:
+        # The planner takes no plan argument; only forward one when there is one.
+        return agent.run(task)
+    return agent.run(task, plan=plan)
+
+
+async def _bounded(call: Any, pool: AgentPool) -> AgentResponse:
+    try:
+        return await asyncio.wait_for(call, pool.timeout_seconds)
+    except asyncio.TimeoutError:
+        raise AgentTimeoutError(f"{pool.name} agent did not answer within {pool.timeout_seconds}s") from None
+
+
+async def _admit_async(admission: Optional[Admission]) -> None:
+    if admission is None or admission.try_admit():
+        return
+    admit = asyncio.ensure_future(asyncio.to_thread(admission.admit))
+    try:
+        await asyncio.shield(admit)
+    except asyncio.CancelledError:
+        # The thread may still be admitted after the caller gave up; give the slot straight back.
+        admit.add_done_callback(lambda done: done.exception() is None and admission.release())
+        raise
+
+
+def _observe(admission: Optional[Admission], started: float, ok: bool) -> None:
+    if admission is not None:
+        admission.observe(time.perf_counter() - started, ok)
+
+
+def _release(admission: Optional[Admission]) -> None:
+    if admission is not None:
+        admission.release()
+
+
+def _reserve(admission: Optional[Admission]) -> float:
+    return 0.0 if admission is None else admission.reserve()
+
+
+def _refund(admission: Optional[Admission]) -> None:
+    # The token reserved for the step after the last one was never used.
+    if admission is not None:
+        admission.refund()
+
+
+def _timed(response: AgentResponse, name: str, task: Task, started: float) -> AgentResponse:
+    elapsed = time.perf_counter() - started
+    response.duration_ms = elapsed * 1000
+    METRICS.observe(AGENT_RUN_SECONDS, elapsed, help="Wall time of agent calls", agent=name, mode=task.mode.value)
+    return response
+
+
+AGENTS = AgentRegistry()
+AGENTS.register(
+    PlannerAgent.name,
+    PlannerAgent,
+    settings.planner_pool_size,
+    settings.agent_timeout_seconds,
+    admission=agent_admission(PlannerAgent.name, settings.planner_pool_size, settings.planner_rate_per_minute),
+)
+AGENTS.register(
+    ExecutorAgent.name,
+    ExecutorAgent,
+    settings.executor_pool_size,
+    settings.agent_timeout_seconds,
+    admission=agent_admission(ExecutorAgent.name, settings.executor_pool_size, settings.executor_rate_per_minute),
+)
+
 
 def run_agent(agent_name: str, task: Task, *, plan: str | None = None) -> AgentResponse:
     """Dispatch helper used by the service layer."""
-    agents: Dict[str, Any] = {
-        PlannerAgent.name: PlannerAgent(),
-        ExecutorAgent.name: ExecutorAgent(),
-    }
-    return agents[agent_name].run(task, plan=plan)  # type: ignore[arg-type]
+    return AGENTS.run(agent_name, task, plan=plan)
+
+
+async def run_agent_async(agent_name: str, task: Task, *, plan: str | None = None) -> AgentResponse:
+    """Async counterpart of ``run_agent`` for the async service."""
+    return await AGENTS.arun(agent_name, task, plan=plan)
+
+
+def stream_agent(
+    agent_name: str, task: Task, *, plan: str | None = None, done: Collection[int] = ()
+) -> Iterator[AgentResponse]:
+    """Step-wise dispatch helper used by execution."""
+    return AGENTS.stream(agent_name, task, plan=plan, done=done)
+
+
+def stream_agent_async(
+    agent_name: str, task: Task, *, plan: str | None = None, done: Collection[int] = ()
+) -> AsyncIterator[AgentResponse]:
+    return AGENTS.astream(agent_name, task, plan=plan, done=done)
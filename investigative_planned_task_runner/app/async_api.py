@@ -0,0 +1,142 @@
+"""Fully async variants of the hot task routes, enabled with ``TASK_RUNNER_ASYNC_API``.
+
+Handlers here await the database through ``AsyncTaskRepository`` instead of
+borrowing a threadpool worker per request, so slow queries under load queue
+on the event loop rather than exhausting the threadpool.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from .async_repository import AsyncTaskRepository, async_session_scope
+from .models import ExecutionMode, Task
+from .schemas import AuditLogEntry, CreateTaskRequest, JobView, PlanApprovalRequest, TaskView
+from . import fastjson
+from .serializers import event_dict, serialize_event, serialize_job, serialize_task, task_row_dict
+from .services import AsyncTaskService
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+router = APIRouter()
+
+
+async def get_async_repo() -> AsyncIterator[AsyncTaskRepository]:
+    async with async_session_scope() as session:
+        yield AsyncTaskRepository(session)
+
+
+def get_async_service(repo: AsyncTaskRepository = Depends(get_async_repo)) -> AsyncTaskService:
+    return AsyncTaskService(repo)
+
+
+async def _get_task(service: AsyncTaskService, task_id: int) -> Task:
+    task = await service.repo.get(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+async def _task_response(service: AsyncTaskService, task_id: int) -> Response:
+    row = await service.repo.task_row(task_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return fastjson.FastJSONResponse(task_row_dict(row))
+
+
+@router.get("/tasks", response_model=list[TaskView])
+async def list_tasks(
+    response: Response,
+    after: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    mode: Optional[ExecutionMode] = None,
+    service: AsyncTaskService = Depends(get_async_service),
+) -> list[TaskView] | Response:
+    rows = await service.repo.list_task_rows(after_id=after, limit=limit + 1, status=status, mode=mode)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return fastjson.json_list_response(map(task_row_dict, rows), len(rows), headers=dict(response.headers))
+
+
+@router.get("/tasks/{task_id}", response_model=TaskView)
+async def get_task(task_id: int, service: AsyncTaskService = Depends(get_async_service)) -> TaskView | Response:
+    return await _task_response(service, task_id)
+
+
+@router.post("/tasks", response_model=TaskView, status_code=201)
+async def create_task(
+    request: CreateTaskRequest,
+    service: AsyncTaskService = Depends(get_async_service),
+) -> TaskView:
+    task = Task(
+        title=request.title,
+        description=request.description,
+        estimated_steps=request.estimated_steps,
+        forced_mode=request.forced_mode,
+        priority=request.priority,
+        deadline=request.deadline,
+    )
+    service.select_mode(task)
+    await service.repo.save(task)
+    # A new task has no summary, but serializing would otherwise trigger a lazy load.
+    await service.repo.session.refresh(task, ["summary"])
+    return serialize_task(task)
+
+
+@router.post("/tasks/{task_id}/plan", response_model=AuditLogEntry)
+async def present_plan(task_id: int, service: AsyncTaskService = Depends(get_async_service)) -> AuditLogEntry:
+    task = await _get_task(service, task_id)
+    return serialize_event(await service.generate_plan(task))
+
+
+@router.post("/tasks/{task_id}/plan/approval", response_model=TaskView)
+async def approve_plan(
+    task_id: int,
+    payload: PlanApprovalRequest,
+    service: AsyncTaskService = Depends(get_async_service),
+) -> TaskView:
+    if not payload.approved:
+        raise HTTPException(status_code=400, detail="Only approvals are supported in this sandbox")
+    await service.approve_plan(await _get_task(service, task_id))
+    return await _task_response(service, task_id)
+
+
+@router.get("/tasks/{task_id}/audit", response_model=list[AuditLogEntry])
+async def list_audit(
+    task_id: int,
+    response: Response,
+    after: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    service: AsyncTaskService = Depends(get_async_service),
+) -> list[AuditLogEntry] | Response:
+    await _get_task(service, task_id)
+    rows = await service.repo.audit_rows(task_id, after_id=after, limit=limit + 1, level=level, since=since, until=until)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return fastjson.json_list_response(map(event_dict, rows), len(rows), headers=dict(response.headers))
+
+
+@router.post("/tasks/{task_id}/execute", response_model=TaskView | JobView)
+async def execute_task(
+    task_id: int,
+    response: Response,
+    background: bool = False,
+    service: AsyncTaskService = Depends(get_async_service),
+) -> TaskView | JobView:
+    from .main import JOBS
+
+    task = await _get_task(service, task_id)
+    if background:
+        response.status_code = 202
+        return serialize_job(await service.enqueue_execution(task, JOBS))
+    await service.execute(task)
+    return await _task_response(service, task_id)
@@ -0,0 +1,161 @@
+"""Async counterpart of the repository, for the optional fully async API path."""
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Optional, Sequence
+
+from sqlalchemy import Row, delete, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import cache, events
+from .models import AuditTrail, ExecutionMode, PlanCacheEntry, StepCheckpoint, Task, TaskSummary
+from .repository import audit_rows_query, events_after_query, task_rows_query
+from .settings import storage_profile
+from .storage import apply_pragmas
+
+_ASYNC_ENGINE: Optional[AsyncEngine] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Build the async engine on first use so the driver (aiosqlite) stays optional."""
+    global _ASYNC_ENGINE
+    if _ASYNC_ENGINE is None:
+        url = storage_profile.async_database_url
+        if url.startswith("sqlite"):
+            _ASYNC_ENGINE = create_async_engine(
+                url,
+                poolclass=AsyncAdaptedQueuePool,
+                connect_args={"timeout": storage_profile.busy_timeout_ms / 1000},
+                pool_size=storage_profile.pool_size,
+                max_overflow=storage_profile.max_overflow,
+            )
+            # Writers are not run through the thread-based write gate here, since
+            # blocking on it would stall the event loop; busy_timeout queues them instead.
+            apply_pragmas(_ASYNC_ENGINE.sync_engine, storage_profile)
+        else:
+            _ASYNC_ENGINE = create_async_engine(url)
+    return _ASYNC_ENGINE
+
+
+async def dispose_async_engine() -> None:
+    global _ASYNC_ENGINE
+    if _ASYNC_ENGINE is not None:
+        engine, _ASYNC_ENGINE = _ASYNC_ENGINE, None
+        await engine.dispose()
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    session = AsyncSession(get_async_engine(), expire_on_commit=False)
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+class AsyncTaskRepository:
+    """Same interface as ``TaskRepository`` with awaitable methods."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def list_tasks(self) -> Sequence[Task]:
+        return (await self.session.exec(select(Task).options(selectinload(Task.summary)))).all()
+
+    async def list_task_rows(
+        self,
+        *,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        status: Optional[str] = None,
+        mode: Optional[ExecutionMode] = None,
+    ) -> Sequence[Row]:
+        return (await self.session.exec(task_rows_query(after_id, limit, status, mode))).all()
+
+    async def get(self, task_id: int) -> Optional[Task]:
+        # Summaries are loaded eagerly: lazy loads are not allowed on an async session.
+        return await self.session.get(Task, task_id, options=[selectinload(Task.summary)])
+
+    async def task_row(self, task_id: int) -> Optional[Row]:
+        return (await self.session.exec(task_rows_query(None, None, None, None).where(Task.id == task_id))).first()
+
+    async def save(self, task: Task) -> Task:
+        self.session.add(task)
+        await self.session.flush()
+        cache.invalidate_on_commit(self.session.sync_session, task.id)
+        return task
+
+    async def bulk_insert_tasks(self, rows: Sequence[dict]) -> list[int]:
+        if not rows:
+            return []
+        statement = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+        ids = list(await self.session.scalars(statement, rows))
+        cache.invalidate_on_commit(self.session.sync_session)
+        return ids
+
+    async def log_event(self, event: AuditTrail) -> AuditTrail:
+        self.session.add(event)
+        await self.session.flush()
+        events.stage(self.session.sync_session, event)
+        cache.invalidate_on_commit(self.session.sync_session, event.task_id, lists=False)
+        return event
+
+    async def events_after(self, task_id: int, after_id: int = 0, limit: Optional[int] = None) -> Sequence[Row]:
+        return (await self.session.exec(events_after_query(task_id, after_id, limit))).all()
+
+    async def audit_rows(
+        self,
+        task_id: int,
+        *,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        level: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[Row]:
+        return (await self.session.exec(audit_rows_query(task_id, after_id, limit, level, since, until))).all()
+
+    async def get_cached_plan(self, key: str) -> Optional[PlanCacheEntry]:
+        return await self.session.get(PlanCacheEntry, key)
+
+    async def save_cached_plan(self, entry: PlanCacheEntry) -> PlanCacheEntry:
+        entry = await self.session.merge(entry)
+        await self.session.flush()
+        return entry
+
+    async def checkpoints(self, task_id: int) -> Sequence[StepCheckpoint]:
+        statement = select(StepCheckpoint).where(StepCheckpoint.task_id == task_id).order_by(StepCheckpoint.step)
+        return (await self.session.exec(statement)).all()
+
+    async def save_checkpoint(self, checkpoint: StepCheckpoint) -> bool:
+        try:
+            async with self.session.begin_nested():
+                self.session.add(checkpoint)
+        except IntegrityError:
+            return False
+        return True
+
+    async def clear_checkpoints(self, task_id: int) -> None:
+        await self.session.exec(delete(StepCheckpoint).where(StepCheckpoint.task_id == task_id))
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
+
+    async def upsert_summary(self, summary: TaskSummary) -> TaskSummary:
+        self.session.add(summary)
+        await self.session.flush()
+        cache.invalidate_on_commit(self.session.sync_session, summary.task_id)
+        return summary
@@ -0,0 +1,130 @@
+"""Optional read cache for task lookups, invalidated when writes commit."""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Protocol, Tuple
+
+from sqlalchemy import event as sa_event
+from sqlmodel import Session
+
+from .metrics import METRICS
+from .settings import settings
+
+_DIRTY_KEY = "task_cache_dirty"
+_GENERATION_KEY = "tasks:generation"
+
+CACHE_REQUESTS_TOTAL = "task_runner_cache_requests_total"
+
+
+class CacheBackend(Protocol):
+    """What the repository needs from a cache.
+
+    The in-process ``LRUCache`` stores objects as-is; a shared backend
+    (Redis, memcached, ...) would pickle values and apply ``ttl`` itself.
+    """
+
+    def get(self, key: str) -> Optional[Any]: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def delete(self, *keys: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def task_key(task_id: int) -> str:
+    return f"task:{task_id}"
+
+
+def list_generation(cache: CacheBackend) -> str:
+    """Token that changes whenever any task changes; list entries are keyed by it.
+
+    Bumping one token retires every cached page at once instead of tracking
+    which pages a write could touch.
+    """
+    generation = cache.get(_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        cache.set(_GENERATION_KEY, generation)
+    return generation
+
+
+def lookup(cache: CacheBackend, key: str) -> Optional[Any]:
+    value = cache.get(key)
+    METRICS.inc(CACHE_REQUESTS_TOTAL, help="Task cache lookups", result="miss" if value is None else "hit")
+    return value
+
+
+def invalidate_on_commit(session: Session, task_id: Optional[int] = None, lists: bool = True) -> None:
+    """Record what a pending write makes stale; it is evicted once the transaction commits.
+
+    Evicting only after commit means a concurrent reader cannot re-cache the
+    old row between the eviction and the commit becoming visible.
+    """
+    keys = session.info.setdefault(_DIRTY_KEY, set())
+    if task_id is not None:
+        keys.add(task_key(task_id))
+    if lists:
+        keys.add(_GENERATION_KEY)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _evict_dirty(session: Session) -> None:
+    keys = session.info.pop(_DIRTY_KEY, None)
+    if keys and TASK_CACHE is not None:
+        TASK_CACHE.delete(*keys)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_dirty(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+
+
+TASK_CACHE: Optional[CacheBackend] = (
+    LRUCache(settings.task_cache_size, settings.task_cache_ttl_seconds) if settings.task_cache else None
+)
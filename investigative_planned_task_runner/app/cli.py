@@ -0,0 +1,111 @@
+"""Console entry point: ``task-runner serve|init-db|run-task|retention``.
+
+Every command imports what it needs when it runs, so a one-off ``init-db`` or
+``retention`` pass does not load the web stack and ``--help`` loads nothing.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import Callable, Dict, Optional, Sequence
+
+
+def serve(args: argparse.Namespace) -> int:
+    import uvicorn
+
+    if args.workers > 1:
+        # Workers inherit the environment. Streams must see every worker's events, and
+        # each worker would otherwise re-enqueue the same interrupted tasks on startup.
+        os.environ.setdefault("TASK_RUNNER_NOTIFY_BACKEND", "sqlite")
+        os.environ.setdefault("TASK_RUNNER_RESUME_INTERRUPTED", "false")
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        reload=args.reload,
+        workers=args.workers,
+    )
+    return 0
+
+
+def init_db(args: argparse.Namespace) -> int:
+    from .repository import init_db
+
+    init_db()
+    return 0
+
+
+def run_task(args: argparse.Namespace) -> int:
+    """Execute one task in this process, approving its plan first if asked to."""
+    from fastapi import HTTPException
+
+    from .fastjson import dumps
+    from .models import ExecutionMode
+    from .repository import TaskRepository, init_db, session_scope
+    from .serializers import task_row_dict
+    from .services import TaskService
+
+    init_db()
+    with session_scope() as session:
+        service = TaskService(TaskRepository(session))
+        task = service.repo.get(args.task_id)
+        if task is None:
+            print(f"task {args.task_id} not found", file=sys.stderr)
+            return 1
+        try:
+            if args.approve and task.mode == ExecutionMode.PLANNED and task.plan_approved_at is None:
+                service.generate_plan(task)
+                service.approve_plan(task)
+            service.execute(task)
+        except HTTPException as exc:
+            print(f"task {args.task_id}: {exc.detail}", file=sys.stderr)
+            return 1
+        row = service.repo.task_row(args.task_id)
+    print(dumps(task_row_dict(row)).decode())
+    return 0
+
+
+def retention(args: argparse.Namespace) -> int:
+    from .repository import init_db
+    from .retention import AuditArchive, archive_cold_events
+    from .settings import retention_policy
+
+    init_db()
+    moved = archive_cold_events(retention_policy, AuditArchive(retention_policy.archive_dir))
+    print(f"archived {moved} audit events")
+    return 0
+
+
+COMMANDS: Dict[str, Callable[[argparse.Namespace], int]] = {
+    "serve": serve,
+    "init-db": init_db,
+    "run-task": run_task,
+    "retention": retention,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="task-runner", description="Investigative vs planned task runner")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run the API with uvicorn")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--reload", action="store_true")
+    serve_parser.add_argument("--workers", type=int, default=1, help="processes sharing the database")
+    commands.add_parser("init-db", help="create missing tables and seed the demo tasks")
+    run_parser = commands.add_parser("run-task", help="execute a task and print it with its summary")
+    run_parser.add_argument("task_id", type=int)
+    run_parser.add_argument("--approve", action="store_true", help="present and approve the plan of a planned task first")
+    commands.add_parser("retention", help="archive cold audit events once")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
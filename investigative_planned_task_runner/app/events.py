@@ -0,0 +1,251 @@
+"""Fan-out of audit events to the SSE subscribers of this process.
+
+Committed events reach the bus through a ``Notifier``. ``LocalNotifier``
+hands them over directly, which is all a single process needs; see
+``app.notify`` for workers that share a database.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Set
+
+from sqlalchemy import event as sa_event
+from sqlmodel import Session
+
+from . import fastjson
+from .cache import LRUCache
+from .models import AuditTrail
+from .serializers import event_dict
+
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 256
+BACKFILL_PAGE_SIZE = 200
+_STAGED_KEY = "staged_audit_messages"
+ENCODED_CACHE_SIZE = 10_000
+
+
+@dataclass(frozen=True)
+class BusMessage:
+    """An audit event encoded once and shared by every subscriber."""
+
+    task_id: int
+    id: int
+    data: str
+
+    def as_sse(self) -> dict:
+        return {"id": str(self.id), "event": "audit", "data": self.data}
+
+
+@dataclass(frozen=True)
+class StagedEvent:
+    """Column values of a flushed audit row, kept until its session commits."""
+
+    task_id: int
+    id: int
+    created_at: datetime
+    message: str
+    level: str
+    duration_ms: Optional[float] = None
+
+
+_ENCODED = LRUCache(ENCODED_CACHE_SIZE, ttl_seconds=3600)
+
+
+# (task_id, after_id, limit) -> up to ``limit`` messages with ids above ``after_id``.
+Backfill = Callable[[int, int, int], Sequence[BusMessage]]
+
+
+def encode_event(event: AuditTrail | StagedEvent) -> BusMessage:
+    """Encode an audit event once; audit rows never change, so reconnects reuse the bytes."""
+    # created_at is part of the key because SQLite can reuse the id of a deleted last row.
+    key = f"{event.id}:{event.created_at.isoformat()}"
+    message = _ENCODED.get(key)
+    if message is None:
+        message = BusMessage(task_id=event.task_id, id=event.id, data=fastjson.dumps(event_dict(event)).decode())
+        _ENCODED.set(key, message)
+    return message
+
+
+class Subscription:
+    """A single SSE client's bounded mailbox on a task channel."""
+
+    def __init__(self, task_id: int, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.task_id = task_id
+        self.loop = loop
+        self.queue: asyncio.Queue[BusMessage] = asyncio.Queue(maxsize)
+        # Start out lagged so the first read replays history from the database.
+        self.lagged = True
+
+    def offer(self, message: BusMessage) -> None:
+        """Enqueue without blocking; a full mailbox marks the client as lagged."""
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    def reset(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.lagged = False
+
+
+class EventBus:
+    """Routes published audit events to the subscribers of each task.
+
+    Publishing is O(1) when nobody is watching a task, and each event is
+    handed to every event loop with subscribers exactly once, so stream cost
+    grows with the number of events rather than the number of clients.
+    Subscribers that fall behind are not allowed to buffer without bound:
+    their mailbox is dropped and they catch up from the database instead.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, page_size: int = BACKFILL_PAGE_SIZE):
+        self.queue_size = queue_size
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._channels: Dict[int, Dict[asyncio.AbstractEventLoop, Set[Subscription]]] = {}
+
+    def subscribe(self, task_id: int) -> Subscription:
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(task_id, loop, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(task_id, {}).setdefault(loop, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            channel = self._channels.get(subscription.task_id)
+            if channel is None:
+                return
+            subscribers = channel.get(subscription.loop)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del channel[subscription.loop]
+            if not channel:
+                del self._channels[subscription.task_id]
+
+    def has_subscribers(self, task_id: int) -> bool:
+        return task_id in self._channels
+
+    def subscribed_tasks(self) -> List[int]:
+        with self._lock:
+            return list(self._channels)
+
+    def subscriber_count(self, task_id: int) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._channels.get(task_id, {}).values())
+
+    def publish(self, message: BusMessage) -> None:
+        """Deliver a message to current subscribers; safe to call from any thread."""
+        with self._lock:
+            channel = self._channels.get(message.task_id)
+            if not channel:
+                return
+            targets = [(loop, tuple(subs)) for loop, subs in channel.items()]
+        for loop, subscribers in targets:
+            try:
+                loop.call_soon_threadsafe(_deliver, subscribers, message)
+            except RuntimeError:
+                # The loop shut down without its subscribers unwinding.
+                for subscription in subscribers:
+                    self.unsubscribe(subscription)
+
+    async def stream(self, task_id: int, backfill: Backfill, after_id: int = 0) -> AsyncIterator[dict]:
+        """Yield SSE payloads for a task, resuming after ``after_id``.
+
+        The subscription is registered before history is read so nothing
+        committed in between is missed; duplicates are dropped by id.
+        History is read in pages so catching up never holds more than one
+        page in memory. Each client reads from its own cursor, which is why
+        catch-up reads are not shared between clients of the same task.
+        """
+        subscription = self.subscribe(task_id)
+        last_id = after_id
+        try:
+            while True:
+                if subscription.lagged:
+                    subscription.reset()
+                    while True:
+                        page = await asyncio.to_thread(backfill, task_id, last_id, self.page_size)
+                        for message in page:
+                            last_id = message.id
+                            yield message.as_sse()
+                        if len(page) < self.page_size:
+                            break
+                    continue
+                message = await subscription.queue.get()
+                if message.id <= last_id:
+                    continue
+                last_id = message.id
+                yield message.as_sse()
+        finally:
+            self.unsubscribe(subscription)
+
+
+def _deliver(subscribers: Iterable[Subscription], message: BusMessage) -> None:
+    for subscription in subscribers:
+        subscription.offer(message)
+
+
+BUS = EventBus()
+
+
+class Notifier(Protocol):
+    """How events committed by a session reach the bus."""
+
+    def committed(self, staged: Sequence[StagedEvent]) -> None: ...
+    def start(self) -> None: ...
+    def stop(self) -> None: ...
+
+
+class LocalNotifier:
+    """Publishes committed events straight to this process's bus."""
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+
+    def committed(self, staged: Sequence[StagedEvent]) -> None:
+        for event in staged:
+            # Encoding is skipped entirely for tasks nobody is watching.
+            if self.bus.has_subscribers(event.task_id):
+                self.bus.publish(encode_event(event))
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+NOTIFIER: Notifier = LocalNotifier(BUS)
+
+
+def set_notifier(notifier: Notifier) -> Notifier:
+    """Install ``notifier`` for every later commit and return the one it replaces."""
+    global NOTIFIER
+    previous, NOTIFIER = NOTIFIER, notifier
+    return previous
+
+
+def stage(session: Session, event: AuditTrail) -> None:
+    """Queue a flushed audit event for publication once its session commits."""
+    staged = StagedEvent(event.task_id, event.id, event.created_at, event.message, event.level, event.duration_ms)
+    session.info.setdefault(_STAGED_KEY, []).append(staged)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _publish_staged(session: Session) -> None:
+    staged = session.info.pop(_STAGED_KEY, None)
+    if staged:
+        NOTIFIER.committed(staged)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_staged(session: Session) -> None:
+    session.info.pop(_STAGED_KEY, None)
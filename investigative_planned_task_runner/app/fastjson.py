@@ -0,0 +1,68 @@
+"""Fast JSON encoding for hot read paths.
+
+Rows read straight from the database are trusted, so these helpers encode
+plain dicts with orjson (the ``fast`` extra) and hand FastAPI finished bytes,
+skipping Pydantic model construction and ``response_model`` re-validation.
+Without orjson the standard library encoder is used with the same output.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Iterable, Iterator, Mapping, Optional
+
+# The Starlette classes FastAPI re-exports; importing them directly keeps the
+# event bus and repository, which only need ``dumps``, from pulling in FastAPI.
+from starlette.responses import Response, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without the extra installed
+    orjson = None
+
+# Lists longer than this are streamed in slices instead of encoded in one buffer.
+STREAM_THRESHOLD = 500
+STREAM_SLICE = 100
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def json_list_response(items: Iterable[Mapping[str, Any]], count: int, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Encode a list in one go, or stream it as a JSON array when it is long."""
+    if count <= STREAM_THRESHOLD:
+        return FastJSONResponse(list(items), headers=headers)
+    return StreamingResponse(_stream_array(items), media_type="application/json", headers=headers)
+
+
+def _stream_array(items: Iterable[Mapping[str, Any]]) -> Iterator[bytes]:
+    yield b"["
+    batch: list[Mapping[str, Any]] = []
+    first = True
+    for item in items:
+        batch.append(item)
+        if len(batch) == STREAM_SLICE:
+            yield (b"" if first else b",") + dumps(batch)[1:-1]
+            batch, first = [], False
+    if batch:
+        yield (b"" if first else b",") + dumps(batch)[1:-1]
+    yield b"]"
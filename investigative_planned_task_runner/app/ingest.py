@@ -0,0 +1,70 @@
+"""Bulk task ingestion: validate a whole batch first, then insert it in chunks."""
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Iterator, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from .repository import TaskRepository, session_scope
+from .schemas import BatchTaskResult, CreateTaskRequest
+from .services import TaskService
+
+ValidRow = tuple[int, CreateTaskRequest]
+
+
+def parse_ndjson(body: bytes) -> tuple[list[tuple[int, Any]], list[BatchTaskResult]]:
+    """Split an NDJSON body into decoded rows and per-line decode failures."""
+    rows: list[tuple[int, Any]] = []
+    failures: list[BatchTaskResult] = []
+    lines = (line for line in body.splitlines() if line.strip())
+    for index, line in enumerate(lines):
+        try:
+            rows.append((index, json.loads(line)))
+        except ValueError as exc:
+            failures.append(BatchTaskResult(index=index, error=f"invalid JSON: {exc}"))
+    return rows, failures
+
+
+def validate_rows(rows: Iterable[tuple[int, Any]]) -> tuple[list[ValidRow], list[BatchTaskResult]]:
+    """Validate every row before anything is written."""
+    valid: list[ValidRow] = []
+    failures: list[BatchTaskResult] = []
+    for index, row in rows:
+        if not isinstance(row, dict):
+            failures.append(BatchTaskResult(index=index, error="expected a JSON object"))
+            continue
+        try:
+            valid.append((index, CreateTaskRequest(**row)))
+        except ValidationError as exc:
+            failures.append(BatchTaskResult(index=index, error=str(exc)))
+    return valid, failures
+
+
+def chunks(rows: Sequence[ValidRow], size: int) -> Iterator[Sequence[ValidRow]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def insert_chunk(service: TaskService, chunk: Sequence[ValidRow]) -> list[BatchTaskResult]:
+    """Insert one chunk of validated rows and commit it.
+
+    A failed chunk is rolled back and reported row by row, so the caller
+    can carry on with the remaining chunks.
+    """
+    try:
+        created = service.create_tasks([request for _, request in chunk])
+        service.repo.commit()
+    except SQLAlchemyError as exc:
+        service.repo.rollback()
+        return [BatchTaskResult(index=index, error=f"insert failed: {exc}") for index, _ in chunk]
+    return [
+        BatchTaskResult(index=index, id=task_id, mode=mode)
+        for (index, _), (task_id, mode) in zip(chunk, created)
+    ]
+
+
+def insert_chunk_in_session(chunk: Sequence[ValidRow]) -> list[BatchTaskResult]:
+    with session_scope() as session:
+        return insert_chunk(TaskService(TaskRepository(session)), chunk)
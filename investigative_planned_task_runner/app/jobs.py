@@ -0,0 +1,231 @@
+"""Background job queue that runs task executions off the request thread."""
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import JOB_DEADLINE_MISSED_TOTAL, JOB_QUEUE_DEPTH, JOB_QUEUE_WAIT_SECONDS, JOB_RUN_SECONDS, METRICS
+from .models import ExecutionMode
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class Job:
+    """Handle for one queued execution of a task."""
+
+    task_id: int
+    mode: ExecutionMode
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    enqueued_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    # Continue from the task's step checkpoints instead of starting over.
+    resume: bool = False
+    # Copied from the task: higher priority first, then the earlier deadline, then arrival.
+    priority: int = 0
+    deadline: Optional[datetime] = None
+    # Durations come from a monotonic clock; the datetimes above are for display only.
+    queue_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
+    _enqueued_mono: float = field(default_factory=time.perf_counter, repr=False)
+    _sequence: int = field(default_factory=lambda: next(_SEQUENCE), repr=False)
+
+    @property
+    def urgency(self) -> Tuple[int, datetime, int]:
+        """Sort key of the ready queue: the smallest value runs first."""
+        return (-self.priority, self.deadline or datetime.max, self._sequence)
+
+
+_SEQUENCE = itertools.count()
+
+JobRunner = Callable[[Job], None]
+
+
+class JobQueue:
+    """Drains jobs onto a thread pool while capping how many run per mode.
+
+    Jobs wait in a per-mode heap rather than inside the pool, ordered by
+    ``Job.urgency``, and are only handed to the pool when a thread is free.
+    When both modes have work, a free thread goes to the mode using the
+    smallest share of its limit, so a burst of one mode neither occupies
+    the threads nor starves the other mode.
+    """
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        workers: int,
+        limits: Dict[ExecutionMode, int],
+        history: int = 1000,
+    ):
+        self.runner = runner
+        self.workers = workers
+        self.limits = dict(limits)
+        self.history = history
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._pending: Dict[ExecutionMode, List[Tuple[Tuple[int, datetime, int], Job]]] = {
+            mode: [] for mode in ExecutionMode
+        }
+        self._running: Dict[ExecutionMode, int] = {mode: 0 for mode in ExecutionMode}
+        self._finished: Deque[str] = deque()
+        self._active: Dict[int, Job] = {}
+        self._closed = False
+
+    def start(self) -> None:
+        with self._lock:
+            self._closed = False
+
+    def submit(self, job: Job) -> Job:
+        self.submit_many([job])
+        return job
+
+    def submit_many(self, jobs: Sequence[Job]) -> list[Job]:
+        """Queue several jobs before dispatching any, so the most urgent of them starts first."""
+        with self._lock:
+            for job in jobs:
+                self._jobs[job.id] = job
+                self._active[job.task_id] = job
+                heapq.heappush(self._pending[job.mode], (job.urgency, job))
+            self._dispatch()
+        return list(jobs)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def active_job(self, task_id: int) -> Optional[Job]:
+        """The queued or running job for a task, if there is one."""
+        return self._active.get(task_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet; running jobs cannot be interrupted."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                return False
+            pending = self._pending[job.mode]
+            pending.remove((job.urgency, job))
+            heapq.heapify(pending)
+            self._cancel(job)
+            self._record_depth(job.mode)
+            return True
+
+    def depth(self, mode: ExecutionMode) -> int:
+        return len(self._pending[mode])
+
+    def pending_total(self) -> int:
+        return sum(len(pending) for pending in self._pending.values())
+
+    def running(self, mode: ExecutionMode) -> int:
+        return self._running[mode]
+
+    def shutdown(self, wait: bool = True) -> list[Job]:
+        """Stop dispatching and cancel every job that never started.
+
+        Returns the cancelled jobs so the caller can record that on their tasks.
+        """
+        with self._lock:
+            self._closed = True
+            cancelled = [job for pending in self._pending.values() for _, job in sorted(pending)]
+            for pending in self._pending.values():
+                pending.clear()
+            for job in cancelled:
+                self._cancel(job)
+            for mode in self._pending:
+                self._record_depth(mode)
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        return cancelled
+
+    def _cancel(self, job: Job) -> None:
+        job.status = JobStatus.CANCELLED
+        job.finished_at = datetime.utcnow()
+        self._retire(job)
+
+    def _dispatch(self) -> None:
+        """Start pending jobs while a thread is free and their mode is under its limit.
+
+        Caller holds the lock.
+        """
+        if self._closed:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="task-job")
+        while sum(self._running.values()) < self.workers:
+            ready = [
+                mode
+                for mode, pending in self._pending.items()
+                if pending and self._running[mode] < self.limits.get(mode, self.workers)
+            ]
+            if not ready:
+                break
+            # Fair share: the mode furthest below its limit goes first; ties go to the more urgent job.
+            mode = min(
+                ready,
+                key=lambda mode: (self._running[mode] / self.limits.get(mode, self.workers), self._pending[mode][0][0]),
+            )
+            _, job = heapq.heappop(self._pending[mode])
+            self._running[mode] += 1
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            job.queue_seconds = time.perf_counter() - job._enqueued_mono
+            if job.deadline is not None and job.started_at > job.deadline:
+                METRICS.inc(JOB_DEADLINE_MISSED_TOTAL, help="Jobs started after their deadline", mode=mode.value)
+            self._executor.submit(self._run, job)
+        for mode in self._pending:
+            self._record_depth(mode)
+
+    def _record_depth(self, mode: ExecutionMode) -> None:
+        METRICS.set(JOB_QUEUE_DEPTH, len(self._pending[mode]), help="Jobs waiting for a worker", mode=mode.value)
+
+    def _run(self, job: Job) -> None:
+        started = time.perf_counter()
+        try:
+            self.runner(job)
+        except Exception as exc:  # noqa: BLE001 - surfaced on the job handle
+            job.status = JobStatus.FAILED
+            job.error = str(exc) or type(exc).__name__
+        else:
+            job.status = JobStatus.SUCCEEDED
+        finally:
+            job.finished_at = datetime.utcnow()
+            job.run_seconds = time.perf_counter() - started
+            _observe(job)
+            with self._lock:
+                self._running[job.mode] -= 1
+                self._retire(job)
+                self._dispatch()
+
+    def _retire(self, job: Job) -> None:
+        """Keep only the most recent finished handles around for status lookups."""
+        if self._active.get(job.task_id) is job:
+            del self._active[job.task_id]
+        self._finished.append(job.id)
+        while len(self._finished) > self.history:
+            self._jobs.pop(self._finished.popleft(), None)
+
+
+def _observe(job: Job) -> None:
+    mode = job.mode.value
+    METRICS.observe(JOB_QUEUE_WAIT_SECONDS, job.queue_seconds, help="Time jobs spent queued", mode=mode)
+    METRICS.observe(JOB_RUN_SECONDS, job.run_seconds, help="Time jobs spent running", mode=mode)
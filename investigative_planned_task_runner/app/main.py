@@ -1,54 +1,162 @@
-"""Entry point for the FastAPI app."""
+"""Entry point for the FastAPI app.
+
+The app is built by ``create_app``; the module-level ``app`` is created on
+first access, so ``uvicorn app.main:app`` works while importing this module
+for its routes, ``JOBS`` or helpers builds nothing.
+"""
 from __future__ import annotations
 
 import asyncio
+import hashlib
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
 
-from fastapi import Depends, FastAPI, HTTPException, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Body, Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sse_starlette.sse import EventSourceResponse
-
-from .models import Task
-from .repository import TaskRepository, init_db, session_scope
-from .schemas import AuditLogEntry, CreateTaskRequest, PlanApprovalRequest, TaskSummaryView, TaskView
-from .services import TaskService
 
-app = FastAPI(title="Investigative vs Planned Task Runner")
+from . import agents, cache, events, fastjson, ingest, notify, retention
+from .jobs import JobQueue
+from .metrics import METRICS
+from .models import ExecutionMode, Task
+from .repository import CachedTaskRepository, TaskRepository, get_engine, init_db, session_scope
+from .scheduler import Scheduler
+from .schemas import (
+    AuditLogEntry,
+    BatchCreateResponse,
+    CreateTaskRequest,
+    JobView,
+    PlanApprovalRequest,
+    TaskView,
+)
+from .serializers import event_dict, serialize_event, serialize_job, serialize_task, task_row_dict
+from .services import TaskService, recover_interrupted, run_execution_job
+from .settings import retention_policy, settings
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+router = APIRouter()
+JOBS = JobQueue(
+    run_execution_job,
+    workers=settings.worker_threads,
+    limits=settings.mode_limits(),
+    history=settings.job_history,
+)
+ARCHIVE = retention.AuditArchive(retention_policy.archive_dir)
 
 
 @asynccontextmanager
-def lifespan(_: FastAPI) -> AsyncIterator[None]:
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     init_db()
+    notifier = notify.build_notifier()
+    notifier.start()
+    previous_notifier = events.set_notifier(notifier)
+    agents.AGENTS.warm()
+    JOBS.start()
+    if settings.resume_interrupted:
+        await run_in_threadpool(recover_interrupted, JOBS)
+    scheduler = None
+    if settings.auto_dispatch:
+        scheduler = Scheduler(JOBS, get_engine(), settings.dispatch_backlog, settings.dispatch_poll_ms / 1000)
+        await run_in_threadpool(scheduler.start)
+    retention_task = None
+    if retention_policy.interval_seconds > 0:
+        retention_task = asyncio.create_task(retention.run_retention(retention_policy, ARCHIVE))
     yield
-
-
-app.router.lifespan_context = lifespan
-app.mount("/static", StaticFiles(directory="frontend"), name="static")
+    if retention_task is not None:
+        retention_task.cancel()
+    if settings.async_api:
+        from .async_repository import dispose_async_engine
+
+        await dispose_async_engine()
+    if scheduler is not None:
+        scheduler.stop()
+    cancelled = JOBS.shutdown(wait=False)
+    if cancelled:
+        with session_scope() as session:
+            service = TaskService(TaskRepository(session))
+            for job in cancelled:
+                task = service.repo.get(job.task_id)
+                if task is None:
+                    continue
+                if scheduler is not None:
+                    # The next start's scheduler claims it again.
+                    service.return_to_pending(task, job)
+                else:
+                    service.cancel_execution(task, job)
+    events.set_notifier(previous_notifier)
+    notifier.stop()
+    agents.AGENTS.close()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="Investigative vs Planned Task Runner", lifespan=lifespan)
+    if settings.async_api:
+        from .async_api import router as async_router
+
+        # Included before the sync routes so the async handlers win on matching paths.
+        app.include_router(async_router)
+    app.include_router(router)
+    app.mount("/static", StaticFiles(directory="frontend"), name="static")
+    return app
+
+
+def __getattr__(name: str) -> Any:
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_repo() -> TaskRepository:
     with session_scope() as session:
-        yield TaskRepository(session)
+        if cache.TASK_CACHE is not None:
+            yield CachedTaskRepository(session, cache.TASK_CACHE)
+        else:
+            yield TaskRepository(session)
 
 
 def get_service(repo: TaskRepository = Depends(get_repo)) -> TaskService:
     return TaskService(repo)
 
 
-@app.get("/")
+@router.get("/")
 def home() -> FileResponse:
     return FileResponse("frontend/index.html")
 
 
-@app.get("/tasks", response_model=list[TaskView])
-def list_tasks(service: TaskService = Depends(get_service)) -> list[TaskView]:
-    tasks = service.repo.list_tasks()
-    return [_serialize_task(task) for task in tasks]
+@router.get("/tasks", response_model=list[TaskView])
+def list_tasks(
+    response: Response,
+    after: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    mode: Optional[ExecutionMode] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    service: TaskService = Depends(get_service),
+) -> list[TaskView] | Response:
+    # Fetch one extra row to learn whether another page exists without a COUNT.
+    rows = service.repo.list_task_rows(after_id=after, limit=limit + 1, status=status, mode=mode)
+    # The ETag covers the extra row too, so a page whose cursor changes is not "unchanged".
+    etag = _page_etag(rows)
+    response.headers["ETag"] = etag
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    if if_none_match == etag:
+        return Response(status_code=304, headers=dict(response.headers))
+    return fastjson.json_list_response(map(task_row_dict, rows), len(rows), headers=dict(response.headers))
+
+
+def _page_etag(rows) -> str:  # type: ignore[no-untyped-def]
+    return '"' + hashlib.blake2b(repr([tuple(row) for row in rows]).encode(), digest_size=16).hexdigest() + '"'
 
 
-@app.post("/tasks", response_model=TaskView, status_code=201)
+@router.post("/tasks", response_model=TaskView, status_code=201)
 def create_task(
     request: CreateTaskRequest,
     service: TaskService = Depends(get_service),
@@ -58,22 +166,67 @@ def create_task(
         description=request.description,
         estimated_steps=request.estimated_steps,
         forced_mode=request.forced_mode,
+        priority=request.priority,
+        deadline=request.deadline,
     )
     service.repo.save(task)
     service.select_mode(task)
-    return _serialize_task(task)
+    return serialize_task(task)
 
 
-@app.post("/tasks/{task_id}/plan", response_model=AuditLogEntry)
+@router.get("/tasks/{task_id}", response_model=TaskView)
+def get_task(task_id: int, service: TaskService = Depends(get_service)) -> TaskView | Response:
+    return _task_response(service, task_id)
+
+
+@router.post("/tasks:batch", response_model=BatchCreateResponse)
+def create_tasks_batch(
+    rows: list[Any] = Body(...),
+    chunk_size: int = Query(default=settings.ingest_chunk_size, ge=1, le=10_000),
+    service: TaskService = Depends(get_service),
+) -> BatchCreateResponse:
+    valid, results = ingest.validate_rows(enumerate(rows))
+    for chunk in ingest.chunks(valid, chunk_size):
+        results.extend(ingest.insert_chunk(service, chunk))
+    results.sort(key=lambda result: result.index)
+    created = sum(1 for result in results if result.error is None)
+    return BatchCreateResponse(created=created, failed=len(results) - created, results=results)
+
+
+@router.post("/tasks:ingest")
+async def ingest_tasks(
+    request: Request,
+    chunk_size: int = Query(default=settings.ingest_chunk_size, ge=1, le=10_000),
+) -> StreamingResponse:
+    """Take NDJSON task rows and stream NDJSON per-row results, one commit per chunk.
+
+    Rejected rows are reported first, then each chunk's results as it commits.
+    """
+    # The body must be consumed before the response starts: once streaming,
+    # Starlette's disconnect listener owns ``receive`` and would swallow it.
+    rows, failures = ingest.parse_ndjson(await request.body())
+    valid, invalid = ingest.validate_rows(rows)
+
+    async def results() -> AsyncIterator[bytes]:
+        for result in sorted(failures + invalid, key=lambda result: result.index):
+            yield result.json().encode() + b"\n"
+        for chunk in ingest.chunks(valid, chunk_size):
+            for result in await run_in_threadpool(ingest.insert_chunk_in_session, chunk):
+                yield result.json().encode() + b"\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.post("/tasks/{task_id}/plan", response_model=AuditLogEntry)
 def present_plan(task_id: int, service: TaskService = Depends(get_service)) -> AuditLogEntry:
     task = service.repo.get(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     event = service.generate_plan(task)
-    return _serialize_event(event)
+    return serialize_event(event)
 
 
-@app.post("/tasks/{task_id}/plan/approval", response_model=TaskView)
+@router.post("/tasks/{task_id}/plan/approval", response_model=TaskView)
 def approve_plan(
     task_id: int,
     payload: PlanApprovalRequest,
@@ -84,61 +237,103 @@ def approve_plan(
     task = service.repo.get(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    updated = service.approve_plan(task)
-    return _serialize_task(updated)
+    service.approve_plan(task)
+    return _task_response(service, task_id)
 
 
-@app.post("/tasks/{task_id}/execute", response_model=TaskView)
-def execute_task(task_id: int, service: TaskService = Depends(get_service)) -> TaskView:
+@router.post("/tasks/{task_id}/execute", response_model=TaskView | JobView)
+def execute_task(
+    task_id: int,
+    response: Response,
+    background: bool = False,
+    service: TaskService = Depends(get_service),
+) -> TaskView | JobView:
     task = service.repo.get(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    result = service.execute(task)
-    # TODO: capture the resulting audit events + summary cards once implemented.
-    return _serialize_task(result.task)
+    if background:
+        response.status_code = 202
+        return serialize_job(service.enqueue_execution(task, JOBS))
+    service.execute(task)
+    return _task_response(service, task_id)
 
 
-@app.get("/stream/tasks/{task_id}")
-async def stream_task(task_id: int, service: TaskService = Depends(get_service)) -> Response:
-    task = service.repo.get(task_id)
-    if not task:
+@router.get("/tasks/{task_id}/audit", response_model=list[AuditLogEntry])
+def list_audit(
+    task_id: int,
+    response: Response,
+    after: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_archived: bool = False,
+    service: TaskService = Depends(get_service),
+) -> list[AuditLogEntry] | Response:
+    if not service.repo.get(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    filters = dict(after_id=after, limit=limit + 1, level=level, since=since, until=until)
+    rows = service.repo.audit_rows(task_id, **filters)
+    if include_archived:
+        rows = retention.merge_pages(rows, ARCHIVE.read(task_id, **filters), limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return fastjson.json_list_response(map(event_dict, rows), len(rows), headers=dict(response.headers))
+
+
+@router.get("/jobs/{job_id}", response_model=JobView)
+def get_job(job_id: str) -> JobView:
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobView)
+def cancel_job(job_id: str, service: TaskService = Depends(get_service)) -> JobView:
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not JOBS.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status.value}")
+    service.cancel_execution(service.repo.get(job.task_id), job)
+    return serialize_job(job)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Agent and job latency summaries in the Prometheus text exposition format."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/stream/tasks/{task_id}")
+async def stream_task(task_id: int, last_event_id: Optional[str] = Header(default=None)) -> Response:
+    # No request-scoped session here: it would pin a pooled connection for the life of the stream.
+    if not await run_in_threadpool(_task_exists, task_id):
         raise HTTPException(status_code=404, detail="Task not found")
 
-    async def event_generator() -> AsyncIterator[dict]:
-        # This naive generator polls every second; feel free to replace it with DB triggers or push notifications.
-        last_id = None
-        while True:
-            events = [e for e in task.audit_trail if last_id is None or e.id > last_id]
-            for event in events:
-                last_id = event.id
-                payload = _serialize_event(event)
-                # TODO: include agent payloads once stored in the model.
-                yield {"event": "audit", "data": payload.json()}
-            await asyncio.sleep(1)
-
-    return EventSourceResponse(event_generator())
-
-
-def _serialize_task(task: Task) -> TaskView:
-    summary = task.summary
-    return TaskView(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        estimated_steps=task.estimated_steps,
-        mode=task.mode,
-        status=task.status,
-        forced_mode=task.forced_mode,
-        plan_presented_at=task.plan_presented_at,
-        plan_approved_at=task.plan_approved_at,
-        summary=None if not summary else TaskSummaryView(id=summary.id, content=summary.content),
-    )
+    after_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    stream = events.BUS.stream(task_id, backfill=_load_events_after, after_id=after_id)
+    from sse_starlette.sse import EventSourceResponse
 
+    return EventSourceResponse(stream, ping=events.HEARTBEAT_SECONDS)
 
-def _serialize_event(event) -> AuditLogEntry:  # type: ignore[no-untyped-def]
-    return AuditLogEntry(
-        id=event.id,
-        created_at=event.created_at,
-        message=event.message,
-        level=event.level,
-    )
+
+def _task_response(service: TaskService, task_id: int) -> Response:
+    """A task with its precomputed summary, read as one row rather than through lazy loads."""
+    row = service.repo.task_row(task_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return fastjson.FastJSONResponse(task_row_dict(row))
+
+
+def _task_exists(task_id: int) -> bool:
+    with session_scope() as session:
+        return TaskRepository(session).get(task_id) is not None
+
+
+def _load_events_after(task_id: int, after_id: int, limit: int) -> list[events.BusMessage]:
+    with session_scope() as session:
+        rows = TaskRepository(session).events_after(task_id, after_id, limit=limit)
+        return [events.encode_event(event) for event in rows]
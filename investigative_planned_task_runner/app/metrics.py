@@ -0,0 +1,151 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, Sequence, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Quantiles are computed over the most recent observations of each series.
+WINDOW_SIZE = 1024
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class _Series:
+    window: Deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW_SIZE))
+    count: int = 0
+    total: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.window.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self) -> Iterator[Tuple[float, float]]:
+        ordered = sorted(self.window)
+        for q in QUANTILES:
+            # Nearest-rank: the smallest sample with at least q of the window at or below it.
+            yield q, ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+@dataclass
+class _Summary:
+    help: str
+    series: Dict[Labels, _Series] = field(default_factory=dict)
+
+
+@dataclass
+class _Counter:
+    help: str
+    values: Dict[Labels, int] = field(default_factory=dict)
+
+
+@dataclass
+class _Gauge:
+    help: str
+    values: Dict[Labels, float] = field(default_factory=dict)
+
+
+class MetricsRegistry:
+    """Thread-safe summaries, counters and gauges keyed by metric name and label set.
+
+    Counts and sums are cumulative; quantiles cover a sliding window so a
+    slow hour does not dominate the picture forever.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._summaries: Dict[str, _Summary] = {}
+        self._counters: Dict[str, _Counter] = {}
+        self._gauges: Dict[str, _Gauge] = {}
+
+    def inc(self, name: str, amount: int = 1, help: str = "", **labels: str) -> None:
+        key = _key(labels)
+        with self._lock:
+            counter = self._counters.setdefault(name, _Counter(help=help or name))
+            counter.values[key] = counter.values.get(key, 0) + amount
+
+    def count(self, name: str, **labels: str) -> int:
+        with self._lock:
+            counter = self._counters.get(name)
+            return 0 if counter is None else counter.values.get(_key(labels), 0)
+
+    def set(self, name: str, value: float, help: str = "", **labels: str) -> None:
+        key = _key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, _Gauge(help=help or name)).values[key] = value
+
+    def gauge(self, name: str, **labels: str) -> float:
+        with self._lock:
+            gauge = self._gauges.get(name)
+            return 0 if gauge is None else gauge.values.get(_key(labels), 0)
+
+    def observe(self, name: str, seconds: float, help: str = "", **labels: str) -> None:
+        key = _key(labels)
+        with self._lock:
+            summary = self._summaries.setdefault(name, _Summary(help=help or name))
+            summary.series.setdefault(key, _Series()).observe(seconds)
+
+    def quantile(self, name: str, q: float, **labels: str) -> float:
+        key = _key(labels)
+        with self._lock:
+            return dict(self._summaries[name].series[key].quantiles())[q]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._summaries.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for name, summary in sorted(self._summaries.items()):
+                lines.append(f"# HELP {name} {summary.help}")
+                lines.append(f"# TYPE {name} summary")
+                for labels, series in sorted(summary.series.items()):
+                    for q, value in series.quantiles():
+                        lines.append(f"{name}{_format_labels(labels + (('quantile', str(q)),))} {value:.6f}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {series.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {series.count}")
+            for name, counter in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {counter.help}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(counter.values.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            for name, gauge in sorted(self._gauges.items()):
+                lines.append(f"# HELP {name} {gauge.help}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in sorted(gauge.values.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _key(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{label}="{_escape(value)}"' for label, value in labels)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+METRICS = MetricsRegistry()
+
+AGENT_RUN_SECONDS = "task_runner_agent_run_seconds"
+JOB_QUEUE_WAIT_SECONDS = "task_runner_job_queue_wait_seconds"
+JOB_RUN_SECONDS = "task_runner_job_run_seconds"
+JOB_QUEUE_DEPTH = "task_runner_job_queue_depth"
+JOB_DEADLINE_MISSED_TOTAL = "task_runner_job_deadline_missed_total"
+AGENT_SHED_TOTAL = "task_runner_agent_shed_total"
+AGENT_CONCURRENCY_LIMIT = "task_runner_agent_concurrency_limit"
@@ -1,10 +1,12 @@
 """Database models for the task runner sandbox."""
-from __future__ import annotations
+# No ``from __future__ import annotations`` here: SQLModel resolves relationship
+# targets from the runtime annotations, and string-ified ``Optional[...]`` breaks it.
 
 from datetime import datetime
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import JSON, Index
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -18,6 +20,14 @@ class ExecutionMode(str, Enum):
 class Task(SQLModel, table=True):
     """A lightweight task that can be executed by agents."""
 
+    # Keyset pages filter on status/mode and then walk the primary key.
+    __table_args__ = (
+        Index("ix_task_status_id", "status", "id"),
+        Index("ix_task_mode_id", "mode", "id"),
+        # The scheduler claims the most urgent pending tasks first.
+        Index("ix_task_status_priority", "status", "priority"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: str
@@ -38,18 +48,29 @@ class Task(SQLModel, table=True):
         description="Timestamp of when the user approved the plan",
     )
     status: str = Field(default="pending")
+    # Optional so the column can be added to existing databases; NULL reads as 0.
+    priority: Optional[int] = Field(default=0, description="Higher runs first")
+    deadline: Optional[datetime] = Field(
+        default=None,
+        description="When the task should have started; earlier deadlines run first within a priority",
+    )
 
     summary: Optional["TaskSummary"] = Relationship(back_populates="task")
     audit_trail: list["AuditTrail"] = Relationship(back_populates="task")
 
 
 class TaskSummary(SQLModel, table=True):
-    """Placeholder summary information for a task."""
+    """A task's answer, materialized step by step while it executes so reads never recompute it."""
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    task_id: int = Field(foreign_key="task.id")
-    # TODO: Replace these placeholders with real persisted summary fields.
-    content: str = Field(default="TODO")
+    task_id: int = Field(foreign_key="task.id", index=True, unique=True)
+    short_answer: str = Field(default="")
+    detailed_answer: str = Field(default="")
+    next_steps: list[str] = Field(default_factory=list, sa_type=JSON)
+    steps_completed: int = Field(default=0)
+    steps_total: int = Field(default=0)
+    duration_ms: float = Field(default=0.0, description="Summed wall time of the completed steps")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     task: Task = Relationship(back_populates="summary")
 
@@ -57,11 +78,41 @@ class TaskSummary(SQLModel, table=True):
 class AuditTrail(SQLModel, table=True):
     """Event log of what happened while executing a task."""
 
+    # Audit reads are always per task: by id for cursors and replay, by time for ranges.
+    __table_args__ = (
+        Index("ix_audittrail_task_id_id", "task_id", "id"),
+        Index("ix_audittrail_task_id_created_at", "task_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     task_id: int = Field(foreign_key="task.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     message: str
     level: str = Field(default="info")
+    duration_ms: Optional[float] = Field(default=None, description="Wall time of the agent call that produced this event")
     # TODO: Extend this model with agent metadata & payloads to support the audit view.
 
     task: Task = Relationship(back_populates="audit_trail")
+
+
+class PlanCacheEntry(SQLModel, table=True):
+    """Planner output memoized by a hash of the planning inputs and the planner version."""
+
+    key: str = Field(primary_key=True)
+    agent: str
+    version: str
+    output: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class StepCheckpoint(SQLModel, table=True):
+    """One finished execution step; a resumed run only executes steps without one."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int = Field(foreign_key="task.id", index=True)
+    step: int
+    # Derived from the task and step, and unique, so a retried step is never recorded twice.
+    idempotency_key: str = Field(unique=True)
+    output: str
+    duration_ms: Optional[float] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,157 @@
+"""Cross-process delivery of audit events for workers sharing one SQLite file.
+
+Each uvicorn worker has its own ``BUS``, so an event committed by one worker
+never reaches the streams held open by another through ``LocalNotifier``.
+``SQLiteNotifier`` uses the database they already share as the channel: no
+broker to run, and nothing to clean up when a worker dies.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Optional, Sequence
+
+from sqlalchemy import Connection, func
+from sqlalchemy.engine import Engine
+from sqlmodel import select
+
+from .events import BUS, EventBus, LocalNotifier, Notifier, StagedEvent, encode_event
+from .models import AuditTrail
+from .repository import get_engine, new_events_query
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+DRAIN_PAGE_SIZE = 500
+
+
+class CommitWatcher:
+    """Calls ``on_commit`` from its own thread whenever the database changes.
+
+    It watches ``PRAGMA data_version`` on a dedicated connection, polled every
+    ``poll_seconds`` or sooner when woken. The value changes whenever another
+    connection commits, in this process or any other, so idle polls cost no
+    table reads. ``on_commit`` gets that connection; returning False has the
+    same change handled again on the next poll.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        poll_seconds: float,
+        on_commit: Callable[[Connection], bool],
+        on_start: Optional[Callable[[Connection], None]] = None,
+        name: str = "commit-watcher",
+    ):
+        self.engine = engine
+        self.poll_seconds = poll_seconds
+        self.on_commit = on_commit
+        self.on_start = on_start
+        self.name = name
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        # Whatever ``on_start`` saw is settled once ``start`` returns.
+        self._ready.wait()
+        if not self._thread.is_alive():
+            raise RuntimeError(f"{self.name} failed to start")
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            connection = self.engine.connect()
+            version = _data_version(connection)
+            if self.on_start is not None:
+                self.on_start(connection)
+            connection.rollback()
+        finally:
+            self._ready.set()
+        with connection:
+            while not self._stopping.is_set():
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                try:
+                    current = _data_version(connection)
+                    if current != version and self.on_commit(connection):
+                        version = current
+                except Exception:  # noqa: BLE001 - a failed poll is retried on the next tick
+                    logger.exception("%s poll failed", self.name)
+                finally:
+                    # End the read so the next poll sees a fresh snapshot.
+                    connection.rollback()
+
+
+class SQLiteNotifier:
+    """Publishes audit events committed by any process that writes the database.
+
+    On each commit it reads the audit rows past its watermark for the tasks
+    streamed in this process and publishes them in id order. SQLite has a
+    single writer, so id order is commit order and no stream sees an event
+    before an earlier one. Local commits only wake the watcher rather than
+    publishing themselves, to keep that order.
+    """
+
+    def __init__(self, bus: EventBus, engine: Engine, poll_seconds: float, page_size: int = DRAIN_PAGE_SIZE):
+        self.bus = bus
+        self.page_size = page_size
+        self._watermark = 0
+        self._watcher = CommitWatcher(engine, poll_seconds, self._drain, self._begin, name="audit-notifier")
+
+    def committed(self, staged: Sequence[StagedEvent]) -> None:
+        self._watcher.wake()
+
+    def start(self) -> None:
+        # Events committed once ``start`` returns are guaranteed to be past the watermark.
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._watcher.stop()
+
+    def _begin(self, connection: Connection) -> None:
+        self._watermark = _max_event_id(connection)
+
+    def _drain(self, connection: Connection) -> bool:
+        # Fix the upper bound first: rows committed after it get the next poll.
+        top = _max_event_id(connection)
+        task_ids = self.bus.subscribed_tasks()
+        while task_ids and self._watermark < top:
+            rows = connection.execute(new_events_query(task_ids, self._watermark, top, self.page_size)).all()
+            for row in rows:
+                self.bus.publish(encode_event(row))
+            if len(rows) < self.page_size:
+                break
+            self._watermark = rows[-1].id
+        self._watermark = max(self._watermark, top)
+        return True
+
+
+def _data_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA data_version").scalar_one()
+
+
+def _max_event_id(connection: Connection) -> int:
+    return connection.execute(select(func.max(AuditTrail.id))).scalar() or 0
+
+
+def build_notifier(backend: str = settings.notify_backend) -> Notifier:
+    if backend == "local":
+        return LocalNotifier(BUS)
+    if backend == "sqlite":
+        return SQLiteNotifier(BUS, get_engine(), settings.notify_poll_ms / 1000)
+    raise ValueError(f"Unknown notify backend {backend!r}; expected 'local' or 'sqlite'")
@@ -0,0 +1,43 @@
+"""Memoized planner output keyed by a content hash of the planning inputs."""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Optional
+
+from .agents import PlannerAgent
+from .cache import LRUCache
+from .metrics import METRICS
+from .models import Task
+from .settings import settings
+
+PLAN_CACHE_REQUESTS_TOTAL = "task_runner_plan_cache_requests_total"
+# Entries never go stale on their own: new inputs or a new planner version mean a new key.
+_NO_EXPIRY = float("inf")
+
+
+def plan_key(task: Task, agent: str = PlannerAgent.name, version: str = PlannerAgent.version) -> str:
+    """SHA-256 over exactly what the planner reads, so equal inputs share one plan."""
+    inputs = [agent, version, task.title, task.description, task.estimated_steps]
+    return hashlib.sha256(json.dumps(inputs, separators=(",", ":")).encode()).hexdigest()
+
+
+class PlanCache:
+    def __init__(self, size: int):
+        self._entries = LRUCache(size, ttl_seconds=_NO_EXPIRY)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key)
+
+    def put(self, key: str, output: str) -> None:
+        self._entries.set(key, output)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def record(hit: bool) -> None:
+    METRICS.inc(PLAN_CACHE_REQUESTS_TOTAL, help="Planner cache lookups", result="hit" if hit else "miss")
+
+
+PLAN_CACHE = PlanCache(settings.plan_cache_size)
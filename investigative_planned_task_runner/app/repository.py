@@ -1,21 +1,47 @@
 """Data access helpers for the task runner sandbox."""
 from __future__ import annotations
 
+import threading
 from contextlib import contextmanager
-from pathlib import Path
-from typing import Iterable, Iterator
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Sequence
 
-from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy import Row, Select, and_, delete, func, inspect, insert, or_, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached, selectinload
+from sqlmodel import Session, SQLModel, select
 
-from .models import AuditTrail, Task, TaskSummary
+from . import cache, events
+from .models import AuditTrail, ExecutionMode, PlanCacheEntry, StepCheckpoint, Task, TaskSummary
+from .settings import storage_profile
+from .storage import build_engine
 
-_DB_PATH = Path("task_runner.db")
-ENGINE = create_engine(f"sqlite:///{_DB_PATH}", echo=False, connect_args={"check_same_thread": False})
+_DB_PATH = storage_profile.path
+_ENGINE: Optional[Engine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Build the engine on first use, so importing this module opens no database."""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = build_engine(storage_profile)
+    return _ENGINE
 
 
 def init_db() -> None:
     """Create tables and seed demo data."""
-    SQLModel.metadata.create_all(ENGINE)
+    engine = get_engine()
+    SQLModel.metadata.create_all(engine)
+    # create_all skips tables that already exist, so add columns and indexes
+    # introduced since a DB was created.
+    _add_missing_columns()
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
     with session_scope() as session:
         if session.exec(select(Task)).first():
             return
@@ -37,9 +63,29 @@ def init_db() -> None:
         session.commit()
 
 
+def _add_missing_columns() -> None:
+    """ALTER in nullable columns added to the models after the table was created."""
+    engine = get_engine()
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+
+def incremental_vacuum(pages: int) -> None:
+    """Return up to ``pages`` free pages to the filesystem (needs auto_vacuum=incremental)."""
+    with get_engine().connect() as connection:
+        connection.exec_driver_sql(f"PRAGMA incremental_vacuum({pages})")
+        connection.commit()
+
+
 @contextmanager
 def session_scope() -> Iterator[Session]:
-    session = Session(ENGINE)
+    session = Session(get_engine())
     try:
         yield session
         session.commit()
@@ -57,22 +103,310 @@ class TaskRepository:
         self.session = session
 
     def list_tasks(self) -> Iterable[Task]:
-        return self.session.exec(select(Task)).all()
+        return self.session.exec(select(Task).options(selectinload(Task.summary))).all()
+
+    def list_task_rows(
+        self,
+        *,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        status: Optional[str] = None,
+        mode: Optional[ExecutionMode] = None,
+    ) -> Sequence[Row]:
+        """Return a keyset page of plain column tuples, skipping ORM identity bookkeeping."""
+        return self.session.exec(task_rows_query(after_id, limit, status, mode)).all()
 
     def get(self, task_id: int) -> Task:
         return self.session.get(Task, task_id)
 
+    def task_row(self, task_id: int) -> Optional[Row]:
+        """One task with its precomputed summary, as the same column tuple as a list page."""
+        return self.session.exec(task_rows_query(None, None, None, None).where(Task.id == task_id)).first()
+
     def save(self, task: Task) -> Task:
         self.session.add(task)
         self.session.flush()
+        cache.invalidate_on_commit(self.session, task.id)
         return task
 
+    def bulk_insert_tasks(self, rows: Sequence[dict]) -> list[int]:
+        """Insert many tasks with one executemany-style statement, returning ids in input order."""
+        if not rows:
+            return []
+        statement = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+        ids = list(self.session.scalars(statement, rows))
+        cache.invalidate_on_commit(self.session)
+        return ids
+
     def log_event(self, event: AuditTrail) -> AuditTrail:
         self.session.add(event)
         self.session.flush()
+        events.stage(self.session, event)
+        cache.invalidate_on_commit(self.session, event.task_id, lists=False)
         return event
 
+    def events_after(self, task_id: int, after_id: int = 0, limit: Optional[int] = None) -> Sequence[Row]:
+        return self.session.exec(events_after_query(task_id, after_id, limit)).all()
+
+    def audit_rows(
+        self,
+        task_id: int,
+        *,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        level: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[Row]:
+        """Return a keyset page of a task's audit rows as column tuples."""
+        return self.session.exec(audit_rows_query(task_id, after_id, limit, level, since, until)).all()
+
+    def cold_audit_rows(
+        self,
+        cutoffs: Dict[str, datetime],
+        default_cutoff: Optional[datetime],
+        task_statuses: Sequence[str],
+        limit: int,
+    ) -> Sequence[Row]:
+        """Audit rows of tasks in ``task_statuses`` older than their level's cutoff, by task then id.
+
+        ``default_cutoff`` applies to levels missing from ``cutoffs``; ``None`` keeps them.
+        """
+        expired = [and_(AuditTrail.level == level, AuditTrail.created_at < cutoff) for level, cutoff in cutoffs.items()]
+        if default_cutoff is not None:
+            expired.append(and_(AuditTrail.level.notin_(list(cutoffs)), AuditTrail.created_at < default_cutoff))
+        if not expired:
+            return []
+        statement = (
+            select(
+                AuditTrail.id,
+                AuditTrail.task_id,
+                AuditTrail.created_at,
+                AuditTrail.message,
+                AuditTrail.level,
+                AuditTrail.duration_ms,
+            )
+            .join(Task, Task.id == AuditTrail.task_id)
+            .where(Task.status.in_(task_statuses), or_(*expired))
+            .order_by(AuditTrail.task_id, AuditTrail.id)
+            .limit(limit)
+        )
+        return self.session.exec(statement).all()
+
+    def delete_audit_rows(self, ids: Sequence[int]) -> None:
+        self.session.exec(delete(AuditTrail).where(AuditTrail.id.in_(ids)))
+
+    def get_cached_plan(self, key: str) -> Optional[PlanCacheEntry]:
+        return self.session.get(PlanCacheEntry, key)
+
+    def save_cached_plan(self, entry: PlanCacheEntry) -> PlanCacheEntry:
+        # merge: two requests can miss on the same key; the later write just replaces it.
+        entry = self.session.merge(entry)
+        self.session.flush()
+        return entry
+
+    def task_ids_with_status(self, statuses: Sequence[str]) -> list[int]:
+        return list(self.session.exec(select(Task.id).where(Task.status.in_(statuses)).order_by(Task.id)))
+
+    def claim_ready_tasks(self, limit: int) -> Sequence[Row]:
+        """Mark up to ``limit`` of the most urgent runnable pending tasks queued and return them.
+
+        Investigative tasks are runnable once they exist, planned ones once
+        their plan is approved. The claim is one conditional UPDATE, so when
+        several processes dispatch from one database each task goes to one.
+        """
+        ready = (
+            select(Task.id)
+            .where(
+                Task.status == "pending",
+                or_(Task.mode == ExecutionMode.INVESTIGATIVE, Task.plan_approved_at.is_not(None)),
+            )
+            .order_by(func.coalesce(Task.priority, 0).desc(), Task.deadline.is_(None), Task.deadline, Task.id)
+            .limit(limit)
+        )
+        statement = (
+            update(Task)
+            .where(Task.id.in_(ready), Task.status == "pending")
+            .values(status="queued")
+            .returning(Task.id, Task.mode, Task.priority, Task.deadline)
+            .execution_options(synchronize_session=False)
+        )
+        rows = self.session.execute(statement).all()
+        for row in rows:
+            cache.invalidate_on_commit(self.session, row.id)
+        return rows
+
+    def checkpoints(self, task_id: int) -> Sequence[StepCheckpoint]:
+        statement = select(StepCheckpoint).where(StepCheckpoint.task_id == task_id).order_by(StepCheckpoint.step)
+        return self.session.exec(statement).all()
+
+    def save_checkpoint(self, checkpoint: StepCheckpoint) -> bool:
+        """Record a finished step; ``False`` if its idempotency key is already recorded."""
+        try:
+            with self.session.begin_nested():
+                self.session.add(checkpoint)
+        except IntegrityError:
+            return False
+        return True
+
+    def clear_checkpoints(self, task_id: int) -> None:
+        self.session.exec(delete(StepCheckpoint).where(StepCheckpoint.task_id == task_id))
+
+    def commit(self) -> None:
+        self.session.commit()
+
+    def rollback(self) -> None:
+        self.session.rollback()
+
     def upsert_summary(self, summary: TaskSummary) -> TaskSummary:
         self.session.add(summary)
         self.session.flush()
+        cache.invalidate_on_commit(self.session, summary.task_id)
         return summary
+
+
+class CachedTaskRepository(TaskRepository):
+    """``TaskRepository`` that answers task lookups and list pages from a cache.
+
+    Cached tasks are detached copies merged into the caller's session without
+    a query, so services can still modify and save them. Writes through any
+    repository evict the affected entries once they commit; a reader racing
+    a commit can re-cache an old row, which the TTL bounds.
+    """
+
+    def __init__(self, session: Session, task_cache: cache.CacheBackend):
+        super().__init__(session)
+        self.cache = task_cache
+
+    def list_task_rows(
+        self,
+        *,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        status: Optional[str] = None,
+        mode: Optional[ExecutionMode] = None,
+    ) -> Sequence[Row]:
+        key = f"tasks:{cache.list_generation(self.cache)}:{after_id}:{limit}:{status}:{mode}"
+        rows = cache.lookup(self.cache, key)
+        if rows is None:
+            rows = super().list_task_rows(after_id=after_id, limit=limit, status=status, mode=mode)
+            self.cache.set(key, rows)
+        return rows
+
+    def get(self, task_id: int) -> Optional[Task]:
+        cached = cache.lookup(self.cache, cache.task_key(task_id))
+        if cached is not None:
+            return self.session.merge(cached, load=False)
+        task = super().get(task_id)
+        if task is not None:
+            self.cache.set(cache.task_key(task_id), _detached_copy(task))
+        return task
+
+
+def _detached_copy(task: Task) -> Task:
+    copy = Task(**task.model_dump())
+    make_transient_to_detached(copy)
+    return copy
+
+
+def task_rows_query(
+    after_id: Optional[int],
+    limit: Optional[int],
+    status: Optional[str],
+    mode: Optional[ExecutionMode],
+) -> Select:
+    """Keyset-paged projection of task columns plus the summary, shared by both repositories."""
+    statement = select(
+        Task.id,
+        Task.title,
+        Task.description,
+        Task.estimated_steps,
+        Task.mode,
+        Task.status,
+        Task.forced_mode,
+        Task.plan_presented_at,
+        Task.plan_approved_at,
+        Task.priority,
+        Task.deadline,
+        TaskSummary.id.label("summary_id"),
+        TaskSummary.short_answer.label("summary_short_answer"),
+        TaskSummary.detailed_answer.label("summary_detailed_answer"),
+        TaskSummary.next_steps.label("summary_next_steps"),
+        TaskSummary.steps_completed.label("summary_steps_completed"),
+        TaskSummary.steps_total.label("summary_steps_total"),
+        TaskSummary.duration_ms.label("summary_duration_ms"),
+        TaskSummary.updated_at.label("summary_updated_at"),
+    ).outerjoin(TaskSummary, TaskSummary.task_id == Task.id)
+    if status is not None:
+        statement = statement.where(Task.status == status)
+    if mode is not None:
+        statement = statement.where(Task.mode == mode)
+    if after_id is not None:
+        statement = statement.where(Task.id > after_id)
+    statement = statement.order_by(Task.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def events_after_query(task_id: int, after_id: int, limit: Optional[int]) -> Select:
+    return (
+        select(
+            AuditTrail.id,
+            AuditTrail.task_id,
+            AuditTrail.created_at,
+            AuditTrail.message,
+            AuditTrail.level,
+            AuditTrail.duration_ms,
+        )
+        .where(AuditTrail.task_id == task_id, AuditTrail.id > after_id)
+        .order_by(AuditTrail.id)
+        .limit(limit)
+    )
+
+
+def new_events_query(task_ids: Sequence[int], after_id: int, up_to_id: int, limit: int) -> Select:
+    """Events of several tasks in an id range, in id order, with the columns ``encode_event`` reads."""
+    return (
+        select(
+            AuditTrail.id,
+            AuditTrail.task_id,
+            AuditTrail.created_at,
+            AuditTrail.message,
+            AuditTrail.level,
+            AuditTrail.duration_ms,
+        )
+        .where(AuditTrail.task_id.in_(task_ids), AuditTrail.id > after_id, AuditTrail.id <= up_to_id)
+        .order_by(AuditTrail.id)
+        .limit(limit)
+    )
+
+
+def audit_rows_query(
+    task_id: int,
+    after_id: Optional[int],
+    limit: Optional[int],
+    level: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> Select:
+    """Keyset-paged projection of audit columns; ``since`` is inclusive, ``until`` exclusive."""
+    statement = select(
+        AuditTrail.id,
+        AuditTrail.created_at,
+        AuditTrail.message,
+        AuditTrail.level,
+        AuditTrail.duration_ms,
+    ).where(AuditTrail.task_id == task_id)
+    if after_id is not None:
+        statement = statement.where(AuditTrail.id > after_id)
+    if level is not None:
+        statement = statement.where(AuditTrail.level == level)
+    if since is not None:
+        statement = statement.where(AuditTrail.created_at >= since)
+    if until is not None:
+        statement = statement.where(AuditTrail.created_at < until)
+    statement = statement.order_by(AuditTrail.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
@@ -0,0 +1,161 @@
+"""Audit retention: move cold rows of finished tasks into compressed archive files.
+
+Archives are gzip'd column-oriented JSON chunks partitioned by day and task::
+
+    <archive_dir>/date=2024-01-31/task-7-1200-1450.json.gz
+
+The file name carries the id range so reads can skip whole chunks by cursor.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import Row
+
+from .repository import TaskRepository, incremental_vacuum, session_scope
+from .services import FINISHED_STATUSES
+from .settings import RetentionPolicy
+
+_COLUMNS = ("id", "created_at", "message", "level", "duration_ms")
+_CHUNK_NAME = re.compile(r"task-(?P<task_id>\d+)-(?P<first>\d+)-(?P<last>\d+)\.json\.gz$")
+_LEVELS = ("info", "warning", "error")
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivedRow(NamedTuple):
+    """Same attributes as an audit column tuple, so serializers accept either."""
+
+    id: int
+    created_at: datetime
+    message: str
+    level: str
+    duration_ms: Optional[float]
+
+
+class AuditArchive:
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def write(self, task_id: int, day: date, rows: Sequence[Row]) -> Path:
+        partition = self.directory / f"date={day.isoformat()}"
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / f"task-{task_id}-{rows[0].id}-{rows[-1].id}.json.gz"
+        columns = {name: [getattr(row, name) for row in rows] for name in _COLUMNS}
+        columns["created_at"] = [value.isoformat() for value in columns["created_at"]]
+        # Write-then-rename so a reader never sees a half-written chunk.
+        partial = path.with_suffix(".partial")
+        with gzip.open(partial, "wt", encoding="utf-8") as handle:
+            json.dump(columns, handle, separators=(",", ":"))
+        os.replace(partial, path)
+        return path
+
+    def read(
+        self,
+        task_id: int,
+        *,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        level: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[ArchivedRow]:
+        """Archived rows matching the same filters as ``TaskRepository.audit_rows``, by id."""
+        rows: Dict[int, ArchivedRow] = {}
+        for path in self._chunks(task_id, after_id, since, until):
+            for row in _load(path):
+                if (
+                    (after_id is None or row.id > after_id)
+                    and (level is None or row.level == level)
+                    and (since is None or row.created_at >= since)
+                    and (until is None or row.created_at < until)
+                ):
+                    # Keyed by id: a crash between writing a chunk and deleting its rows
+                    # can archive the same row twice.
+                    rows[row.id] = row
+        ordered = [rows[row_id] for row_id in sorted(rows)]
+        return ordered if limit is None else ordered[:limit]
+
+    def _chunks(
+        self,
+        task_id: int,
+        after_id: Optional[int],
+        since: Optional[datetime],
+        until: Optional[datetime],
+    ) -> Iterator[Path]:
+        if not self.directory.exists():
+            return
+        for partition in sorted(self.directory.glob("date=*")):
+            day = date.fromisoformat(partition.name[len("date=") :])
+            if (since is not None and day < since.date()) or (until is not None and day > until.date()):
+                continue
+            for path in partition.glob(f"task-{task_id}-*.json.gz"):
+                match = _CHUNK_NAME.match(path.name)
+                if match and (after_id is None or int(match["last"]) > after_id):
+                    yield path
+
+
+def _load(path: Path) -> Iterator[ArchivedRow]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        columns = json.load(handle)
+    for values in zip(*(columns[name] for name in _COLUMNS)):
+        row = ArchivedRow(*values)
+        yield row._replace(created_at=datetime.fromisoformat(row.created_at))
+
+
+def merge_pages(live: Sequence, archived: Sequence, limit: int) -> list:
+    """Merge two id-ordered pages into the first ``limit`` rows overall."""
+    return sorted([*live, *archived], key=lambda row: row.id)[:limit]
+
+
+def archive_cold_events(policy: RetentionPolicy, archive: AuditArchive, now: Optional[datetime] = None) -> int:
+    """Archive expired audit rows of finished tasks, a batch per transaction; returns rows moved."""
+    now = now or datetime.utcnow()
+    cutoffs = {level: now - ttl for level in _LEVELS if (ttl := policy.ttl(level)) is not None}
+    default_ttl = policy.ttl("")
+    default_cutoff = now - default_ttl if default_ttl is not None else None
+    moved = 0
+    while True:
+        with session_scope() as session:
+            repo = TaskRepository(session)
+            rows = repo.cold_audit_rows(cutoffs, default_cutoff, FINISHED_STATUSES, policy.batch_size)
+            if not rows:
+                break
+            for (task_id, day), chunk in _partition(rows).items():
+                archive.write(task_id, day, chunk)
+            # Files are durable before the rows go; the reverse order could lose events.
+            repo.delete_audit_rows([row.id for row in rows])
+        moved += len(rows)
+        if len(rows) < policy.batch_size:
+            break
+    if moved and policy.vacuum_pages:
+        incremental_vacuum(policy.vacuum_pages)
+    return moved
+
+
+def _partition(rows: Sequence[Row]) -> Dict[tuple, List[Row]]:
+    partitions: Dict[tuple, List[Row]] = defaultdict(list)
+    for row in rows:
+        partitions[(row.task_id, row.created_at.date())].append(row)
+    return partitions
+
+
+async def run_retention(policy: RetentionPolicy, archive: AuditArchive) -> None:
+    """Archive on a fixed interval until cancelled."""
+    while True:
+        await asyncio.sleep(policy.interval_seconds)
+        try:
+            await run_in_threadpool(archive_cold_events, policy, archive)
+        except Exception:  # noqa: BLE001 - keep retrying on the next tick
+            logger.exception("Audit retention pass failed")
+
@@ -0,0 +1,40 @@
+"""Automatic dispatch of runnable pending tasks to the job queue."""
+from __future__ import annotations
+
+from sqlalchemy import Connection
+from sqlalchemy.engine import Engine
+
+from .jobs import JobQueue
+from .notify import CommitWatcher
+from .services import dispatch_ready
+
+
+class Scheduler:
+    """Keeps the job queue fed from the database so tasks run without ``/execute``.
+
+    The database stays the source of truth. At most ``backlog`` claimed jobs
+    wait in memory; the rest of the pending tasks wait in the database. A
+    more urgent task created later is therefore still claimed ahead of them,
+    and several processes can share the work. The queue orders what it holds
+    by priority and deadline and splits threads fairly between modes.
+
+    Dispatch runs whenever the database changes: a task is created or
+    approved, or a job finishes and frees room in the backlog.
+    """
+
+    def __init__(self, queue: JobQueue, engine: Engine, backlog: int, poll_seconds: float):
+        self.queue = queue
+        self.backlog = backlog
+        self._watcher = CommitWatcher(engine, poll_seconds, self._dispatch, self._dispatch, name="task-scheduler")
+
+    def start(self) -> None:
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._watcher.stop()
+
+    def _dispatch(self, _: Connection) -> bool:
+        room = self.backlog - self.queue.pending_total()
+        dispatch_ready(self.queue, room)
+        # With the backlog full, look again on the next poll rather than waiting for another commit.
+        return room > 0
@@ -1,10 +1,10 @@
 """API schemas exposed by the FastAPI application."""
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 from .models import ExecutionMode
 
@@ -14,12 +14,19 @@ class AuditLogEntry(BaseModel):
     created_at: datetime
     message: str
     level: str
+    duration_ms: Optional[float] = None
     # TODO: expose agent metadata once stored in the database.
 
 
 class TaskSummaryView(BaseModel):
     id: int
-    content: str  # TODO: replace with structured summary fields
+    short_answer: str
+    detailed_answer: str
+    next_steps: list[str]
+    steps_completed: int
+    steps_total: int
+    duration_ms: float
+    updated_at: datetime
 
 
 class TaskView(BaseModel):
@@ -32,14 +39,54 @@ class TaskView(BaseModel):
     forced_mode: Optional[ExecutionMode]
     plan_presented_at: Optional[datetime]
     plan_approved_at: Optional[datetime]
+    priority: int = 0
+    deadline: Optional[datetime] = None
     summary: Optional[TaskSummaryView]
 
 
+class JobView(BaseModel):
+    id: str
+    task_id: int
+    mode: ExecutionMode
+    status: str
+    enqueued_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    error: Optional[str]
+    priority: int = 0
+    deadline: Optional[datetime] = None
+    queue_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
+
+
 class CreateTaskRequest(BaseModel):
     title: str
     description: str
     estimated_steps: int
     forced_mode: Optional[ExecutionMode] = None
+    priority: int = 0
+    deadline: Optional[datetime] = None
+
+    @field_validator("deadline")
+    @classmethod
+    def _naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored and compared as naive UTC, like every other timestamp here.
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class BatchTaskResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    mode: Optional[ExecutionMode] = None
+    error: Optional[str] = None
+
+
+class BatchCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BatchTaskResult]
 
 
 class PlanApprovalRequest(BaseModel):
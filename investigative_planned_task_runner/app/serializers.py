@@ -0,0 +1,99 @@
+"""Conversions from ORM rows and job handles to API schemas.
+
+The ``*_dict`` variants build plain dicts from column tuples for the
+``fastjson`` path; they must produce the same JSON as their schema.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from .jobs import Job
+from .models import Task
+from .schemas import AuditLogEntry, JobView, TaskSummaryView, TaskView
+
+
+def serialize_task(task: Task) -> TaskView:
+    summary = task.summary
+    return TaskView(
+        id=task.id,
+        title=task.title,
+        description=task.description,
+        estimated_steps=task.estimated_steps,
+        mode=task.mode,
+        status=task.status,
+        forced_mode=task.forced_mode,
+        plan_presented_at=task.plan_presented_at,
+        plan_approved_at=task.plan_approved_at,
+        priority=task.priority or 0,
+        deadline=task.deadline,
+        summary=None if not summary else TaskSummaryView(**summary.model_dump(exclude={"task_id"})),
+    )
+
+
+def task_row_dict(row) -> dict[str, Any]:  # type: ignore[no-untyped-def]
+    return {
+        "id": row.id,
+        "title": row.title,
+        "description": row.description,
+        "estimated_steps": row.estimated_steps,
+        "mode": row.mode,
+        "status": row.status,
+        "forced_mode": row.forced_mode,
+        "plan_presented_at": row.plan_presented_at,
+        "plan_approved_at": row.plan_approved_at,
+        "priority": row.priority or 0,
+        "deadline": row.deadline,
+        "summary": None if row.summary_id is None else summary_dict(row),
+    }
+
+
+def summary_dict(row) -> dict[str, Any]:  # type: ignore[no-untyped-def]
+    """The precomputed summary columns of a task row, as ``TaskSummaryView`` fields."""
+    return {
+        "id": row.summary_id,
+        "short_answer": row.summary_short_answer,
+        "detailed_answer": row.summary_detailed_answer,
+        "next_steps": row.summary_next_steps,
+        "steps_completed": row.summary_steps_completed,
+        "steps_total": row.summary_steps_total,
+        "duration_ms": row.summary_duration_ms,
+        "updated_at": row.summary_updated_at,
+    }
+
+
+def event_dict(event) -> dict[str, Any]:  # type: ignore[no-untyped-def]
+    return {
+        "id": event.id,
+        "created_at": event.created_at,
+        "message": event.message,
+        "level": event.level,
+        "duration_ms": event.duration_ms,
+    }
+
+
+def serialize_event(event) -> AuditLogEntry:  # type: ignore[no-untyped-def]
+    return AuditLogEntry(
+        id=event.id,
+        created_at=event.created_at,
+        message=event.message,
+        level=event.level,
+        duration_ms=event.duration_ms,
+    )
+
+
+def serialize_job(job: Job) -> JobView:
+    return JobView(
+        id=job.id,
+        task_id=job.task_id,
+        mode=job.mode,
+        status=job.status.value,
+        enqueued_at=job.enqueued_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        priority=job.priority,
+        deadline=job.deadline,
+        queue_seconds=job.queue_seconds,
+        run_seconds=job.run_seconds,
+    )
+
@@ -1,15 +1,19 @@
 """Business logic for task execution."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Iterable
+from typing import AsyncIterator, Collection, Iterable, Iterator, Optional, Sequence
 
 from fastapi import HTTPException
 
-from . import agents
-from .models import AuditTrail, ExecutionMode, Task
-from .repository import TaskRepository
+from . import agents, plan_cache
+from .async_repository import AsyncTaskRepository
+from .jobs import Job, JobQueue
+from .models import AuditTrail, ExecutionMode, PlanCacheEntry, StepCheckpoint, Task, TaskSummary
+from .repository import TaskRepository, session_scope
+from .schemas import CreateTaskRequest
+from .settings import settings
 
 
 @dataclass
@@ -18,6 +22,48 @@ class ExecutionResult:
     events: Iterable[AuditTrail]
 
 
+@dataclass
+class SummaryProgress:
+    """Running totals a task's summary row is rewritten from after every step."""
+
+    title: str
+    findings: list[str] = field(default_factory=list)
+    duration_ms: float = 0.0
+    total_steps: int = 0
+
+    @classmethod
+    def resumed(cls, title: str, checkpoints: Sequence[StepCheckpoint]) -> SummaryProgress:
+        progress = cls(title, total_steps=len(checkpoints))
+        for checkpoint in checkpoints:
+            progress.findings.append(checkpoint.output)
+            progress.duration_ms += checkpoint.duration_ms or 0.0
+        return progress
+
+    def add(self, result: agents.AgentResponse) -> None:
+        self.findings.append(result.output)
+        self.duration_ms += result.duration_ms
+        self.total_steps = max(self.total_steps, result.total_steps or 0, len(self.findings))
+
+    def apply(self, summary: TaskSummary, finished: bool = False) -> TaskSummary:
+        done = len(self.findings)
+        if finished:
+            summary.short_answer = f"Completed {self.title}"
+            summary.next_steps = ["Review the findings with the requester"]
+        else:
+            summary.short_answer = f"{self.title}: {done} of {self.total_steps} steps done"
+            summary.next_steps = [f"Wait for the remaining {self.total_steps - done} steps"]
+        summary.detailed_answer = " ".join(self.findings)
+        summary.steps_completed = done
+        summary.steps_total = self.total_steps
+        summary.duration_ms = self.duration_ms
+        summary.updated_at = datetime.utcnow()
+        return summary
+
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("complete", "failed", "cancelled")
+
+
 class TaskService:
     """Coordinates the flow between planner and executor agents."""
 
@@ -26,21 +72,37 @@ class TaskService:
 
     def select_mode(self, task: Task) -> ExecutionMode:
         """Determine which execution mode should run for the given task."""
-        if task.forced_mode:
-            task.mode = task.forced_mode
-            return task.mode
-
-        # TODO: Replace this placeholder with the heuristic described in the brief.
-        task.mode = ExecutionMode.INVESTIGATIVE
+        task.mode = _resolve_mode(task.forced_mode, task.estimated_steps)
         return task.mode
 
+    def select_modes(self, requests: Sequence[CreateTaskRequest]) -> list[ExecutionMode]:
+        """Batch counterpart of ``select_mode`` for tasks that are not rows yet."""
+        return [_resolve_mode(request.forced_mode, request.estimated_steps) for request in requests]
+
+    def create_tasks(self, requests: Sequence[CreateTaskRequest]) -> list[tuple[int, ExecutionMode]]:
+        """Insert a batch of tasks in one statement and return each new id with its mode."""
+        modes = self.select_modes(requests)
+        return list(zip(self.repo.bulk_insert_tasks(_task_rows(requests, modes)), modes))
+
     def generate_plan(self, task: Task) -> AuditTrail:
         """Call the planner agent and store an audit event."""
         if task.mode == ExecutionMode.INVESTIGATIVE:
             raise HTTPException(status_code=400, detail="Investigative tasks do not require a plan")
 
-        planner_result = agents.run_agent(agents.PlannerAgent.name, task)
-        event = AuditTrail(task_id=task.id, message=planner_result.output, level="info")
+        key = plan_cache.plan_key(task)
+        output = self._cached_plan(key)
+        plan_cache.record(hit=output is not None)
+        if output is not None:
+            planner_result = agents.AgentResponse(agent=agents.PlannerAgent.name, output=output)
+            self.repo.log_event(AuditTrail(task_id=task.id, message=_cache_hit_message(key)))
+        else:
+            planner_result = _run_agent(agents.PlannerAgent.name, task)
+            plan_cache.PLAN_CACHE.put(key, planner_result.output)
+            if settings.plan_cache_persist:
+                self.repo.save_cached_plan(_plan_entry(key, planner_result.output))
+        event = AuditTrail(
+            task_id=task.id, message=planner_result.output, level="info", duration_ms=planner_result.duration_ms
+        )
         # TODO: enrich with agent metadata + payloads once the model is extended.
         self.repo.log_event(event)
         task.plan_presented_at = datetime.utcnow()
@@ -53,16 +115,323 @@ class TaskService:
         task.plan_approved_at = datetime.utcnow()
         return self.repo.save(task)
 
-    def execute(self, task: Task) -> ExecutionResult:
-        """Execute the task using the appropriate agent(s)."""
+    def execute(self, task: Task, resume: bool = False) -> ExecutionResult:
+        """Execute the task using the appropriate agent(s).
+
+        Each finished step is checkpointed and folded into the task's summary
+        row; with ``resume`` the steps an interrupted run already checkpointed
+        are skipped.
+        """
         mode = self.select_mode(task)
         if mode == ExecutionMode.PLANNED and not task.plan_approved_at:
             # TODO: Block execution until a plan is approved.
             pass
 
-        result = agents.run_agent(agents.ExecutorAgent.name, task)
-        event = AuditTrail(task_id=task.id, message=result.output, level="info")
-        self.repo.log_event(event)
+        plan = self._cached_plan(plan_cache.plan_key(task)) if mode == ExecutionMode.PLANNED else None
+        checkpoints = self.repo.checkpoints(task.id) if resume else []
+        if not resume:
+            self.repo.clear_checkpoints(task.id)
+        progress = SummaryProgress.resumed(task.title, checkpoints)
+        summary = task.summary or TaskSummary(task_id=task.id)
+        # Recorded with the first step, so a crash from here on is found by recovery.
+        task.status = "running"
+        self.repo.save(task)
+        executed: list[AuditTrail] = []
+        done = {checkpoint.step for checkpoint in checkpoints}
+        for result in _stream_agent(agents.ExecutorAgent.name, task, plan, done):
+            if self.repo.save_checkpoint(_checkpoint(task.id, result)):
+                event = AuditTrail(task_id=task.id, message=result.output, level="info", duration_ms=result.duration_ms)
+                self.repo.log_event(event)
+                executed.append(event)
+                progress.add(result)
+                self.repo.upsert_summary(progress.apply(summary))
+            # Commit every step so stream subscribers and audit readers see it while later steps run,
+            # and so it survives a crash as a checkpoint.
+            self.repo.commit()
         task.status = "complete"
         self.repo.save(task)
-        return ExecutionResult(task=task, events=[event])
+        self.repo.upsert_summary(progress.apply(summary, finished=True))
+        return ExecutionResult(task=task, events=executed)
+
+    def _cached_plan(self, key: str) -> Optional[str]:
+        output = plan_cache.PLAN_CACHE.get(key)
+        if output is None and settings.plan_cache_persist:
+            entry = self.repo.get_cached_plan(key)
+            if entry is not None:
+                output = entry.output
+                plan_cache.PLAN_CACHE.put(key, output)
+        return output
+
+    def enqueue_execution(self, task: Task, queue: JobQueue) -> Job:
+        """Hand execution to the background queue and return its handle right away."""
+        if task.status in ACTIVE_STATUSES or queue.active_job(task.id):
+            raise HTTPException(status_code=409, detail=f"Task is already {task.status}")
+        self.select_mode(task)
+        job = _job(task)
+        task.status = "queued"
+        self.repo.save(task)
+        self.repo.log_event(AuditTrail(task_id=task.id, message=f"Execution job {job.id} queued"))
+        # Commit before the job becomes visible to a worker so it never reads a stale row.
+        self.repo.commit()
+        return queue.submit(job)
+
+    def cancel_execution(self, task: Task, job: Job) -> Task:
+        task.status = "cancelled"
+        self.repo.save(task)
+        self.repo.log_event(AuditTrail(task_id=task.id, message=f"Execution job {job.id} cancelled"))
+        return task
+
+    def return_to_pending(self, task: Task, job: Job) -> Task:
+        """Undo a scheduler claim whose job never started."""
+        task.status = "pending"
+        self.repo.save(task)
+        self.repo.log_event(AuditTrail(task_id=task.id, message=f"Execution job {job.id} returned to pending"))
+        return task
+
+
+class AsyncTaskService:
+    """Awaitable variant of ``TaskService`` for the async API path.
+
+    Business rules are the same; database and agent calls are awaited so a
+    slow agent never blocks other requests.
+    """
+
+    select_mode = TaskService.select_mode
+    select_modes = TaskService.select_modes
+
+    def __init__(self, repo: AsyncTaskRepository):
+        self.repo = repo
+
+    async def create_tasks(self, requests: Sequence[CreateTaskRequest]) -> list[tuple[int, ExecutionMode]]:
+        modes = self.select_modes(requests)
+        return list(zip(await self.repo.bulk_insert_tasks(_task_rows(requests, modes)), modes))
+
+    async def generate_plan(self, task: Task) -> AuditTrail:
+        if task.mode == ExecutionMode.INVESTIGATIVE:
+            raise HTTPException(status_code=400, detail="Investigative tasks do not require a plan")
+
+        key = plan_cache.plan_key(task)
+        output = await self._cached_plan(key)
+        plan_cache.record(hit=output is not None)
+        if output is not None:
+            planner_result = agents.AgentResponse(agent=agents.PlannerAgent.name, output=output)
+            await self.repo.log_event(AuditTrail(task_id=task.id, message=_cache_hit_message(key)))
+        else:
+            planner_result = await _run_agent_async(agents.PlannerAgent.name, task)
+            plan_cache.PLAN_CACHE.put(key, planner_result.output)
+            if settings.plan_cache_persist:
+                await self.repo.save_cached_plan(_plan_entry(key, planner_result.output))
+        event = AuditTrail(
+            task_id=task.id, message=planner_result.output, level="info", duration_ms=planner_result.duration_ms
+        )
+        await self.repo.log_event(event)
+        task.plan_presented_at = datetime.utcnow()
+        await self.repo.save(task)
+        return event
+
+    async def approve_plan(self, task: Task) -> Task:
+        if task.mode != ExecutionMode.PLANNED:
+            raise HTTPException(status_code=400, detail="Only planned tasks can be approved")
+        task.plan_approved_at = datetime.utcnow()
+        return await self.repo.save(task)
+
+    async def execute(self, task: Task) -> ExecutionResult:
+        mode = self.select_mode(task)
+        plan = await self._cached_plan(plan_cache.plan_key(task)) if mode == ExecutionMode.PLANNED else None
+        await self.repo.clear_checkpoints(task.id)
+        progress = SummaryProgress(task.title)
+        summary = task.summary or TaskSummary(task_id=task.id)
+        task.status = "running"
+        await self.repo.save(task)
+        executed: list[AuditTrail] = []
+        async for result in _stream_agent_async(agents.ExecutorAgent.name, task, plan):
+            if await self.repo.save_checkpoint(_checkpoint(task.id, result)):
+                event = AuditTrail(task_id=task.id, message=result.output, level="info", duration_ms=result.duration_ms)
+                await self.repo.log_event(event)
+                executed.append(event)
+                progress.add(result)
+                await self.repo.upsert_summary(progress.apply(summary))
+            await self.repo.commit()
+        task.status = "complete"
+        await self.repo.save(task)
+        await self.repo.upsert_summary(progress.apply(summary, finished=True))
+        return ExecutionResult(task=task, events=executed)
+
+    async def _cached_plan(self, key: str) -> Optional[str]:
+        output = plan_cache.PLAN_CACHE.get(key)
+        if output is None and settings.plan_cache_persist:
+            entry = await self.repo.get_cached_plan(key)
+            if entry is not None:
+                output = entry.output
+                plan_cache.PLAN_CACHE.put(key, output)
+        return output
+
+    async def enqueue_execution(self, task: Task, queue: JobQueue) -> Job:
+        if task.status in ACTIVE_STATUSES or queue.active_job(task.id):
+            raise HTTPException(status_code=409, detail=f"Task is already {task.status}")
+        self.select_mode(task)
+        job = _job(task)
+        task.status = "queued"
+        await self.repo.save(task)
+        await self.repo.log_event(AuditTrail(task_id=task.id, message=f"Execution job {job.id} queued"))
+        await self.repo.commit()
+        return queue.submit(job)
+
+
+PLANNED_STEP_THRESHOLD = 3
+
+
+def _resolve_mode(forced_mode: Optional[ExecutionMode], estimated_steps: int) -> ExecutionMode:
+    """A requestor's forced mode wins; otherwise longer tasks get planned up front."""
+    if forced_mode:
+        return forced_mode
+    if estimated_steps >= PLANNED_STEP_THRESHOLD:
+        return ExecutionMode.PLANNED
+    return ExecutionMode.INVESTIGATIVE
+
+
+def _plan_entry(key: str, output: str) -> PlanCacheEntry:
+    return PlanCacheEntry(key=key, agent=agents.PlannerAgent.name, version=agents.PlannerAgent.version, output=output)
+
+
+def _cache_hit_message(key: str) -> str:
+    return f"Plan reused from cache ({agents.PlannerAgent.name} v{agents.PlannerAgent.version}, key {key[:12]})"
+
+
+def _run_agent(name: str, task: Task) -> agents.AgentResponse:
+    try:
+        return agents.run_agent(name, task)
+    except agents.AgentOverloadedError as exc:
+        raise _overloaded(exc) from exc
+    except agents.AgentTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
+
+
+async def _run_agent_async(name: str, task: Task) -> agents.AgentResponse:
+    try:
+        return await agents.run_agent_async(name, task)
+    except agents.AgentOverloadedError as exc:
+        raise _overloaded(exc) from exc
+    except agents.AgentTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
+
+
+def _overloaded(exc: agents.AgentOverloadedError) -> HTTPException:
+    # Shed before any work started, so the client can simply come back later.
+    return HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": exc.retry_after_header})
+
+
+def checkpoint_key(task_id: int, step: int) -> str:
+    return f"task-{task_id}/step-{step}"
+
+
+def _checkpoint(task_id: int, result: agents.AgentResponse) -> StepCheckpoint:
+    return StepCheckpoint(
+        task_id=task_id,
+        step=result.step,
+        idempotency_key=checkpoint_key(task_id, result.step),
+        output=result.output,
+        duration_ms=result.duration_ms,
+    )
+
+
+def _stream_agent(
+    name: str, task: Task, plan: Optional[str], done: Collection[int] = ()
+) -> Iterator[agents.AgentResponse]:
+    try:
+        yield from agents.stream_agent(name, task, plan=plan, done=done)
+    except agents.AgentOverloadedError as exc:
+        raise _overloaded(exc) from exc
+    except agents.AgentTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
+
+
+async def _stream_agent_async(name: str, task: Task, plan: Optional[str]) -> AsyncIterator[agents.AgentResponse]:
+    try:
+        async for result in agents.stream_agent_async(name, task, plan=plan):
+            yield result
+    except agents.AgentOverloadedError as exc:
+        raise _overloaded(exc) from exc
+    except agents.AgentTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
+
+
+def _task_rows(requests: Sequence[CreateTaskRequest], modes: Sequence[ExecutionMode]) -> list[dict]:
+    return [
+        {
+            "title": request.title,
+            "description": request.description,
+            "estimated_steps": request.estimated_steps,
+            "forced_mode": request.forced_mode,
+            "mode": mode,
+            "priority": request.priority,
+            "deadline": request.deadline,
+        }
+        for request, mode in zip(requests, modes)
+    ]
+
+
+def run_execution_job(job: Job) -> None:
+    """Worker entry point: execute a queued task in its own session."""
+    with session_scope() as session:
+        service = TaskService(TaskRepository(session))
+        task = service.repo.get(job.task_id)
+        if task is None:
+            raise LookupError(f"Task {job.task_id} no longer exists")
+        task.status = "running"
+        service.repo.save(task)
+        service.repo.log_event(AuditTrail(task_id=task.id, message=f"Execution job {job.id} started"))
+        service.repo.commit()
+        try:
+            service.execute(task, resume=job.resume)
+        except Exception as exc:
+            session.rollback()
+            task = service.repo.get(job.task_id)
+            if task is None:
+                raise
+            task.status = "failed"
+            service.repo.save(task)
+            service.repo.log_event(
+                AuditTrail(task_id=task.id, message=f"Execution job {job.id} failed: {exc}", level="error")
+            )
+            session.commit()
+            raise
+
+
+def recover_interrupted(queue: JobQueue) -> list[Job]:
+    """Re-enqueue tasks a previous process left queued or running.
+
+    Only a crash leaves a task in those states (a clean shutdown cancels its
+    jobs), so the new jobs resume from the tasks' step checkpoints.
+    """
+    jobs = []
+    with session_scope() as session:
+        repo = TaskRepository(session)
+        for task_id in repo.task_ids_with_status(ACTIVE_STATUSES):
+            task = repo.get(task_id)
+            job = _job(task, resume=True)
+            task.status = "queued"
+            repo.save(task)
+            repo.log_event(AuditTrail(task_id=task.id, message=f"Execution job {job.id} queued to resume an interrupted run"))
+            jobs.append(job)
+    # Submitted after the commit, as in ``enqueue_execution``.
+    return [queue.submit(job) for job in jobs]
+
+
+def dispatch_ready(queue: JobQueue, limit: int) -> list[Job]:
+    """Claim up to ``limit`` runnable pending tasks, most urgent first, and queue their execution."""
+    if limit <= 0:
+        return []
+    jobs = []
+    with session_scope() as session:
+        repo = TaskRepository(session)
+        for row in repo.claim_ready_tasks(limit):
+            job = Job(task_id=row.id, mode=row.mode, priority=row.priority or 0, deadline=row.deadline)
+            repo.log_event(AuditTrail(task_id=row.id, message=f"Execution job {job.id} queued by the scheduler"))
+            jobs.append(job)
+    # Submitted after the commit, as in ``enqueue_execution``.
+    return queue.submit_many(jobs)
+
+
+def _job(task: Task, resume: bool = False) -> Job:
+    return Job(task_id=task.id, mode=task.mode, resume=resume, priority=task.priority or 0, deadline=task.deadline)
@@ -0,0 +1,196 @@
+"""Runtime configuration for the task runner, read from the environment."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from .models import ExecutionMode
+
+_PREFIX = "TASK_RUNNER_"
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(_PREFIX + name)
+    return int(value) if value else default
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(_PREFIX + name) or default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(_PREFIX + name)
+    return value.lower() in ("1", "true", "yes") if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Knobs that deployments tune without touching code."""
+
+    worker_threads: int = 4
+    investigative_concurrency: int = 4
+    planned_concurrency: int = 2
+    job_history: int = 1000
+    ingest_chunk_size: int = 500
+    async_api: bool = False
+    # Read cache for task lookups and list pages; entries also expire after the TTL.
+    task_cache: bool = False
+    task_cache_size: int = 10_000
+    task_cache_ttl_seconds: int = 30
+    # Instances per agent type; also the most calls that agent serves at once.
+    planner_pool_size: int = 2
+    executor_pool_size: int = 4
+    agent_timeout_seconds: int = 60
+    # Admission control per agent type: calls per minute (0 = unlimited) in bursts of
+    # ``agent_burst``; calls over the rate or the concurrency limit wait in a queue of
+    # ``agent_queue_size`` for up to the queue timeout, then get a 429. With
+    # ``adaptive_concurrency`` the limit drops below the pool size while latency rises.
+    planner_rate_per_minute: int = 0
+    executor_rate_per_minute: int = 0
+    agent_burst: int = 10
+    agent_queue_size: int = 32
+    agent_queue_timeout_seconds: int = 10
+    adaptive_concurrency: bool = True
+    # Memoized planner output: in-process LRU, optionally backed by a SQLite table.
+    plan_cache_size: int = 1024
+    plan_cache_persist: bool = True
+    # Re-enqueue tasks left queued/running by a previous process when the app starts.
+    resume_interrupted: bool = True
+    # How committed audit events reach SSE streams: "local" (one process) or
+    # "sqlite" (every worker sharing the database file), polled this often.
+    notify_backend: str = "local"
+    notify_poll_ms: int = 50
+    # Queue runnable pending tasks without waiting for /execute, keeping at most
+    # ``dispatch_backlog`` of them waiting in memory; the rest wait in the database.
+    auto_dispatch: bool = False
+    dispatch_backlog: int = 16
+    dispatch_poll_ms: int = 100
+
+    @classmethod
+    def from_env(cls) -> Settings:
+        return cls(
+            worker_threads=_env_int("WORKER_THREADS", cls.worker_threads),
+            investigative_concurrency=_env_int("INVESTIGATIVE_CONCURRENCY", cls.investigative_concurrency),
+            planned_concurrency=_env_int("PLANNED_CONCURRENCY", cls.planned_concurrency),
+            job_history=_env_int("JOB_HISTORY", cls.job_history),
+            ingest_chunk_size=_env_int("INGEST_CHUNK_SIZE", cls.ingest_chunk_size),
+            async_api=_env_bool("ASYNC_API", cls.async_api),
+            task_cache=_env_bool("TASK_CACHE", cls.task_cache),
+            task_cache_size=_env_int("TASK_CACHE_SIZE", cls.task_cache_size),
+            task_cache_ttl_seconds=_env_int("TASK_CACHE_TTL_SECONDS", cls.task_cache_ttl_seconds),
+            planner_pool_size=_env_int("PLANNER_POOL_SIZE", cls.planner_pool_size),
+            executor_pool_size=_env_int("EXECUTOR_POOL_SIZE", cls.executor_pool_size),
+            agent_timeout_seconds=_env_int("AGENT_TIMEOUT_SECONDS", cls.agent_timeout_seconds),
+            planner_rate_per_minute=_env_int("PLANNER_RATE_PER_MINUTE", cls.planner_rate_per_minute),
+            executor_rate_per_minute=_env_int("EXECUTOR_RATE_PER_MINUTE", cls.executor_rate_per_minute),
+            agent_burst=_env_int("AGENT_BURST", cls.agent_burst),
+            agent_queue_size=_env_int("AGENT_QUEUE_SIZE", cls.agent_queue_size),
+            agent_queue_timeout_seconds=_env_int("AGENT_QUEUE_TIMEOUT_SECONDS", cls.agent_queue_timeout_seconds),
+            adaptive_concurrency=_env_bool("ADAPTIVE_CONCURRENCY", cls.adaptive_concurrency),
+            plan_cache_size=_env_int("PLAN_CACHE_SIZE", cls.plan_cache_size),
+            plan_cache_persist=_env_bool("PLAN_CACHE_PERSIST", cls.plan_cache_persist),
+            resume_interrupted=_env_bool("RESUME_INTERRUPTED", cls.resume_interrupted),
+            notify_backend=_env_str("NOTIFY_BACKEND", cls.notify_backend),
+            notify_poll_ms=_env_int("NOTIFY_POLL_MS", cls.notify_poll_ms),
+            auto_dispatch=_env_bool("AUTO_DISPATCH", cls.auto_dispatch),
+            dispatch_backlog=_env_int("DISPATCH_BACKLOG", cls.dispatch_backlog),
+            dispatch_poll_ms=_env_int("DISPATCH_POLL_MS", cls.dispatch_poll_ms),
+        )
+
+    def mode_limits(self) -> Dict[ExecutionMode, int]:
+        return {
+            ExecutionMode.INVESTIGATIVE: self.investigative_concurrency,
+            ExecutionMode.PLANNED: self.planned_concurrency,
+        }
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """How the SQLite database is opened and shared between threads."""
+
+    path: Path = Path("task_runner.db")
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    busy_timeout_ms: int = 5000
+    cache_size_kib: int = 64 * 1024
+    mmap_size: int = 256 * 1024 * 1024
+    # Only takes effect on a new database file; existing ones need a one-off VACUUM.
+    auto_vacuum: str = "incremental"
+    pool_size: int = 8
+    max_overflow: int = 8
+    single_writer: bool = True
+    # Async engine URL; empty means aiosqlite on ``path``. Any SQLAlchemy async URL works.
+    async_url: str = ""
+
+    @property
+    def async_database_url(self) -> str:
+        return self.async_url or f"sqlite+aiosqlite:///{self.path}"
+
+    @classmethod
+    def from_env(cls, workers: int) -> StorageProfile:
+        return cls(
+            path=Path(_env_str("DB_PATH", str(cls.path))),
+            journal_mode=_env_str("DB_JOURNAL_MODE", cls.journal_mode),
+            synchronous=_env_str("DB_SYNCHRONOUS", cls.synchronous),
+            busy_timeout_ms=_env_int("DB_BUSY_TIMEOUT_MS", cls.busy_timeout_ms),
+            cache_size_kib=_env_int("DB_CACHE_SIZE_KIB", cls.cache_size_kib),
+            mmap_size=_env_int("DB_MMAP_SIZE", cls.mmap_size),
+            auto_vacuum=_env_str("DB_AUTO_VACUUM", cls.auto_vacuum),
+            # Job workers plus a handful of request threads each hold one connection at a time.
+            pool_size=_env_int("DB_POOL_SIZE", workers + 4),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", cls.max_overflow),
+            single_writer=_env_bool("DB_SINGLE_WRITER", cls.single_writer),
+            async_url=_env_str("ASYNC_DB_URL", cls.async_url),
+        )
+
+    @classmethod
+    def legacy(cls, path: Path) -> StorageProfile:
+        """SQLite's stock behaviour (with pysqlite's 5s timeout), kept for benchmarking against."""
+        return cls(
+            path=path,
+            journal_mode="delete",
+            synchronous="full",
+            busy_timeout_ms=5000,
+            cache_size_kib=2000,
+            mmap_size=0,
+            auto_vacuum="none",
+            single_writer=False,
+        )
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """How long audit rows of finished tasks stay in SQLite before being archived."""
+
+    archive_dir: Path = Path("audit_archive")
+    # Days per level; 0 keeps that level in the database forever.
+    info_days: int = 30
+    warning_days: int = 90
+    error_days: int = 180
+    interval_seconds: int = 3600
+    batch_size: int = 5000
+    vacuum_pages: int = 1000
+
+    def ttl(self, level: str) -> Optional[timedelta]:
+        days = {"info": self.info_days, "warning": self.warning_days, "error": self.error_days}.get(level, self.info_days)
+        return timedelta(days=days) if days > 0 else None
+
+    @classmethod
+    def from_env(cls) -> RetentionPolicy:
+        return cls(
+            archive_dir=Path(_env_str("AUDIT_ARCHIVE_DIR", str(cls.archive_dir))),
+            info_days=_env_int("AUDIT_INFO_DAYS", cls.info_days),
+            warning_days=_env_int("AUDIT_WARNING_DAYS", cls.warning_days),
+            error_days=_env_int("AUDIT_ERROR_DAYS", cls.error_days),
+            interval_seconds=_env_int("AUDIT_RETENTION_INTERVAL_SECONDS", cls.interval_seconds),
+            batch_size=_env_int("AUDIT_RETENTION_BATCH_SIZE", cls.batch_size),
+            vacuum_pages=_env_int("AUDIT_VACUUM_PAGES", cls.vacuum_pages),
+        )
+
+
+settings = Settings.from_env()
+storage_profile = StorageProfile.from_env(settings.worker_threads)
+retention_policy = RetentionPolicy.from_env()
@@ -0,0 +1,106 @@
+"""SQLite engine construction: pragmas, pooling and the single-writer gate."""
+from __future__ import annotations
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Session, create_engine
+
+from .settings import StorageProfile
+
+_HOLDS_WRITE_GATE = "holds_write_gate"
+
+
+def build_engine(profile: StorageProfile) -> Engine:
+    """Create an engine whose every connection is configured per ``profile``."""
+    engine = create_engine(
+        f"sqlite:///{profile.path}",
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        connect_args={"check_same_thread": False, "timeout": profile.busy_timeout_ms / 1000},
+    )
+
+    apply_pragmas(engine, profile)
+    if profile.single_writer:
+        WRITE_GATE.engines[engine] = profile.busy_timeout_ms / 1000
+    return engine
+
+
+def apply_pragmas(engine: Engine, profile: StorageProfile) -> None:
+    """Configure every new SQLite connection of ``engine`` per ``profile``."""
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record) -> None:  # type: ignore[no-untyped-def]
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={profile.busy_timeout_ms}")
+        # Setting auto_vacuum takes the write lock, and it only matters before the
+        # first table exists; on an existing file it would stall every new
+        # connection behind whichever worker is writing.
+        cursor.execute("PRAGMA page_count")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"PRAGMA auto_vacuum={profile.auto_vacuum}")
+        cursor.execute(f"PRAGMA journal_mode={profile.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={profile.synchronous}")
+        # A negative cache_size is read by SQLite as KiB rather than pages.
+        cursor.execute(f"PRAGMA cache_size=-{profile.cache_size_kib}")
+        cursor.execute(f"PRAGMA mmap_size={profile.mmap_size}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class WriteGate:
+    """Lets one session at a time hold an open write transaction per process.
+
+    SQLite only ever has one writer, so queueing writers here in FIFO-ish
+    lock order replaces a storm of ``database is locked`` retries with a
+    wait. The gate is taken on a session's first write (ORM flush or bulk
+    DML) and released when its transaction ends in any way; reads
+    never touch it.
+
+    The gate belongs to the session, not the thread: FastAPI may flush in
+    one worker thread and commit in another when tearing down a dependency.
+    """
+
+    def __init__(self) -> None:
+        # Each gated engine with its busy timeout in seconds.
+        self.engines: dict[Engine, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, session: Session) -> None:
+        bind = session.get_bind()
+        if session.info.get(_HOLDS_WRITE_GATE) or bind not in self.engines:
+            return
+        # Bounded, so one thread juggling two sessions falls back to SQLite's
+        # busy_timeout (and errors out) instead of deadlocking on itself.
+        if self._lock.acquire(timeout=self.engines[bind]):
+            session.info[_HOLDS_WRITE_GATE] = True
+
+    def release(self, session: Session) -> None:
+        if session.info.pop(_HOLDS_WRITE_GATE, False):
+            self._lock.release()
+
+
+WRITE_GATE = WriteGate()
+
+
+@event.listens_for(Session, "before_flush")
+def _gate_flush(session: Session, _context, _instances) -> None:  # type: ignore[no-untyped-def]
+    if session.new or session.dirty or session.deleted:
+        WRITE_GATE.acquire(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _gate_bulk_dml(state) -> None:  # type: ignore[no-untyped-def]
+    if state.is_insert or state.is_update or state.is_delete:
+        WRITE_GATE.acquire(state.session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_gate(session: Session, transaction) -> None:  # type: ignore[no-untyped-def]
+    # Fires for commit, rollback and close alike; only the outermost transaction counts.
+    if transaction.parent is None:
+        WRITE_GATE.release(session)
@@ -0,0 +1,301 @@
+"""Load-test the API in-process and flag regressions against a saved baseline.
+
+Run from the project root::
+
+    python -m benchmarks.bench_api --save benchmarks/baseline.json
+    python -m benchmarks.bench_api --compare benchmarks/baseline.json
+
+Scenarios:
+
+* ``mix``: concurrent clients creating, listing, planning, approving,
+  executing and paging audit trails.
+* ``sse``: audit events fanned out to concurrent stream subscribers; latency
+  is from the write to delivery.
+* ``audit``: cursor pages of one task with a large audit trail.
+* ``tasks``: filtered pages of a large task table.
+
+Each scenario reports req/s, p50/p99 latency, database size and peak RSS.
+``--scale`` multiplies every workload size. With ``--compare`` the process
+exits non-zero if any scenario's req/s or p99 is worse than the baseline by
+more than ``--tolerance``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+@dataclass
+class Result:
+    requests: int
+    req_per_s: float
+    p50_ms: float
+    p99_ms: float
+    errors: int
+    db_bytes: int
+    rss_mb: float
+
+
+def _percentile(samples: Sequence[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)] if ordered else 0.0
+
+
+def _rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _db_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in (path, path.with_name(path.name + "-wal")) if p.exists())
+
+
+def _result(latencies: List[float], elapsed: float, errors: int, db_path: Path) -> Result:
+    return Result(
+        requests=len(latencies),
+        req_per_s=len(latencies) / elapsed,
+        p50_ms=_percentile(latencies, 0.5) * 1000,
+        p99_ms=_percentile(latencies, 0.99) * 1000,
+        errors=errors,
+        db_bytes=_db_bytes(db_path),
+        rss_mb=_rss_mb(),
+    )
+
+
+def bench_mix(client, db_path: Path, clients: int, requests: int) -> Result:  # type: ignore[no-untyped-def]
+    ids = [task["id"] for task in client.get("/tasks").json()]
+    lock = threading.Lock()
+
+    def create(rng: random.Random) -> int:
+        body = {"title": f"bench {rng.random()}", "description": "load test", "estimated_steps": rng.randint(1, 5)}
+        response = client.post("/tasks", json=body)
+        with lock:
+            ids.append(response.json()["id"])
+        return response.status_code
+
+    def pick(rng: random.Random) -> int:
+        with lock:
+            return rng.choice(ids)
+
+    operations: Dict[str, Callable[[random.Random], int]] = {
+        "create": create,
+        "list": lambda rng: client.get("/tasks", params={"limit": 100}).status_code,
+        "plan": lambda rng: client.post(f"/tasks/{pick(rng)}/plan").status_code,
+        "approve": lambda rng: client.post(f"/tasks/{pick(rng)}/plan/approval", json={"approved": True}).status_code,
+        "execute": lambda rng: client.post(f"/tasks/{pick(rng)}/execute").status_code,
+        "audit": lambda rng: client.get(f"/tasks/{pick(rng)}/audit", params={"limit": 50}).status_code,
+    }
+    weights = {"create": 20, "list": 30, "plan": 15, "approve": 10, "execute": 10, "audit": 15}
+    names, cumulative = list(weights), list(weights.values())
+
+    def one(seed: int) -> tuple[float, bool]:
+        rng = random.Random(seed)
+        operation = operations[rng.choices(names, cumulative)[0]]
+        started = time.perf_counter()
+        status = operation(rng)
+        # 4xx is expected in a random mix (planning an investigative task, say); 5xx is not.
+        return time.perf_counter() - started, status >= 500
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outcomes = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    return _result([latency for latency, _ in outcomes], elapsed, sum(failed for _, failed in outcomes), db_path)
+
+
+def bench_sse(db_path: Path, subscribers: int, events: int) -> Result:
+    from app import events as app_events
+    from app.main import _load_events_after
+    from app.models import AuditTrail, Task
+    from app.repository import TaskRepository, session_scope
+
+    with session_scope() as session:
+        task = Task(title="sse bench", description="", estimated_steps=1)
+        session.add(task)
+        session.flush()
+        task_id = task.id
+
+    committed: Dict[int, float] = {}
+    latencies: List[float] = []
+
+    def publish() -> None:
+        for i in range(events):
+            with session_scope() as session:
+                event = TaskRepository(session).log_event(AuditTrail(task_id=task_id, message=f"event {i}"))
+                event_id = event.id
+                committed[event_id] = time.perf_counter()
+
+    async def subscribe() -> None:
+        received = 0
+        stream = app_events.BUS.stream(task_id, backfill=_load_events_after)
+        try:
+            async for message in stream:
+                latencies.append(time.perf_counter() - committed[int(message["id"])])
+                received += 1
+                if received == events:
+                    return
+        finally:
+            await stream.aclose()
+
+    async def run() -> float:
+        consumers = [asyncio.create_task(subscribe()) for _ in range(subscribers)]
+        # Publish only once every subscriber is registered, so none starts with a backfill.
+        while app_events.BUS.subscriber_count(task_id) < subscribers:
+            await asyncio.sleep(0.001)
+        started = time.perf_counter()
+        await asyncio.gather(asyncio.to_thread(publish), *consumers)
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    return _result(latencies, elapsed, subscribers * events - len(latencies), db_path)
+
+
+def bench_audit(client, db_path: Path, rows: int, pages: int) -> Result:  # type: ignore[no-untyped-def]
+    from sqlalchemy import insert
+
+    from app.models import AuditTrail, Task
+    from app.repository import session_scope
+
+    with session_scope() as session:
+        task = Task(title="audit bench", description="", estimated_steps=1)
+        session.add(task)
+        session.flush()
+        task_id = task.id
+        for start in range(0, rows, 10_000):
+            batch = [{"task_id": task_id, "message": f"event {i}"} for i in range(start, min(rows, start + 10_000))]
+            session.execute(insert(AuditTrail), batch)
+
+    rng = random.Random(11)
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(pages):
+        # Cursors spread over the whole trail, so deep pages cost as much as the first.
+        cursor = rng.randint(0, rows)
+        page_started = time.perf_counter()
+        response = client.get(f"/tasks/{task_id}/audit", params={"after": cursor, "limit": 100})
+        latencies.append(time.perf_counter() - page_started)
+        errors += response.status_code >= 500
+    return _result(latencies, time.perf_counter() - started, errors, db_path)
+
+
+def bench_tasks(client, db_path: Path, rows: int, pages: int) -> Result:  # type: ignore[no-untyped-def]
+    from app.models import ExecutionMode
+    from app.repository import TaskRepository, session_scope
+
+    statuses = ("pending", "complete", "failed")
+    with session_scope() as session:
+        repo = TaskRepository(session)
+        for start in range(0, rows, 10_000):
+            repo.bulk_insert_tasks(
+                [
+                    {
+                        "title": f"task {i}",
+                        "description": "bulk",
+                        "estimated_steps": i % 6,
+                        "mode": ExecutionMode.PLANNED if i % 2 else ExecutionMode.INVESTIGATIVE,
+                        "status": statuses[i % len(statuses)],
+                    }
+                    for i in range(start, min(rows, start + 10_000))
+                ]
+            )
+
+    rng = random.Random(13)
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(pages):
+        params = {"after": rng.randint(0, rows), "limit": 100, "status": rng.choice(statuses)}
+        page_started = time.perf_counter()
+        response = client.get("/tasks", params=params)
+        latencies.append(time.perf_counter() - page_started)
+        errors += response.status_code >= 500
+    return _result(latencies, time.perf_counter() - started, errors, db_path)
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Describe every scenario whose throughput or p99 regressed past ``tolerance``."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result.req_per_s < base["req_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: req/s {result.req_per_s:.0f} < baseline {base['req_per_s']:.0f}")
+        if result.p99_ms > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {result.p99_ms:.1f}ms > baseline {base['p99_ms']:.1f}ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for every workload size")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--scenarios", default="mix,sse,audit,tasks")
+    parser.add_argument("--save", type=Path, help="write the results to this baseline file")
+    parser.add_argument("--compare", type=Path, help="baseline file to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+    scaled = lambda n: max(1, int(n * args.scale))  # noqa: E731
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        # Must be set before the app is imported: settings are read at import time.
+        os.environ["TASK_RUNNER_DB_PATH"] = str(db_path)
+        os.environ["TASK_RUNNER_AUDIT_ARCHIVE_DIR"] = str(Path(tmp) / "archive")
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+        from app.repository import get_engine
+
+        scenarios = args.scenarios.split(",")
+        results: Dict[str, Result] = {}
+        with TestClient(app) as client:
+            if "mix" in scenarios:
+                results["mix"] = bench_mix(client, db_path, args.clients, scaled(2000))
+            if "sse" in scenarios:
+                results["sse"] = bench_sse(db_path, scaled(50), scaled(200))
+            if "audit" in scenarios:
+                results["audit"] = bench_audit(client, db_path, scaled(200_000), scaled(500))
+            if "tasks" in scenarios:
+                results["tasks"] = bench_tasks(client, db_path, scaled(100_000), scaled(500))
+        get_engine().dispose()
+
+    for name, result in results.items():
+        print(
+            f"{name:>6}: {result.requests} reqs  {result.req_per_s:8.0f} req/s  "
+            f"p50={result.p50_ms:7.2f}ms  p99={result.p99_ms:7.2f}ms  errors={result.errors}  "
+            f"db={result.db_bytes / 2**20:.1f}MiB  rss={result.rss_mb:.0f}MiB"
+        )
+    if args.save:
+        args.save.write_text(json.dumps({name: asdict(result) for name, result in results.items()}, indent=2) + "\n")
+        print(f"baseline saved to {args.save}")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare read-heavy throughput with and without the task read cache.
+
+Run from the project root::
+
+    python -m benchmarks.bench_cache --tasks 1000 --ops 5000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel
+
+from app.cache import LRUCache
+from app.models import Task
+from app.repository import CachedTaskRepository, TaskRepository
+from app.settings import StorageProfile
+from app.storage import build_engine
+
+
+def run(engine, make_repo, tasks: int, ops: int, seed: int = 7) -> float:  # type: ignore[no-untyped-def]
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for i in range(ops):
+        with Session(engine) as session:
+            repo = make_repo(session)
+            # Nine point lookups per list page, roughly the mix of the task detail routes.
+            if i % 10:
+                repo.get(rng.randint(1, tasks))
+            else:
+                repo.list_task_rows(limit=100)
+    return ops / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--ops", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(StorageProfile(path=Path(tmp) / "cache.db", single_writer=False))
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add_all(Task(title=f"task {i}", description="", estimated_steps=i % 5) for i in range(args.tasks))
+            session.commit()
+
+        task_cache = LRUCache(max_entries=args.tasks * 2, ttl_seconds=300)
+        uncached = run(engine, TaskRepository, args.tasks, args.ops)
+        cached = run(engine, lambda session: CachedTaskRepository(session, task_cache), args.tasks, args.ops)
+        engine.dispose()
+
+    print(f"uncached: {uncached:.0f} reads/s")
+    print(f"  cached: {cached:.0f} reads/s  ({cached / uncached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Profile cold-start import time and fail when a target exceeds its budget.
+
+Run from the project root::
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --budget app.main=600 --top 15
+
+Each target is imported in a fresh interpreter ``--repeat`` times; the median
+wall time is checked against the target's budget in milliseconds. A target of
+the form ``module:attr`` also resolves the attribute, so ``app.main:app``
+covers building the application. The breakdown sums ``-X importtime`` self
+times by top-level package, interpreter start-up included, which shows what a
+slow start is paying for.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Milliseconds of median wall time per target; generous, since CI machines vary.
+BUDGETS: Dict[str, float] = {
+    "app.cli": 50,
+    "app.repository": 900,
+    "app.main": 1500,
+    "app.main:app": 1600,
+}
+
+_PROBE = """
+import time
+started = time.perf_counter()
+import {module}
+{resolve}
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _probe(target: str) -> str:
+    module, _, attr = target.partition(":")
+    resolve = f"getattr({module}, {attr!r})" if attr else ""
+    return _PROBE.format(module=module, resolve=resolve)
+
+
+def measure(target: str, repeat: int) -> List[float]:
+    """Wall-clock milliseconds of importing ``target`` in ``repeat`` fresh interpreters."""
+    samples = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _probe(target)], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        samples.append(float(completed.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def breakdown(target: str) -> List[Tuple[str, float]]:
+    """Self import time in milliseconds per top-level package, largest first."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _probe(target)], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    totals: Dict[str, float] = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=list(BUDGETS), help="module or module:attr to import")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages to show in each breakdown")
+    parser.add_argument("--budget", action="append", default=[], metavar="TARGET=MS", help="override a budget")
+    args = parser.parse_args()
+    budgets = dict(BUDGETS)
+    for override in args.budget:
+        target, _, ms = override.partition("=")
+        budgets[target] = float(ms)
+
+    over = []
+    for target in args.targets:
+        median = statistics.median(measure(target, args.repeat))
+        budget = budgets.get(target)
+        verdict = "" if budget is None else f"  budget={budget:.0f}ms" + ("  OVER" if median > budget else "")
+        print(f"{target}: {median:.0f}ms median of {args.repeat}{verdict}")
+        for package, ms in breakdown(target)[: args.top]:
+            print(f"    {package:<24} {ms:7.1f}ms")
+        if budget is not None and median > budget:
+            over.append(target)
+    if over:
+        print(f"over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
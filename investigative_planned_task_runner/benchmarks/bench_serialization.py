@@ -0,0 +1,105 @@
+"""Compare the Pydantic response path with the fastjson path for task pages and events.
+
+Run from the project root::
+
+    python -m benchmarks.bench_serialization --rows 1000 --rounds 50
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from app import fastjson
+from app.models import ExecutionMode
+from app.schemas import AuditLogEntry, TaskSummaryView, TaskView
+from app.serializers import event_dict, summary_dict, task_row_dict
+
+
+def _rows(count: int) -> list[SimpleNamespace]:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f"task {i}",
+            description="Look up pricing tiers and summarise the findings",
+            estimated_steps=i % 5,
+            mode=ExecutionMode.PLANNED,
+            status="complete",
+            forced_mode=None,
+            plan_presented_at=now,
+            plan_approved_at=now,
+            priority=0,
+            deadline=None,
+            summary_id=i if i % 2 else None,
+            summary_short_answer="Completed",
+            summary_detailed_answer="Executed every step",
+            summary_next_steps=["Review the findings with the requester"],
+            summary_steps_completed=4,
+            summary_steps_total=4,
+            summary_duration_ms=12.5,
+            summary_updated_at=now,
+            created_at=now,
+            message=f"Executed plan for task {i}",
+            level="info",
+            duration_ms=1.25,
+        )
+        for i in range(count)
+    ]
+
+
+def _pydantic_page(rows: list[SimpleNamespace], adapter: TypeAdapter) -> bytes:
+    # What the handlers did before: build models, then FastAPI validates and dumps them again.
+    views = [
+        TaskView(
+            id=row.id,
+            title=row.title,
+            description=row.description,
+            estimated_steps=row.estimated_steps,
+            mode=row.mode,
+            status=row.status,
+            forced_mode=row.forced_mode,
+            plan_presented_at=row.plan_presented_at,
+            plan_approved_at=row.plan_approved_at,
+            priority=row.priority,
+            deadline=row.deadline,
+            summary=None if row.summary_id is None else TaskSummaryView(**summary_dict(row)),
+        )
+        for row in rows
+    ]
+    return adapter.dump_json(adapter.validate_python(views))
+
+
+def _timed(fn, rounds: int) -> float:  # type: ignore[no-untyped-def]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    adapter = TypeAdapter(list[TaskView])
+    results = {
+        "task page, pydantic": _timed(lambda: _pydantic_page(rows, adapter), args.rounds),
+        "task page, fastjson": _timed(lambda: fastjson.dumps([task_row_dict(row) for row in rows]), args.rounds),
+        "events, pydantic": _timed(
+            lambda: [AuditLogEntry(**event_dict(row)).json() for row in rows], args.rounds
+        ),
+        "events, fastjson": _timed(lambda: [fastjson.dumps(event_dict(row)) for row in rows], args.rounds),
+    }
+    print(f"orjson: {'yes' if fastjson.orjson is not None else 'no (stdlib json fallback)'}")
+    for name, ms in results.items():
+        print(f"{name:>20}: {ms:.2f} ms per {args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
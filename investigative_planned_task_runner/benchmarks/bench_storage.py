@@ -0,0 +1,91 @@
+"""Compare read/write throughput of the legacy and tuned SQLite storage profiles.
+
+Run from the project root::
+
+    python -m benchmarks.bench_storage --threads 8 --ops 200
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel, select
+
+from app.models import AuditTrail, Task
+from app.settings import StorageProfile
+from app.storage import build_engine
+
+
+def run(profile: StorageProfile, threads: int, ops: int) -> dict[str, float]:
+    engine = build_engine(profile)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        task = Task(title="bench", description="", estimated_steps=1)
+        session.add(task)
+        session.commit()
+        task_id = task.id
+
+    errors = {"write": 0, "read": 0}
+    lock = threading.Lock()
+
+    def writer() -> None:
+        for i in range(ops):
+            try:
+                with Session(engine) as session:
+                    session.add(AuditTrail(task_id=task_id, message=f"event {i}"))
+                    session.commit()
+            except Exception:  # noqa: BLE001 - counted, not raised
+                with lock:
+                    errors["write"] += 1
+
+    def reader() -> None:
+        for _ in range(ops):
+            try:
+                with Session(engine) as session:
+                    session.exec(select(AuditTrail).where(AuditTrail.task_id == task_id).limit(50)).all()
+            except Exception:  # noqa: BLE001 - counted, not raised
+                with lock:
+                    errors["read"] += 1
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    workers += [threading.Thread(target=reader) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return {
+        "seconds": elapsed,
+        "ops_per_s": 2 * threads * ops / elapsed,
+        "failed_writes": errors["write"],
+        "failed_reads": errors["read"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = {
+            "legacy": StorageProfile.legacy(Path(tmp) / "legacy.db"),
+            "tuned": StorageProfile(path=Path(tmp) / "tuned.db", pool_size=args.threads * 2),
+        }
+        for name, profile in profiles.items():
+            result = run(profile, args.threads, args.ops)
+            print(
+                f"{name:>7}: {result['seconds']:.2f}s  "
+                f"mixed ops/s={result['ops_per_s']:.0f}  "
+                f"failed writes={result['failed_writes']}  failed reads={result['failed_reads']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
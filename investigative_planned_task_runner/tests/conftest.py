@@ -7,17 +7,28 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.repository import _DB_PATH, init_db
+from app.plan_cache import PLAN_CACHE
+from app.repository import _DB_PATH, get_engine, init_db
 
 
 @pytest.fixture(autouse=True)
 def reset_db() -> Generator[None, None, None]:
-    if _DB_PATH.exists():
-        os.remove(_DB_PATH)
+    # Drop pooled connections first; they would otherwise keep writing to the deleted file.
+    get_engine().dispose()
+    _remove_db_files()
+    # Plans memoized for one test's tasks must not leak into the next test's fresh database.
+    PLAN_CACHE.clear()
     init_db()
     yield
-    if _DB_PATH.exists():
-        os.remove(_DB_PATH)
+    get_engine().dispose()
+    _remove_db_files()
+
+
+def _remove_db_files() -> None:
+    # WAL mode keeps -wal/-shm sidecars next to the main file.
+    for path in (_DB_PATH, _DB_PATH.with_name(_DB_PATH.name + "-wal"), _DB_PATH.with_name(_DB_PATH.name + "-shm")):
+        if path.exists():
+            os.remove(path)
 
 
 @pytest.fixture
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app import agents
+from app.admission import AdaptiveLimit, Admission, AgentOverloadedError, TokenBucket
+from app.agents import AgentRegistry, FakeAgent
+from app.metrics import AGENT_SHED_TOTAL, METRICS
+from app.models import ExecutionMode, Task
+
+TASK = Task(id=1, title="t", description="", estimated_steps=2, mode=ExecutionMode.INVESTIGATIVE)
+
+
+def _registry(latency, size: int, **options) -> AgentRegistry:
+    registry = AgentRegistry()
+    limit = AdaptiveLimit(size)
+    admission = Admission("fake", limit, **options)
+    registry.register("fake", lambda: FakeAgent(latency), size, timeout_seconds=5, admission=admission)
+    return registry
+
+
+def test_calls_over_the_rate_are_shed_with_the_time_until_a_token():
+    registry = _registry(0, size=2, bucket=TokenBucket(rate=0.5, burst=1), queue_timeout=0.1)
+    registry.run("fake", TASK)
+    shed_before = METRICS.count(AGENT_SHED_TOTAL, agent="fake", reason="rate limit")
+
+    with pytest.raises(AgentOverloadedError) as shed:
+        registry.run("fake", TASK)
+    assert 1.5 < shed.value.retry_after <= 2
+    assert shed.value.retry_after_header == "2"
+    assert METRICS.count(AGENT_SHED_TOTAL, agent="fake", reason="rate limit") == shed_before + 1
+
+
+def test_a_full_queue_sheds_at_once_while_queued_calls_wait_their_turn():
+    registry = _registry(0.3, size=1, queue_size=1, queue_timeout=5)
+    admission = registry.admission("fake")
+    results = []
+    first = threading.Thread(target=lambda: results.append(registry.run("fake", TASK).output))
+    first.start()
+    while admission.in_flight == 0:
+        time.sleep(0.005)
+    queued = threading.Thread(target=lambda: results.append(registry.run("fake", TASK).output))
+    queued.start()
+    while admission.waiting == 0:
+        time.sleep(0.005)
+
+    started = time.perf_counter()
+    with pytest.raises(AgentOverloadedError):
+        registry.run("fake", TASK)
+    assert time.perf_counter() - started < 0.1
+    first.join()
+    queued.join()
+    assert results == ["Handled task 1", "Handled task 1"]
+
+
+def test_limit_backs_off_while_latency_rises_and_recovers_after():
+    latency = [0.02]
+    registry = _registry(lambda: latency[0], size=4)
+    limit = registry.admission("fake").limit
+    for _ in range(5):
+        registry.run("fake", TASK)
+    assert limit.value == 4
+
+    latency[0] = 0.1
+    for _ in range(5):
+        registry.run("fake", TASK)
+    assert limit.value < 4
+
+    for _ in range(30):
+        limit.observe(0.02)
+    assert limit.value == 4
+
+
+def test_stream_steps_are_paced_by_the_rate():
+    registry = _registry(0, size=1, bucket=TokenBucket(rate=20, burst=1), queue_timeout=1)
+    started = time.perf_counter()
+    steps = [response.step for response in registry.stream("fake", TASK)]
+    assert steps == [0, 1]
+    # One token came with admission; the second step waited ~1/20s for its own.
+    assert time.perf_counter() - started >= 0.04
+
+
+def test_shed_api_calls_get_429_with_retry_after(client, monkeypatch):
+    registry = AgentRegistry()
+    admission = Admission("planner", AdaptiveLimit(1), TokenBucket(rate=0.1, burst=1), queue_timeout=0)
+    registry.register(agents.PlannerAgent.name, agents.PlannerAgent, 1, timeout_seconds=5, admission=admission)
+    monkeypatch.setattr(agents, "AGENTS", registry)
+    first, second = (
+        client.post("/tasks", json={"title": title, "description": "d", "estimated_steps": 3}).json()["id"]
+        for title in ("One", "Two")
+    )
+
+    assert client.post(f"/tasks/{first}/plan").status_code == 200
+    response = client.post(f"/tasks/{second}/plan")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert "rate limit" in response.json()["detail"]
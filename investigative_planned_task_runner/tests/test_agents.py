@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from app.agents import AgentRegistry, AgentResponse, AgentTimeoutError
+from app.models import ExecutionMode, Task
+
+TASK = Task(id=1, title="t", description="", estimated_steps=1, mode=ExecutionMode.INVESTIGATIVE)
+
+
+class CountingAgent:
+    created = 0
+
+    def __init__(self) -> None:
+        CountingAgent.created += 1
+
+    def run(self, task: Task) -> AgentResponse:
+        return AgentResponse(agent="counting", output=str(task.id))
+
+
+class SlowAsyncAgent:
+    async def run(self, task: Task) -> AgentResponse:
+        await asyncio.sleep(1)
+        return AgentResponse(agent="slow", output="late")
+
+
+def test_agents_are_built_once_when_warmed_and_reused():
+    CountingAgent.created = 0
+    registry = AgentRegistry()
+    registry.register("counting", CountingAgent, size=2, timeout_seconds=1)
+    registry.warm()
+    assert CountingAgent.created == 2
+
+    for _ in range(5):
+        assert registry.run("counting", TASK).output == "1"
+    assert asyncio.run(registry.arun("counting", TASK)).duration_ms >= 0
+    assert CountingAgent.created == 2
+
+
+def test_busy_pool_and_slow_async_agent_time_out():
+    started, release = threading.Event(), threading.Event()
+
+    class BlockingAgent:
+        def run(self, task: Task) -> AgentResponse:
+            started.set()
+            release.wait()
+            return AgentResponse(agent="blocking", output="done")
+
+    registry = AgentRegistry()
+    registry.register("blocking", BlockingAgent, size=1, timeout_seconds=0.05)
+    registry.register("slow", SlowAsyncAgent, size=1, timeout_seconds=0.05)
+    holder = threading.Thread(target=registry.run, args=("blocking", TASK))
+    holder.start()
+    assert started.wait(1)
+    try:
+        with pytest.raises(AgentTimeoutError):
+            registry.run("blocking", TASK)
+    finally:
+        release.set()
+        holder.join()
+
+    with pytest.raises(AgentTimeoutError):
+        asyncio.run(registry.arun("slow", TASK))
+    with pytest.raises(AgentTimeoutError):
+        registry.run("slow", TASK)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("aiosqlite")
+
+from app.async_api import router  # noqa: E402
+from app.async_repository import AsyncTaskRepository, async_session_scope, dispose_async_engine  # noqa: E402
+from app.models import AuditTrail  # noqa: E402
+
+
+@pytest.fixture
+def async_client():
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        yield client
+    asyncio.run(dispose_async_engine())
+
+
+def test_async_routes_create_list_and_plan(async_client):
+    created = async_client.post(
+        "/tasks",
+        json={"title": "Async", "description": "", "estimated_steps": 4},
+    )
+    assert created.status_code == 201
+    task = created.json()
+    assert task["mode"] == "planned"
+
+    page = async_client.get("/tasks", params={"limit": 2})
+    assert page.headers["X-Next-Cursor"] == "2"
+    assert [row["id"] for row in async_client.get("/tasks", params={"after": 3}).json()] == [task["id"]]
+
+    assert async_client.post(f"/tasks/{task['id']}/plan").status_code == 200
+    approved = async_client.post(f"/tasks/{task['id']}/plan/approval", json={"approved": True}).json()
+    assert approved["plan_approved_at"] is not None
+    assert async_client.post(f"/tasks/{task['id']}/execute").json()["status"] == "complete"
+    assert async_client.post("/tasks/999/execute").status_code == 404
+
+
+def test_async_repository_reads_events_in_order():
+    async def scenario() -> list[str]:
+        async with async_session_scope() as session:
+            repo = AsyncTaskRepository(session)
+            for message in ("first", "second"):
+                await repo.log_event(AuditTrail(task_id=1, message=message))
+        async with async_session_scope() as session:
+            rows = await AsyncTaskRepository(session).events_after(1)
+        await dispose_async_engine()
+        return [row.message for row in rows]
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_async_path_streams_one_event_per_step(async_client):
+    task = async_client.post("/tasks", json={"title": "Quick", "description": "d", "estimated_steps": 2}).json()
+    executed = async_client.post(f"/tasks/{task['id']}/execute").json()
+    assert executed["status"] == "complete"
+    assert executed["summary"]["steps_completed"] == 2
+    assert async_client.get(f"/tasks/{task['id']}").json() == executed
+    audit = [row["message"] for row in async_client.get(f"/tasks/{task['id']}/audit").json()]
+    assert [message for message in audit if message.startswith("Executed")] == [
+        f"Executed Step {n} ({n}/2) for task {task['id']}" for n in (1, 2)
+    ]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.models import AuditTrail
+from app.repository import session_scope
+
+
+def _seed(task_id: int, start: datetime) -> None:
+    with session_scope() as session:
+        for i in range(5):
+            level = "error" if i % 2 else "info"
+            session.add(AuditTrail(task_id=task_id, message=f"event {i}", level=level, created_at=start + timedelta(minutes=i)))
+
+
+def test_audit_pages_with_cursor_and_filters(client):
+    start = datetime(2024, 1, 1)
+    _seed(1, start)
+    _seed(2, start)
+
+    first = client.get("/tasks/1/audit", params={"limit": 3})
+    assert [row["message"] for row in first.json()] == ["event 0", "event 1", "event 2"]
+    rest = client.get("/tasks/1/audit", params={"limit": 3, "after": first.headers["X-Next-Cursor"]})
+    assert [row["message"] for row in rest.json()] == ["event 3", "event 4"]
+    assert "X-Next-Cursor" not in rest.headers
+
+    errors = client.get("/tasks/1/audit", params={"level": "error"}).json()
+    assert [row["message"] for row in errors] == ["event 1", "event 3"]
+
+    window = {"since": (start + timedelta(minutes=1)).isoformat(), "until": (start + timedelta(minutes=3)).isoformat()}
+    assert [row["message"] for row in client.get("/tasks/1/audit", params=window).json()] == ["event 1", "event 2"]
+
+
+def test_audit_of_unknown_task_is_404(client):
+    assert client.get("/tasks/999/audit").status_code == 404
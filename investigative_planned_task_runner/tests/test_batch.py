@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+
+from app.models import ExecutionMode
+
+
+def test_batch_create_reports_per_row_results(client):
+    rows = [
+        {"title": "A", "description": "", "estimated_steps": 1},
+        {"title": "B", "description": "", "estimated_steps": 1, "forced_mode": "planned"},
+        {"title": "missing fields"},
+        {"title": "C", "description": "", "estimated_steps": 2},
+    ]
+    response = client.post("/tasks:batch", params={"chunk_size": 2}, json=rows)
+    body = response.json()
+
+    assert response.status_code == 200
+    assert (body["created"], body["failed"]) == (3, 1)
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3]
+    assert body["results"][1]["mode"] == ExecutionMode.PLANNED
+    assert body["results"][2]["error"]
+
+    ids = [result["id"] for result in body["results"] if result["id"] is not None]
+    listed = {task["id"]: task for task in client.get("/tasks").json()}
+    assert [listed[task_id]["title"] for task_id in ids] == ["A", "B", "C"]
+
+
+def test_ndjson_ingest_streams_results_per_line(client):
+    lines = [
+        json.dumps({"title": "A", "description": "", "estimated_steps": 1}),
+        "{not json",
+        json.dumps({"title": "B", "description": "", "estimated_steps": 3, "forced_mode": "planned"}),
+    ]
+    response = client.post(
+        "/tasks:ingest",
+        params={"chunk_size": 2},
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    results = [json.loads(line) for line in response.text.splitlines()]
+
+    by_index = {result["index"]: result for result in results}
+
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[0]["id"] is not None
+    assert by_index[1]["error"].startswith("invalid JSON")
+    assert by_index[2]["mode"] == ExecutionMode.PLANNED
+
+
+def test_failed_chunk_is_reported_per_row(client, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    from app.repository import TaskRepository
+
+    original = TaskRepository.bulk_insert_tasks
+    calls = []
+
+    def flaky(self, rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        return original(self, rows)
+
+    monkeypatch.setattr(TaskRepository, "bulk_insert_tasks", flaky)
+    rows = [{"title": f"T{i}", "description": "", "estimated_steps": 1} for i in range(5)]
+    body = client.post("/tasks:batch", params={"chunk_size": 2}, json=rows).json()
+
+    assert (body["created"], body["failed"]) == (3, 2)
+    assert [bool(result["error"]) for result in body["results"]] == [False, False, True, True, False]
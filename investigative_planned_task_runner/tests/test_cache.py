@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+
+from app import cache
+from app.cache import CACHE_REQUESTS_TOTAL, LRUCache
+from app.metrics import METRICS
+
+
+@pytest.fixture
+def task_cache(monkeypatch):
+    enabled = LRUCache(max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr(cache, "TASK_CACHE", enabled)
+    return enabled
+
+
+def test_lru_evicts_least_recent_and_expires_entries():
+    now = [0.0]
+    lru = LRUCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    now[0] = 11
+    assert lru.get("a") is None
+
+
+def test_cached_reads_are_evicted_by_committed_writes(client, task_cache):
+    hits = METRICS.count(CACHE_REQUESTS_TOTAL, result="hit")
+    task = client.post("/tasks", json={"title": "Cached", "description": "", "estimated_steps": 4}).json()
+
+    client.get("/tasks")
+    client.get("/tasks")
+    assert METRICS.count(CACHE_REQUESTS_TOTAL, result="hit") == hits + 1
+
+    # Each plan call saves the task, so the next lookup misses instead of reading a stale copy.
+    client.post(f"/tasks/{task['id']}/plan")
+    client.post(f"/tasks/{task['id']}/plan")
+    assert METRICS.count(CACHE_REQUESTS_TOTAL, result="hit") == hits + 1
+
+    client.post(f"/tasks/{task['id']}/plan/approval", json={"approved": True})
+    rows = {row["id"]: row for row in client.get("/tasks").json()}
+    assert rows[task["id"]]["plan_approved_at"] is not None
+
+
+def test_unchanged_list_page_answers_304(client):
+    first = client.get("/tasks")
+    etag = first.headers["ETag"]
+    assert client.get("/tasks", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/tasks", json={"title": "New", "description": "", "estimated_steps": 1})
+    assert client.get("/tasks", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app import events
+from app.events import BusMessage, EventBus
+from app.models import AuditTrail
+from app.notify import SQLiteNotifier
+from app.repository import TaskRepository, get_engine, session_scope
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _message(event_id: int, task_id: int = 1) -> BusMessage:
+    return BusMessage(task_id=task_id, id=event_id, data=f'{{"id": {event_id}}}')
+
+
+def _replay(history: list[BusMessage]):
+    return lambda task_id, after, limit: [m for m in history if m.id > after][:limit]
+
+
+async def _take(stream, count: int) -> list[str]:
+    return [(await stream.__anext__())["id"] for _ in range(count)]
+
+
+def test_one_channel_fans_out_to_every_subscriber():
+    async def scenario() -> None:
+        bus = EventBus()
+        history = [_message(1)]
+        first = bus.stream(1, backfill=_replay(history))
+        second = bus.stream(1, backfill=_replay(history))
+        assert await _take(first, 1) == ["1"]
+        assert await _take(second, 1) == ["1"]
+        assert bus.subscriber_count(1) == 2
+
+        bus.publish(_message(2))
+        bus.publish(_message(2, task_id=99))
+        assert await _take(first, 1) == ["2"]
+        assert await _take(second, 1) == ["2"]
+
+        await first.aclose()
+        await second.aclose()
+        assert bus.subscriber_count(1) == 0
+
+    asyncio.run(scenario())
+
+
+def test_resume_cursor_skips_already_seen_events():
+    async def scenario() -> None:
+        bus = EventBus()
+        history = [_message(i) for i in range(1, 6)]
+        stream = bus.stream(1, backfill=_replay(history), after_id=3)
+        assert await _take(stream, 2) == ["4", "5"]
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_backfill_is_read_in_pages():
+    async def scenario() -> None:
+        bus = EventBus(page_size=2)
+        history = [_message(i) for i in range(1, 6)]
+        reads: list[int] = []
+
+        def backfill(task_id: int, after: int, limit: int) -> list[BusMessage]:
+            page = [m for m in history if m.id > after][:limit]
+            reads.append(len(page))
+            return page
+
+        stream = bus.stream(1, backfill=backfill)
+        assert await _take(stream, 5) == ["1", "2", "3", "4", "5"]
+        await stream.aclose()
+        assert max(reads) == 2
+
+    asyncio.run(scenario())
+
+
+def test_lagging_subscriber_catches_up_from_backfill():
+    async def scenario() -> None:
+        bus = EventBus(queue_size=2)
+        history: list[BusMessage] = []
+        stream = bus.stream(1, backfill=_replay(history))
+        pending = asyncio.ensure_future(_take(stream, 1))
+        await asyncio.sleep(0)
+
+        for event_id in range(1, 6):
+            history.append(_message(event_id))
+            bus.publish(_message(event_id))
+        assert await pending == ["1"]
+        assert await _take(stream, 4) == ["2", "3", "4", "5"]
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_log_event_publishes_only_after_commit():
+    async def scenario() -> None:
+        stream = events.BUS.stream(1, backfill=lambda task_id, after, limit: [])
+        pending = asyncio.ensure_future(_take(stream, 1))
+        await asyncio.sleep(0)
+
+        def write(commit: bool) -> None:
+            try:
+                with session_scope() as session:
+                    TaskRepository(session).log_event(AuditTrail(task_id=1, message="hello"))
+                    if not commit:
+                        raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+
+        await asyncio.to_thread(write, False)
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+        await asyncio.to_thread(write, True)
+        assert len(await asyncio.wait_for(pending, timeout=1)) == 1
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def _log(message: str) -> None:
+    with session_scope() as session:
+        TaskRepository(session).log_event(AuditTrail(task_id=1, message=message))
+
+
+def test_sqlite_notifier_delivers_events_committed_by_other_processes_in_order():
+    notifier = SQLiteNotifier(events.BUS, get_engine(), poll_seconds=0.01)
+    notifier.start()
+    previous = events.set_notifier(notifier)
+    other_worker = (
+        "from tests.test_events import _log\n"
+        "_log('from another worker')\n"
+    )
+
+    async def scenario() -> list[str]:
+        stream = events.BUS.stream(1, backfill=lambda task_id, after, limit: [])
+        pending = asyncio.ensure_future(_messages(stream, 2))
+        await asyncio.sleep(0)
+        await asyncio.to_thread(subprocess.run, [sys.executable, "-c", other_worker], cwd=ROOT, check=True)
+        await asyncio.to_thread(_log, "from this worker")
+        try:
+            return await asyncio.wait_for(pending, timeout=5)
+        finally:
+            await stream.aclose()
+
+    try:
+        assert asyncio.run(scenario()) == ["from another worker", "from this worker"]
+    finally:
+        events.set_notifier(previous)
+        notifier.stop()
+
+
+async def _messages(stream, count: int) -> list[str]:
+    return [json.loads((await stream.__anext__())["data"])["message"] for _ in range(count)]
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import pytest
+
+from app import agents
+from app.models import StepCheckpoint
+from app.repository import TaskRepository, session_scope
+from app.services import TaskService, checkpoint_key, recover_interrupted, run_execution_job
+
+
+def _committed_messages(task_id: int) -> list[str]:
+    with session_scope() as session:
+        return [row.message for row in TaskRepository(session).events_after(task_id)]
+
+
+def test_each_step_is_committed_before_the_next_one_runs(client, monkeypatch):
+    task = client.post("/tasks", json={"title": "Stream", "description": "d", "estimated_steps": 3}).json()
+    client.post(f"/tasks/{task['id']}/plan")
+    client.post(f"/tasks/{task['id']}/approve", json={"approved": True})
+    seen_before_step = []
+    original = agents.ExecutorAgent.run_steps
+
+    def observed(self, task, plan=None, done=()):
+        for response in original(self, task, plan, done):
+            seen_before_step.append(sum(message.startswith("Executed") for message in _committed_messages(task.id)))
+            yield response
+
+    monkeypatch.setattr(agents.ExecutorAgent, "run_steps", observed)
+    assert client.post(f"/tasks/{task['id']}/execute").json()["status"] == "complete"
+
+    assert seen_before_step == [0, 1, 2]
+    executed = [message for message in _committed_messages(task["id"]) if message.startswith("Executed")]
+    assert executed == [f"Executed Step {n} ({n}/3) for task {task['id']}" for n in (1, 2, 3)]
+
+
+
+class _RecordingQueue:
+    def __init__(self) -> None:
+        self.jobs = []
+
+    def submit(self, job):
+        self.jobs.append(job)
+        return job
+
+
+def test_interrupted_run_resumes_only_the_unfinished_steps(client, monkeypatch):
+    task_id = client.post("/tasks", json={"title": "Crash", "description": "d", "estimated_steps": 3}).json()["id"]
+    original = agents.ExecutorAgent.run_steps
+    ran = []
+
+    def crash_after_first_step(self, task, plan=None, done=()):
+        for response in original(self, task, plan, done):
+            if ran:
+                raise MemoryError("worker killed")
+            ran.append(response.step)
+            yield response
+
+    monkeypatch.setattr(agents.ExecutorAgent, "run_steps", crash_after_first_step)
+    with session_scope() as session, pytest.raises(MemoryError):
+        service = TaskService(TaskRepository(session))
+        service.execute(service.repo.get(task_id))
+    resumed = []
+
+    def recording(self, task, plan=None, done=()):
+        for response in original(self, task, plan, done):
+            resumed.append(response.step)
+            yield response
+
+    monkeypatch.setattr(agents.ExecutorAgent, "run_steps", recording)
+
+    queue = _RecordingQueue()
+    [job] = recover_interrupted(queue)
+    assert job.resume and job.task_id == task_id
+    run_execution_job(job)
+
+    assert ran == [0] and resumed == [1, 2]
+    with session_scope() as session:
+        assert TaskRepository(session).get(task_id).status == "complete"
+    executed = [message for message in _committed_messages(task_id) if message.startswith("Executed")]
+    assert executed == [f"Executed Step {n} ({n}/3) for task {task_id}" for n in (1, 2, 3)]
+
+
+def test_a_step_is_checkpointed_once():
+    with session_scope() as session:
+        repo = TaskRepository(session)
+        checkpoint = dict(task_id=1, step=0, idempotency_key=checkpoint_key(1, 0), output="done")
+        assert repo.save_checkpoint(StepCheckpoint(**checkpoint))
+        assert not repo.save_checkpoint(StepCheckpoint(**checkpoint))
+        assert [checkpoint.step for checkpoint in repo.checkpoints(1)] == [0]
+
+
+def test_summary_is_materialized_as_steps_complete(client, monkeypatch):
+    task_id = client.post("/tasks", json={"title": "Sum", "description": "d", "estimated_steps": 2}).json()["id"]
+    original = agents.ExecutorAgent.run_steps
+    progress = []
+
+    def observed(self, task, plan=None, done=()):
+        for response in original(self, task, plan, done):
+            with session_scope() as session:
+                row = TaskRepository(session).task_row(task.id)
+                progress.append(row.summary_steps_completed)
+            yield response
+
+    monkeypatch.setattr(agents.ExecutorAgent, "run_steps", observed)
+    executed = client.post(f"/tasks/{task_id}/execute").json()
+
+    assert progress == [None, 1]
+    summary = client.get(f"/tasks/{task_id}").json()["summary"]
+    assert executed["summary"] == summary
+    assert summary["short_answer"] == "Completed Sum"
+    assert (summary["steps_completed"], summary["steps_total"]) == (2, 2)
+    assert summary["detailed_answer"].count("Executed") == 2
+    assert summary["duration_ms"] >= 0
+    listed = next(task for task in client.get("/tasks").json() if task["id"] == task_id)
+    assert listed["summary"] == summary
+    assert client.get("/tasks/999").status_code == 404
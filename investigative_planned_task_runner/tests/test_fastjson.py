@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import json
+
+from app import fastjson
+from app.repository import TaskRepository, session_scope
+from app.schemas import TaskView
+from app.serializers import task_row_dict
+
+
+def test_fast_path_matches_the_schema_encoding(client):
+    client.post("/tasks", json={"title": "Parity", "description": "x", "estimated_steps": 4, "forced_mode": "planned"})
+    with session_scope() as session:
+        rows = TaskRepository(session).list_task_rows()
+
+    for row in rows:
+        fast = json.loads(fastjson.dumps(task_row_dict(row)))
+        assert fast == json.loads(TaskView(**task_row_dict(row)).json())
+
+
+def test_long_lists_stream_as_one_json_array(client, monkeypatch):
+    monkeypatch.setattr(fastjson, "STREAM_THRESHOLD", 2)
+    monkeypatch.setattr(fastjson, "STREAM_SLICE", 2)
+    for i in range(4):
+        client.post("/tasks", json={"title": f"Task {i}", "description": "", "estimated_steps": 1})
+
+    response = client.get("/tasks", params={"limit": 5})
+    assert [task["id"] for task in response.json()] == [1, 2, 3, 4, 5]
+    assert response.headers["X-Next-Cursor"] == "5"
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.jobs import Job, JobQueue, JobStatus
+from app.main import JOBS
+from app.metrics import JOB_QUEUE_DEPTH, METRICS
+from app.models import ExecutionMode
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+
+def test_per_mode_limit_caps_running_jobs():
+    release = threading.Event()
+    queue = JobQueue(lambda job: release.wait(), workers=4, limits={ExecutionMode.PLANNED: 1})
+    jobs = [queue.submit(Job(task_id=i, mode=ExecutionMode.PLANNED)) for i in range(3)]
+    other = queue.submit(Job(task_id=9, mode=ExecutionMode.INVESTIGATIVE))
+
+    _wait_for(lambda: other.started_at is not None)
+    assert queue.running(ExecutionMode.PLANNED) == 1
+    assert queue.depth(ExecutionMode.PLANNED) == 2
+
+    release.set()
+    _wait_for(lambda: all(job.status == JobStatus.SUCCEEDED for job in jobs))
+    queue.shutdown()
+
+
+def test_queued_job_can_be_cancelled_but_running_job_cannot():
+    release = threading.Event()
+    queue = JobQueue(lambda job: release.wait(), workers=1, limits={ExecutionMode.PLANNED: 1})
+    running = queue.submit(Job(task_id=1, mode=ExecutionMode.PLANNED))
+    waiting = queue.submit(Job(task_id=2, mode=ExecutionMode.PLANNED))
+
+    assert queue.cancel(waiting.id)
+    assert waiting.status == JobStatus.CANCELLED
+    assert not queue.cancel(running.id)
+
+    release.set()
+    _wait_for(lambda: running.status == JobStatus.SUCCEEDED)
+    queue.shutdown()
+
+
+def test_jobs_wait_queued_until_a_thread_is_free():
+    release = threading.Event()
+    limits = {ExecutionMode.INVESTIGATIVE: 2, ExecutionMode.PLANNED: 2}
+    queue = JobQueue(lambda job: release.wait(), workers=2, limits=limits)
+    first = [queue.submit(Job(task_id=i, mode=ExecutionMode.INVESTIGATIVE)) for i in range(2)]
+    planned = queue.submit(Job(task_id=9, mode=ExecutionMode.PLANNED))
+
+    assert all(job.status == JobStatus.RUNNING and job.started_at for job in first)
+    assert planned.status == JobStatus.QUEUED
+    assert queue.cancel(planned.id)
+
+    release.set()
+    queue.shutdown()
+
+
+def test_shutdown_cancels_pending_jobs_and_stops_dispatch():
+    release = threading.Event()
+    queue = JobQueue(lambda job: release.wait(), workers=1, limits={})
+    running = queue.submit(Job(task_id=1, mode=ExecutionMode.PLANNED))
+    waiting = queue.submit(Job(task_id=2, mode=ExecutionMode.PLANNED))
+
+    assert queue.shutdown(wait=False) == [waiting]
+    release.set()
+    assert waiting.status == JobStatus.CANCELLED
+    _wait_for(lambda: running.status == JobStatus.SUCCEEDED)
+    assert waiting.started_at is None
+
+
+def test_runner_errors_mark_the_job_failed():
+    def explode(job: Job) -> None:
+        raise RuntimeError("agent crashed")
+
+    queue = JobQueue(explode, workers=1, limits={})
+    job = queue.submit(Job(task_id=1, mode=ExecutionMode.INVESTIGATIVE))
+    _wait_for(lambda: job.finished_at is not None)
+    assert job.status == JobStatus.FAILED
+    assert job.error == "agent crashed"
+    queue.shutdown()
+
+
+def test_background_execute_returns_job_handle(client):
+    task = client.post(
+        "/tasks",
+        json={"title": "Background", "description": "", "estimated_steps": 1},
+    ).json()
+
+    response = client.post(f"/tasks/{task['id']}/execute", params={"background": True})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["task_id"] == task["id"]
+
+    _wait_for(lambda: client.get(f"/jobs/{job['id']}").json()["status"] == JobStatus.SUCCEEDED)
+    statuses = {row["id"]: row["status"] for row in client.get("/tasks").json()}
+    assert statuses[task["id"]] == "complete"
+
+
+def test_background_execute_rejects_a_task_that_is_already_queued(client):
+    task = client.post(
+        "/tasks",
+        json={"title": "Twice", "description": "", "estimated_steps": 1},
+    ).json()
+
+    release = threading.Event()
+    original = JOBS.runner
+    JOBS.runner = lambda job: release.wait()
+    try:
+        assert client.post(f"/tasks/{task['id']}/execute", params={"background": True}).status_code == 202
+        assert client.post(f"/tasks/{task['id']}/execute", params={"background": True}).status_code == 409
+    finally:
+        release.set()
+        JOBS.runner = original
+
+
+def _blocking_queue(workers: int, limits):  # type: ignore[no-untyped-def]
+    """A queue whose jobs run until released, recording the order they start in."""
+    started: list[int] = []
+    releases: dict[int, threading.Event] = {}
+
+    def run(job: Job) -> None:
+        started.append(job.task_id)
+        releases.setdefault(job.task_id, threading.Event()).wait()
+
+    return JobQueue(run, workers=workers, limits=limits), started, releases
+
+
+def _release(releases, task_id: int) -> None:  # type: ignore[no-untyped-def]
+    _wait_for(lambda: task_id in releases)
+    releases[task_id].set()
+
+
+def test_ready_queue_runs_by_priority_then_deadline_then_arrival():
+    queue, started, releases = _blocking_queue(1, {})
+    queue.submit(Job(task_id=0, mode=ExecutionMode.INVESTIGATIVE))
+    now = datetime.utcnow()
+    queue.submit(Job(task_id=1, mode=ExecutionMode.INVESTIGATIVE))
+    queue.submit(Job(task_id=2, mode=ExecutionMode.INVESTIGATIVE, deadline=now + timedelta(hours=2)))
+    queue.submit(Job(task_id=3, mode=ExecutionMode.INVESTIGATIVE, priority=5))
+    queue.submit(Job(task_id=4, mode=ExecutionMode.INVESTIGATIVE, deadline=now + timedelta(hours=1)))
+    queue.submit(Job(task_id=5, mode=ExecutionMode.INVESTIGATIVE))
+    assert METRICS.gauge(JOB_QUEUE_DEPTH, mode="investigative") == 5
+
+    for task_id in (0, 3, 4, 2, 1, 5):
+        _release(releases, task_id)
+    _wait_for(lambda: len(started) == 6)
+    assert started == [0, 3, 4, 2, 1, 5]
+    assert METRICS.gauge(JOB_QUEUE_DEPTH, mode="investigative") == 0
+    queue.shutdown()
+
+
+def test_a_freed_thread_goes_to_the_mode_furthest_below_its_share():
+    limits = {ExecutionMode.INVESTIGATIVE: 2, ExecutionMode.PLANNED: 2}
+    queue, started, releases = _blocking_queue(2, limits)
+    for task_id in (1, 2, 3):
+        queue.submit(Job(task_id=task_id, mode=ExecutionMode.INVESTIGATIVE, priority=9))
+    queue.submit(Job(task_id=4, mode=ExecutionMode.PLANNED))
+
+    _release(releases, 1)
+    _wait_for(lambda: len(started) == 3)
+    # Task 3 is more urgent, but investigative already holds the other thread.
+    assert started == [1, 2, 4]
+    for task_id in (2, 3, 4):
+        _release(releases, task_id)
+    queue.shutdown()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from app.models import ExecutionMode
+
+
+def _create(client, title: str, forced_mode: ExecutionMode | None = None) -> dict:
+    payload = {"title": title, "description": "", "estimated_steps": 1, "forced_mode": forced_mode}
+    return client.post("/tasks", json=payload).json()
+
+
+def test_keyset_pages_walk_every_task_once(client):
+    for i in range(5):
+        _create(client, f"Task {i}")
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"limit": 3} if cursor is None else {"limit": 3, "after": cursor}
+        response = client.get("/tasks", params=params)
+        seen.extend(task["id"] for task in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == 8
+
+
+def test_list_filters_by_mode_and_status(client):
+    forced = _create(client, "Forced", forced_mode=ExecutionMode.PLANNED)
+
+    planned = client.get("/tasks", params={"mode": ExecutionMode.PLANNED.value}).json()
+    assert [task["id"] for task in planned] == [forced["id"]]
+
+    pending = client.get("/tasks", params={"status": "pending"}).json()
+    assert forced["id"] in {task["id"] for task in pending}
+    assert client.get("/tasks", params={"status": "complete"}).json() == []
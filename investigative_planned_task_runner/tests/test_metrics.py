@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from app.metrics import AGENT_RUN_SECONDS, MetricsRegistry
+
+
+def test_registry_reports_quantiles_sum_and_count():
+    registry = MetricsRegistry()
+    for value in range(1, 101):
+        registry.observe("latency_seconds", value / 100, help="Latency", agent="planner")
+
+    assert registry.quantile("latency_seconds", 0.5, agent="planner") == 0.5
+    assert registry.quantile("latency_seconds", 0.99, agent="planner") == 0.99
+    text = registry.render()
+    assert "# TYPE latency_seconds summary" in text
+    assert 'latency_seconds{agent="planner",quantile="0.95"} 0.950000' in text
+    assert 'latency_seconds_count{agent="planner"} 100' in text
+
+
+def test_agent_calls_are_timed_on_events_and_metrics(client):
+    task = client.post("/tasks", json={"title": "Timed", "description": "", "estimated_steps": 4}).json()
+
+    event = client.post(f"/tasks/{task['id']}/plan").json()
+    assert event["duration_ms"] is not None and event["duration_ms"] >= 0
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert f'{AGENT_RUN_SECONDS}_count{{agent="planner",mode="planned"}}' in response.text
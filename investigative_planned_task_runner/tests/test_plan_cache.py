@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from app import agents, plan_cache
+from app.metrics import METRICS
+from app.plan_cache import PLAN_CACHE_REQUESTS_TOTAL
+
+
+def _planned(client, title: str) -> dict:
+    return client.post("/tasks", json={"title": title, "description": "same", "estimated_steps": 4}).json()
+
+
+def test_repeat_plans_are_served_from_cache_and_audited(client, monkeypatch):
+    plan_cache.PLAN_CACHE.clear()
+    calls = []
+    original = agents.PlannerAgent.run
+    monkeypatch.setattr(agents.PlannerAgent, "run", lambda self, task: calls.append(task.id) or original(self, task))
+    hits = METRICS.count(PLAN_CACHE_REQUESTS_TOTAL, result="hit")
+
+    first, twin, other = _planned(client, "Pricing"), _planned(client, "Pricing"), _planned(client, "Churn")
+    plans = [client.post(f"/tasks/{task['id']}/plan").json()["message"] for task in (first, first, twin, other)]
+
+    assert calls == [first["id"], other["id"]]
+    assert plans[0] == plans[1] == plans[2]
+    assert METRICS.count(PLAN_CACHE_REQUESTS_TOTAL, result="hit") == hits + 2
+    audit = [row["message"] for row in client.get(f"/tasks/{twin['id']}/audit").json()]
+    assert any(message.startswith("Plan reused from cache") for message in audit)
+
+
+def test_persisted_plans_survive_losing_the_memory_cache(client, monkeypatch):
+    plan_cache.PLAN_CACHE.clear()
+    task = _planned(client, "Persisted")
+    client.post(f"/tasks/{task['id']}/plan")
+
+    plan_cache.PLAN_CACHE.clear()
+    monkeypatch.setattr(agents.PlannerAgent, "run", lambda self, task: (_ for _ in ()).throw(AssertionError("ran")))
+    assert client.post(f"/tasks/{task['id']}/plan").status_code == 200
+
+
+def test_key_changes_with_inputs_and_planner_version():
+    from app.models import Task
+
+    task = Task(title="a", description="b", estimated_steps=3)
+    key = plan_cache.plan_key(task)
+    assert plan_cache.plan_key(Task(title="a", description="b", estimated_steps=3)) == key
+    assert plan_cache.plan_key(Task(title="a", description="b", estimated_steps=4)) != key
+    assert plan_cache.plan_key(task, version="2") != key
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app import main
+from app.models import AuditTrail, Task
+from app.repository import session_scope
+from app.retention import AuditArchive, archive_cold_events
+from app.settings import RetentionPolicy
+
+NOW = datetime(2024, 6, 1)
+
+
+def _seed(status: str) -> int:
+    with session_scope() as session:
+        task = Task(title=status, description="", estimated_steps=1, status=status)
+        session.add(task)
+        session.flush()
+        for days, level in ((40, "info"), (40, "error"), (1, "info")):
+            session.add(AuditTrail(task_id=task.id, message=f"{level} {days}d", level=level, created_at=NOW - timedelta(days=days)))
+        return task.id
+
+
+def test_cold_rows_of_finished_tasks_move_to_the_archive(tmp_path, client, monkeypatch):
+    done = _seed("complete")
+    running = _seed("running")
+    archive = AuditArchive(tmp_path)
+    monkeypatch.setattr(main, "ARCHIVE", archive)
+
+    policy = RetentionPolicy(archive_dir=tmp_path, info_days=30, error_days=90, batch_size=1)
+    assert archive_cold_events(policy, archive, now=NOW) == 1
+    assert list(tmp_path.glob("date=*/task-*.json.gz"))
+
+    live = client.get(f"/tasks/{done}/audit").json()
+    assert [row["message"] for row in live] == ["error 40d", "info 1d"]
+    merged = client.get(f"/tasks/{done}/audit", params={"include_archived": True}).json()
+    assert [row["message"] for row in merged] == ["info 40d", "error 40d", "info 1d"]
+    assert len(client.get(f"/tasks/{running}/audit").json()) == 3
+
+
+def test_archive_reads_page_by_cursor(tmp_path):
+    done = _seed("complete")
+    archive = AuditArchive(tmp_path)
+    policy = RetentionPolicy(archive_dir=tmp_path, info_days=1, error_days=1)
+    assert archive_cold_events(policy, archive, now=NOW + timedelta(days=5)) == 3
+
+    first = archive.read(done, limit=2)
+    rest = archive.read(done, after_id=first[-1].id)
+    assert [row.message for row in first + rest] == ["info 40d", "error 40d", "info 1d"]
+    assert [row.message for row in archive.read(done, level="error")] == ["error 40d"]
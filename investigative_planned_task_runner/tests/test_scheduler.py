@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import time
+
+from app.jobs import JobQueue
+from app.models import ExecutionMode
+from app.repository import TaskRepository, get_engine, session_scope
+from app.scheduler import Scheduler
+from app.services import run_execution_job
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+
+def _status(task_id: int) -> str:
+    with session_scope() as session:
+        return TaskRepository(session).get(task_id).status
+
+
+def _start_order(task_ids: list[int]) -> list[int]:
+    with session_scope() as session:
+        repo = TaskRepository(session)
+        first_started = {
+            task_id: next(row.id for row in repo.events_after(task_id) if row.message.endswith("started"))
+            for task_id in task_ids
+        }
+    return sorted(task_ids, key=first_started.get)
+
+
+def test_pending_tasks_run_without_execute_most_urgent_first(client):
+    def create(title: str, steps: int, **fields) -> int:  # type: ignore[no-untyped-def]
+        body = {"title": title, "description": "d", "estimated_steps": steps, **fields}
+        return client.post("/tasks", json=body).json()["id"]
+
+    bulk = create("bulk", 1)
+    due_later = create("due later", 1, deadline="2030-01-02T00:00:00Z")
+    due_sooner = create("due sooner", 1, deadline="2030-01-01T00:00:00+02:00")
+    urgent = create("urgent", 1, priority=10)
+    planned = create("needs approval", 1, forced_mode=ExecutionMode.PLANNED.value, priority=20)
+
+    queue = JobQueue(run_execution_job, workers=1, limits={})
+    scheduler = Scheduler(queue, get_engine(), backlog=2, poll_seconds=0.01)
+    scheduler.start()
+    try:
+        investigative = [bulk, due_later, due_sooner, urgent]
+        _wait_for(lambda: all(_status(task_id) == "complete" for task_id in investigative))
+        assert _start_order(investigative) == [urgent, due_sooner, due_later, bulk]
+        assert _status(planned) == "pending"
+
+        client.post(f"/tasks/{planned}/plan")
+        client.post(f"/tasks/{planned}/plan/approval", json={"approved": True})
+        _wait_for(lambda: _status(planned) == "complete")
+    finally:
+        scheduler.stop()
+        queue.shutdown()
+
+    task = client.get(f"/tasks/{due_sooner}").json()
+    assert (task["priority"], task["deadline"]) == (0, "2029-12-31T22:00:00")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app import main as app_main
+from app.cli import main
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run(code: str) -> None:
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+def test_imports_build_nothing_until_used():
+    _run(
+        "import sys, app.repository, app.main\n"
+        "assert app.repository._ENGINE is None\n"
+        "assert 'app' not in vars(app.main)\n"
+        "assert 'sse_starlette' not in sys.modules\n"
+    )
+    _run("import sys, app.repository\nassert 'fastapi' not in sys.modules\n")
+
+
+def test_app_is_built_on_first_access():
+    assert app_main.app is app_main.app
+    assert app_main.create_app() is not app_main.app
+
+
+def test_cli_runs_a_task_in_process(capsys):
+    assert main(["run-task", "2"]) == 0
+    task = json.loads(capsys.readouterr().out)
+    assert task["status"] == "complete"
+    assert task["summary"]["steps_completed"] == task["summary"]["steps_total"]
+    assert main(["run-task", "999"]) == 1
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.models import AuditTrail
+from app.repository import TaskRepository, get_engine, session_scope
+from app.storage import WRITE_GATE
+
+
+def test_connections_use_the_tuned_pragmas():
+    with get_engine().connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+
+def test_concurrent_writers_queue_instead_of_failing():
+    errors: list[Exception] = []
+
+    def write(worker: int) -> None:
+        try:
+            for i in range(20):
+                with session_scope() as session:
+                    TaskRepository(session).log_event(AuditTrail(task_id=1, message=f"{worker}-{i}"))
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with session_scope() as session:
+        assert len(TaskRepository(session).events_after(1)) == 160
+
+
+def test_gate_is_released_when_a_session_closes_without_commit():
+    with session_scope() as session:
+        TaskRepository(session).log_event(AuditTrail(task_id=1, message="held"))
+        session.close()
+
+    # Probe from another thread, as the next request would.
+    acquired: list[bool] = []
+
+    def probe() -> None:
+        acquired.append(WRITE_GATE._lock.acquire(timeout=1))
+        if acquired[0]:
+            WRITE_GATE._lock.release()
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    assert acquired == [True]
+
+
+def test_gate_taken_in_one_thread_can_be_released_from_another():
+    session = Session(get_engine())
+    TaskRepository(session).log_event(AuditTrail(task_id=1, message="flushed here"))
+    # FastAPI can run a dependency's teardown (the commit) on a different worker thread.
+    committer = threading.Thread(target=session.commit)
+    committer.start()
+    committer.join()
+    session.close()
+
+    acquired: list[bool] = []
+
+    def probe() -> None:
+        acquired.append(WRITE_GATE._lock.acquire(timeout=1))
+        if acquired[0]:
+            WRITE_GATE._lock.release()
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    assert acquired == [True]